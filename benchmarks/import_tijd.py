@@ -0,0 +1,56 @@
+# Meet hoe lang het importeren van de rekenkern duurt in een schoon proces,
+# en controleert dat daarbij geen UI- of zware bibliotheken worden geladen.
+#   python benchmarks/import_tijd.py --runs 20
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ZWARE_MODULES = ("streamlit", "matplotlib", "pandas", "numpy", "fpdf")
+
+METING = f"""
+import json, sys, time
+start = time.perf_counter()
+from verduurzaming import calculate_energy_label, calculate_costs_with_rc
+duur = time.perf_counter() - start
+geladen = [m for m in {ZWARE_MODULES!r} if m in sys.modules]
+print(json.dumps({{"seconden": duur, "geladen": geladen}}))
+"""
+
+
+def meet(runs):
+    tijden = []
+    geladen = set()
+    for _ in range(runs):
+        uitvoer = subprocess.run([sys.executable, "-c", METING], cwd=ROOT, capture_output=True, text=True, check=True)
+        meting = json.loads(uitvoer.stdout)
+        tijden.append(meting["seconden"])
+        geladen.update(meting["geladen"])
+    return tijden, sorted(geladen)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importtijd van de rekenkern")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=50.0, help="Foutcode als de mediaan hierboven ligt")
+    args = parser.parse_args(argv)
+
+    tijden, geladen = meet(args.runs)
+    mediaan_ms = statistics.median(tijden) * 1000
+    print(json.dumps({"mediaan_ms": round(mediaan_ms, 2), "max_ms": round(max(tijden) * 1000, 2), "zware_modules": geladen}))
+
+    if geladen:
+        print(f"Rekenkern laadt zware modules: {', '.join(geladen)}", file=sys.stderr)
+        return 1
+    if mediaan_ms > args.max_ms:
+        print(f"Importtijd {mediaan_ms:.1f} ms boven de grens van {args.max_ms} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+# Benchmarks voor de rekenkern, grafieken en PDF-rapporten over portefeuilles van 1 tot 100.000 gebouwen.
+# Meet doorvoer (gebouwen per seconde) en geheugenpiek, en vergelijkt met een opgeslagen basislijn:
+#   python benchmarks/suite.py                      # meten en vergelijken met benchmarks/baseline.json
+#   python benchmarks/suite.py --save-baseline      # huidige metingen als nieuwe basislijn opslaan
+#   python benchmarks/suite.py --cases costs_batch label_batch --sizes 1000 100000
+# De foutcode is 1 als een meting meer dan --threshold slechter is dan de basislijn.
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from verduurzaming import calculate_costs_batch, calculate_costs_with_rc, calculate_energy_label, calculate_energy_labels  # noqa: E402
+from verduurzaming.batch import VLAKKEN, calculate_buildings  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+GROOTTES = (1, 10, 100, 1_000, 10_000, 100_000)
+
+# Parameters zoals de standaardwaarden in de app
+ALGEMEEN = dict(delta_t=15, emissie_per_kwh=0.184, energy_kost=0.6, subsidy_percentage=20)
+UREN = 4800
+
+# Geheugenverschillen onder deze grens tellen niet als regressie; bij kleine portefeuilles is dat ruis
+MIN_GEHEUGEN = 256 * 1024
+
+
+# Vaste, reproduceerbare portefeuille van n gebouwen met vier vlakken
+def portefeuille(n, seed=0):
+    rng = np.random.default_rng(seed)
+    area = rng.uniform(10, 150, (n, 4))
+    current_rc = rng.uniform(0.5, 2.5, (n, 4))
+    return {
+        "area": area,
+        "current_rc": current_rc,
+        "desired_rc": current_rc + rng.uniform(0.5, 3.0, (n, 4)),
+        "material_kost": rng.uniform(10, 100, (n, 4)),
+        "installation_kost": rng.uniform(5, 50, (n, 4)),
+    }
+
+
+def frame(invoer):
+    import pandas as pd
+    return pd.DataFrame({f"{vlak}_{veld}": waarden[:, i]
+                         for veld, waarden in invoer.items() for i, vlak in enumerate(VLAKKEN)})
+
+
+# Elke case krijgt de portefeuille en geeft een functie zonder argumenten terug die het werk doet;
+# voorbereiding (zoals het opbouwen van DataFrames of rapportinvoer) valt buiten de meting.
+def case_costs_scalar(invoer):
+    rijen = [tuple(float(x) for x in rij) for rij in
+             np.stack([invoer[veld] for veld in ("area", "current_rc", "desired_rc", "material_kost", "installation_kost")],
+                      axis=-1).reshape(-1, 5)]
+
+    def run():
+        for area, current_rc, desired_rc, material_kost, installation_kost in rijen:
+            calculate_costs_with_rc(area, current_rc, desired_rc, 0, ALGEMEEN["emissie_per_kwh"], ALGEMEEN["delta_t"],
+                                    UREN, ALGEMEEN["subsidy_percentage"], ALGEMEEN["energy_kost"],
+                                    material_kost, installation_kost)
+    return run
+
+
+def case_costs_batch(invoer):
+    def run():
+        calculate_costs_batch(invoer["area"], invoer["current_rc"], invoer["desired_rc"], invoer["material_kost"],
+                              invoer["installation_kost"], ALGEMEEN["delta_t"], ALGEMEEN["emissie_per_kwh"],
+                              ALGEMEEN["energy_kost"], ALGEMEEN["subsidy_percentage"], UREN)
+    return run
+
+
+def case_buildings_frame(invoer):
+    df = frame(invoer)
+
+    def run():
+        calculate_buildings(df, hours_per_year=UREN, **ALGEMEEN)
+    return run
+
+
+def _kwh_per_m2(invoer):
+    result = calculate_costs_batch(invoer["area"], invoer["current_rc"], invoer["desired_rc"], invoer["material_kost"],
+                                   invoer["installation_kost"], ALGEMEEN["delta_t"], ALGEMEEN["emissie_per_kwh"],
+                                   ALGEMEEN["energy_kost"], ALGEMEEN["subsidy_percentage"], UREN)
+    return result["desired_kWh"].sum(axis=1) / invoer["area"].sum(axis=1)
+
+
+def case_label_scalar(invoer):
+    waarden = _kwh_per_m2(invoer).tolist()
+
+    def run():
+        for waarde in waarden:
+            calculate_energy_label(waarde)
+    return run
+
+
+def case_label_batch(invoer):
+    waarden = _kwh_per_m2(invoer)
+
+    def run():
+        calculate_energy_labels(waarden)
+    return run
+
+
+def _rapporten(invoer):
+    from verduurzaming.rapport import reports_from_frame
+    return [rapport for _, rapport in reports_from_frame(calculate_buildings(frame(invoer), hours_per_year=UREN, **ALGEMEEN))]
+
+
+# Grafieken zonder de LRU-cache, anders meet alles na de eerste herhaling alleen een opzoeking
+def case_charts(invoer):
+    from verduurzaming.grafieken import render_co2_chart, render_cost_savings_chart
+    categorieen = tuple(VLAKKEN.values())
+    reeksen = [(tuple(waarde[0] for waarde in data.values()), tuple(waarde[1] for waarde in data.values()),
+                tuple(waarde[2] for waarde in data.values())) for data, _ in _rapporten(invoer)]
+
+    def run():
+        for kosten, besparing, co2 in reeksen:
+            render_cost_savings_chart.__wrapped__(categorieen, kosten, besparing)
+            render_co2_chart.__wrapped__(categorieen, co2)
+    return run
+
+
+def case_pdf(invoer):
+    from verduurzaming.rapport import render_pdf
+    rapporten = _rapporten(invoer)
+    render_pdf(*rapporten[0])  # lettertype en logo laden hoort niet bij de meting
+
+    def run():
+        for data, totals in rapporten:
+            render_pdf(data, totals)
+    return run
+
+
+# Naam -> (functie, standaard maximale grootte); scalaire paden en rendering per gebouw zijn te traag
+# voor 100.000 gebouwen bij elke run, die zijn met --max-size te verhogen.
+CASES = {
+    "costs_scalar": (case_costs_scalar, 10_000),
+    "costs_batch": (case_costs_batch, None),
+    "buildings_frame": (case_buildings_frame, None),
+    "label_scalar": (case_label_scalar, 100_000),
+    "label_batch": (case_label_batch, None),
+    "charts": (case_charts, 10),
+    "pdf": (case_pdf, 100),
+}
+
+
+# Mediane tijd per uitvoering over repeat herhalingen, en de geheugenpiek van één extra uitvoering.
+# De mediaan is op een gedeelde machine stabieler dan de snelste herhaling.
+def meet(run, repeat):
+    timer = timeit.Timer(run)
+    aantal, _ = timer.autorange()
+    seconden = statistics.median(timer.repeat(repeat=repeat, number=aantal)) / aantal
+
+    tracemalloc.start()
+    try:
+        run()
+        piek = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconden, piek
+
+
+# Vaste hoeveelheid Python- en numpywerk als maat voor de snelheid van de machine op dat moment.
+# Regressies worden beoordeeld op doorvoer maal deze tijd, zodat een drukke of tragere machine
+# niet als regressie telt.
+def kalibratie():
+    getallen = np.arange(10_000, dtype=float)
+    totaal = 0.0
+    for i in range(10_000):
+        totaal += i * 0.5
+    return totaal + float(np.sqrt(getallen).sum())
+
+
+# Eén meting, in het huidige proces
+def meet_case(naam, n, repeat=5):
+    maak, _ = CASES[naam]
+    seconden, piek = meet(maak(portefeuille(n)), repeat)
+    referentie, _ = meet(kalibratie, repeat)
+    return {"case": naam, "size": n, "seconds": seconden, "per_second": n / seconden, "peak_bytes": piek,
+            "calibration_seconds": referentie}
+
+
+# Elke meting draait in een eigen proces, zodat de volgorde van de cases (opgewarmde caches,
+# de toestand van de geheugenallocator) de uitkomst niet beïnvloedt
+def meet_in_proces(naam, n, repeat=5):
+    uitvoer = subprocess.run([sys.executable, __file__, "--run", naam, str(n), "--repeat", str(repeat)],
+                             cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(uitvoer.stdout)
+
+
+def benchmark(cases, sizes, repeat=5, max_size=None):
+    resultaten = []
+    for naam in cases:
+        grens = max_size if max_size is not None else CASES[naam][1]
+        for n in sizes:
+            if grens is not None and n > grens:
+                continue
+            resultaat = meet_in_proces(naam, n, repeat)
+            print(json.dumps(resultaat), flush=True)
+            resultaten.append(resultaat)
+    return resultaten
+
+
+# Regressies van één meting ten opzichte van de basislijn, als beschrijvingen
+def regressies(r, oud, threshold):
+    gevonden = []
+    if r["per_second"] * r["calibration_seconds"] < oud["per_second"] * oud["calibration_seconds"] * (1 - threshold):
+        gevonden.append(f"{r['case']}/{r['size']}: {r['per_second']:,.0f} gebouwen/s, "
+                        f"basislijn {oud['per_second']:,.0f}")
+    if r["peak_bytes"] > oud["peak_bytes"] * (1 + threshold) and r["peak_bytes"] - oud["peak_bytes"] > MIN_GEHEUGEN:
+        gevonden.append(f"{r['case']}/{r['size']}: piek {r['peak_bytes'] / 2**20:.1f} MB, "
+                        f"basislijn {oud['peak_bytes'] / 2**20:.1f} MB")
+    return gevonden
+
+
+# Vergelijkt met de basislijn. Een meting die slechter lijkt wordt tot retries keer opnieuw gedaan,
+# zodat een korte verstoring op de machine geen fout geeft; alleen een herhaalbare regressie telt.
+def vergelijk(resultaten, basislijn, threshold, retries=2, repeat=5):
+    basis = {(r["case"], r["size"]): r for r in basislijn}
+    gevonden = []
+    for r in resultaten:
+        oud = basis.get((r["case"], r["size"]))
+        if oud is None:
+            continue
+        fouten = regressies(r, oud, threshold)
+        for _ in range(retries):
+            if not fouten:
+                break
+            fouten = regressies(meet_in_proces(r["case"], r["size"], repeat), oud, threshold)
+        gevonden += fouten
+    return gevonden
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks voor berekening, grafieken en PDF")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(GROOTTES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-size", type=int, help="Maximale portefeuille voor alle cases (standaard per case)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Schrijf de metingen weg als nieuwe basislijn")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Toegestane verslechtering (0.25 = 25%%)")
+    parser.add_argument("--retries", type=int, default=2, help="Aantal herhalingen van een meting die slechter lijkt")
+    parser.add_argument("--run", nargs=2, metavar=("CASE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run:
+        print(json.dumps(meet_case(args.run[0], int(args.run[1]), args.repeat)))
+        return 0
+
+    resultaten = benchmark(args.cases, args.sizes, args.repeat, args.max_size)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(resultaten, indent=1) + "\n")
+        print(f"Basislijn opgeslagen in {args.baseline}", file=sys.stderr)
+        return 0
+    if not args.baseline.exists():
+        print(f"Geen basislijn in {args.baseline}; maak er een met --save-baseline", file=sys.stderr)
+        return 0
+
+    gevonden = vergelijk(resultaten, json.loads(args.baseline.read_text()), args.threshold, args.retries, args.repeat)
+    for regressie in gevonden:
+        print(f"Regressie: {regressie}", file=sys.stderr)
+    return 1 if gevonden else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import os
+from functools import partial
+
+import pandas as pd
+import streamlit as st
+
+from verduurzaming import default_parameter_table
+from verduurzaming.batch import VLAKKEN
+from verduurzaming.portefeuille import Portfolio
+from verduurzaming.werkrij import WorkQueue, QueueFull
+
+# Servermodus (VERDUURZAMING_SERVING=1): het doorrekenen van een portefeuille gaat via een begrensde wachtrij
+SERVING = os.environ.get("VERDUURZAMING_SERVING") == "1"
+WACHTRIJ_TIMEOUT = float(os.environ.get("VERDUURZAMING_WACHTRIJ_TIMEOUT", "2"))
+
+DIMENSIE_NAMEN = {"complex": "Complex", "postcode": "Postcode", "construction_year": "Bouwjaar", "energy_label": "Energielabel"}
+VELD_NAMEN = {"area": "Oppervlakte (m²)", "current_rc": "Huidige RC-waarde", "desired_rc": "Gewenste RC-waarde",
+              "material_kost": "Materiaal kosten (m²)", "installation_kost": "Installatie kosten (m²)"}
+
+# Eén wachtrij per proces, gedeeld door alle sessies
+@st.cache_resource
+def werkrij():
+    return WorkQueue()
+
+# Streamlit layout
+st.title("Portefeuilleoverzicht voor BBDW")
+bestand = st.file_uploader("Portefeuille (CSV met één rij per gebouw, zoals voor python -m verduurzaming):", type="csv")
+
+# Standaardwaarden en typen verwarming uit de parametertabel
+parameters = default_parameter_table()
+standaard = parameters.defaults
+
+with st.sidebar:
+    subsidie_percentage = st.slider('Kies het percentage subsidie:', 0, 30, int(standaard["subsidy_percentage"]))
+    delta_t = st.number_input("Temperatuurverschil (ΔT) tussen binnen en buiten (°C):", min_value=1, max_value=50, value=int(standaard["delta_t"]))
+    heating_type = st.selectbox("Kies het type verwarming:", list(parameters.emission),
+                                index=list(parameters.emission).index(standaard["heating_type"]))
+    Energy_kost = st.number_input("Energie kosten (euro/kWh)", min_value=0.0, max_value=50.0, value=standaard["energy_kost"])
+
+if bestand is None:
+    st.info("Upload een portefeuille om te beginnen. Kolommen complex, postcode en construction_year zijn optioneel.")
+    st.stop()
+
+# De portefeuille wordt per sessie één keer doorgerekend; daarna werken wijzigingen alleen de totalen bij.
+# Bij een ander bestand of andere algemene parameters wordt hij opnieuw opgebouwd.
+params = dict(delta_t=delta_t, emissie_per_kwh=parameters.emission_for(heating_type), energy_kost=Energy_kost,
+              subsidy_percentage=subsidie_percentage, hours_per_year=parameters.hours_per_year)
+sleutel = (bestand.file_id, tuple(params.items()), parameters.table_version)
+if st.session_state.get("portefeuille_sleutel") != sleutel:
+    if SERVING:
+        try:
+            future = werkrij().submit(partial(Portfolio.from_csv_bytes, bestand.getvalue(), **params), timeout=WACHTRIJ_TIMEOUT)
+        except QueueFull:
+            st.warning("Het is op dit moment erg druk. Probeer het over een paar seconden opnieuw.")
+            st.stop()
+    try:
+        if SERVING:
+            with st.spinner("Portefeuille wordt doorgerekend…"):
+                st.session_state["portefeuille"] = future.result()
+        else:
+            st.session_state["portefeuille"] = Portfolio(pd.read_csv(bestand), **params)
+    except ValueError as fout:
+        st.error(f"Portefeuille kan niet worden ingelezen: {fout}")
+        st.stop()
+    st.session_state["portefeuille_sleutel"] = sleutel
+portefeuille = st.session_state["portefeuille"]
+
+# Filters
+st.subheader("Filters")
+filters = {}
+kolom_complex, kolom_postcode = st.columns(2)
+gekozen_complexen = kolom_complex.multiselect("Complex:", portefeuille.values("complex"))
+if gekozen_complexen:
+    filters["complex"] = gekozen_complexen
+gekozen_postcodes = kolom_postcode.multiselect("Postcode:", portefeuille.values("postcode"))
+if gekozen_postcodes:
+    filters["postcode"] = gekozen_postcodes
+bouwjaren = [jaar for jaar in portefeuille.values("construction_year") if isinstance(jaar, (int, float))]
+if len(bouwjaren) > 1:
+    van, tot = st.slider("Bouwjaar:", int(min(bouwjaren)), int(max(bouwjaren)), (int(min(bouwjaren)), int(max(bouwjaren))))
+    if (van, tot) != (int(min(bouwjaren)), int(max(bouwjaren))):
+        filters["construction_year"] = (van, tot)
+gekozen_labels = st.multiselect("Energielabel:", portefeuille.values("energy_label"))
+if gekozen_labels:
+    filters["energy_label"] = gekozen_labels
+
+# Totalen
+totaal = portefeuille.totals(filters)
+kolom_1, kolom_2, kolom_3, kolom_4 = st.columns(4)
+kolom_1.metric("Gebouwen", f"{totaal['buildings']:,}")
+kolom_2.metric("Totale kosten", f"€{totaal['cost']:,.0f}")
+kolom_3.metric("Besparing per jaar", f"{totaal['savings']:,.0f} kWh")
+kolom_4.metric("CO2-besparing", f"{totaal['co2_savings']:,.0f} kg")
+st.caption(f"Parametertabel {portefeuille.parameter_version}")
+
+st.subheader("Labelverdeling")
+st.bar_chart(portefeuille.label_distribution(filters).rename("Gebouwen"))
+
+st.subheader("Totalen per groep")
+groepering = st.selectbox("Groeperen op:", list(DIMENSIE_NAMEN), format_func=DIMENSIE_NAMEN.get)
+st.dataframe(portefeuille.aggregate(groepering, filters).rename(columns={
+    "buildings": "Gebouwen", "cost": "Kosten (€)", "savings": "Besparing (kWh)", "co2_savings": "CO2-besparing (kg)",
+    "total_savings_euro": "Bespaarde energiekosten (€)", "kwh_per_m2": "kWh per m² per jaar",
+}))
+
+# Eén gebouw aanpassen; de totalen hierboven worden bij de volgende run bijgewerkt zonder herberekening
+st.subheader("Gebouw aanpassen")
+gebouw = st.text_input("Gebouw-ID:")
+if gebouw:
+    index = portefeuille.inputs.index
+    try:
+        building_id = index.dtype.type(gebouw) if index.dtype.kind in "iuf" else gebouw
+        huidig = portefeuille.inputs.loc[building_id]
+    except (KeyError, ValueError):
+        st.error(f"Gebouw {gebouw} staat niet in de portefeuille")
+    else:
+        with st.form("gebouw_aanpassen"):
+            wijzigingen = {}
+            for vlak, naam in VLAKKEN.items():
+                st.markdown(f"**{naam}**")
+                kolommen = st.columns(len(VELD_NAMEN))
+                for kolom, (veld, veld_naam) in zip(kolommen, VELD_NAMEN.items()):
+                    wijzigingen[f"{vlak}_{veld}"] = kolom.number_input(veld_naam, value=float(huidig[f"{vlak}_{veld}"]),
+                                                                       key=f"{building_id}_{vlak}_{veld}")
+            if st.form_submit_button("Bijwerken"):
+                portefeuille.update(building_id, **wijzigingen)
+                st.rerun()
+        st.dataframe(portefeuille.buildings().loc[[building_id]])
@@ -67,9 +67,8 @@ def generate_pdf(data, totals):
     pdf.set_font("Arial", 'I', 8)
     pdf.cell(200, 10, txt="Contact: info@bbdw.nl | www.bbdw.nl", ln=True, align='C')
 
-    pdf_output = "verduurzaming_resultaten_professioneel.pdf"
-    pdf.output(pdf_output)
-    return pdf_output
+    # PDF in het geheugen als bytes, zonder tussenbestand
+    return pdf.output(dest='S').encode('latin-1')
 
 # Functie voor het genereren van de invoer voor elke categorie
 def generate_category_input(category_name, default_area, default_current_rc, default_desired_rc, cost_per_m2):
@@ -197,8 +196,8 @@ if st.button('Genereer PDF'):
         'payback': total_payback,
         'heating_costs': total_heating_costs
     }
-    pdf_file = generate_pdf(data, totals)
-    st.download_button("Download PDF", pdf_file)
+    pdf_data = generate_pdf(data, totals)
+    st.download_button("Download PDF", pdf_data, file_name="verduurzaming_resultaten_professioneel.pdf", mime="application/pdf")
 
     # AI Advies
 if st.button('Vraag AI Advies'):
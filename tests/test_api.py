@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+from verduurzaming.api import CalculatorAPI, _vlakken_invoer
+from verduurzaming.berekening import calculate_costs_with_rc
+
+VLAK = {"area": 50.0, "current_rc": 1.0, "desired_rc": 4.0, "material_kost": 40.0, "installation_kost": 10.0}
+
+
+# Stuurt verzoeken tegelijk naar de ASGI-app en geeft per verzoek (status, headers, body)
+def _verzoeken(app, *verzoeken):
+    async def verzoek(methode, pad, invoer):
+        berichten = [{"type": "http.request", "body": json.dumps(invoer).encode() if invoer is not None else b""}]
+        antwoord = []
+
+        async def receive():
+            return berichten.pop(0)
+
+        async def send(bericht):
+            antwoord.append(bericht)
+
+        await app({"type": "http", "method": methode, "path": pad}, receive, send)
+        return antwoord[0]["status"], dict(antwoord[0]["headers"]), antwoord[1]["body"]
+
+    async def alles():
+        try:
+            return await asyncio.gather(*(verzoek(*v) for v in verzoeken))
+        finally:
+            await app.costs.close()
+            await app.buildings.close()
+
+    return asyncio.run(alles())
+
+
+def test_costs_match_scalar_calculation_when_batched():
+    app = CalculatorAPI(max_wait=0.05)
+    invoer = [{**VLAK, "desired_rc": rc, "heating_type": "Gas"} for rc in (2.0, 4.0, 6.0)]
+    antwoorden = _verzoeken(app, *(("POST", "/costs", v) for v in invoer))
+    for (status, headers, body), v in zip(antwoorden, invoer):
+        assert status == 200 and b"x-parameter-version" in headers
+        uitkomst = json.loads(body)
+        verwacht = calculate_costs_with_rc(v["area"], v["current_rc"], v["desired_rc"], None, 0.184, 15, 4800, 20, 0.6,
+                                           v["material_kost"], v["installation_kost"])
+        assert uitkomst["total_kost_with"] == pytest.approx(verwacht[0])
+        assert uitkomst["saved_kWh"] == pytest.approx(verwacht[1])
+    assert "verduurzaming_api_batches_total" in app.metrics.prometheus_text()
+
+
+def test_buildings_label_and_errors():
+    app = CalculatorAPI()
+    gebouw, label, lijst_type, onbekend, leeg = _verzoeken(
+        app,
+        ("POST", "/buildings", {"surfaces": [{"name": "Dak", **VLAK}, {"name": "Vloer", **VLAK}]}),
+        ("POST", "/label", {"kwh_per_m2_per_year": [10.0, 1000.0]}),
+        ("POST", "/costs", {**VLAK, "heating_type": ["Gas"]}),
+        ("GET", "/onbekend", None),
+        ("POST", "/costs", {"area": 1}),
+    )
+    assert gebouw[0] == 200
+    uitkomst = json.loads(gebouw[2])
+    assert [vlak["name"] for vlak in uitkomst["surfaces"]] == ["Dak", "Vloer"]
+    assert uitkomst["totals"]["cost"] == pytest.approx(2 * uitkomst["surfaces"][0]["total_kost_with"])
+    assert json.loads(label[2])["energy_label"][-1] == "G"
+    assert lijst_type[0] == 400 and "heating_type" in json.loads(lijst_type[2])["error"]
+    assert onbekend[0] == 404
+    assert leeg[0] == 400 and "Ontbrekende velden" in json.loads(leeg[2])["error"]
+
+
+def test_unknown_heating_type_is_a_clear_error():
+    with pytest.raises(ValueError, match="Onbekend type verwarming"):
+        _vlakken_invoer({**VLAK, "heating_type": "Hout"})
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from verduurzaming import calculate_costs_batch, calculate_costs_with_rc, calculate_energy_label
+from verduurzaming.batch import VLAKKEN, calculate_buildings
+
+
+# De oorspronkelijke scalaire berekening uit de app, als referentie
+def _referentie(area, current_rc, desired_rc, emissie_per_kwh, delta_t, subsidy_percentage, energy_kost,
+                material_kost, installation_kost):
+    current_kWh = (1 / current_rc * area * delta_t * 4800) / 1000
+    desired_kWh = (1 / desired_rc * area * delta_t * 4800) / 1000
+    saved_kWh = current_kWh - desired_kWh
+    savings_euro = saved_kWh * energy_kost
+    total_kost_without = (material_kost * area) + (installation_kost * area)
+    total_kost_with = total_kost_without - (total_kost_without / 100) * subsidy_percentage
+    payback_time = total_kost_with / savings_euro if savings_euro != 0 else float('inf')
+    return total_kost_with, saved_kWh, saved_kWh * emissie_per_kwh, payback_time, savings_euro, desired_kWh
+
+
+@pytest.fixture
+def invoer():
+    rng = np.random.default_rng(11)
+    vorm = (25, len(VLAKKEN))
+    velden = {"area": rng.uniform(5, 120, vorm), "current_rc": rng.uniform(0.2, 3.0, vorm),
+              "desired_rc": rng.uniform(2.0, 8.0, vorm), "material_kost": rng.uniform(10, 90, vorm),
+              "installation_kost": rng.uniform(0, 40, vorm)}
+    velden["desired_rc"][0, 0] = velden["current_rc"][0, 0]  # geen besparing: oneindige terugverdientijd
+    return velden
+
+
+def test_batch_matches_original_scalar_calculation(invoer):
+    delta_t = np.linspace(5, 25, len(invoer["area"]))[:, None]
+    result = calculate_costs_batch(invoer["area"], invoer["current_rc"], invoer["desired_rc"], invoer["material_kost"],
+                                   invoer["installation_kost"], delta_t, 0.184, 0.6, 20)
+    for (g, v), area in np.ndenumerate(invoer["area"]):
+        verwacht = _referentie(area, invoer["current_rc"][g, v], invoer["desired_rc"][g, v], 0.184, delta_t[g, 0], 20, 0.6,
+                               invoer["material_kost"][g, v], invoer["installation_kost"][g, v])
+        scalair = calculate_costs_with_rc(area, invoer["current_rc"][g, v], invoer["desired_rc"][g, v], None, 0.184,
+                                          delta_t[g, 0], 4800, 20, 0.6, invoer["material_kost"][g, v],
+                                          invoer["installation_kost"][g, v])
+        assert scalair == pytest.approx(verwacht)
+        assert [result[sleutel][g, v] for sleutel in ("total_kost_with", "saved_kWh", "co2_savings", "payback_time",
+                                                      "savings_euro", "desired_kWh")] == pytest.approx(verwacht)
+        assert result["energy_label"][g, v] == calculate_energy_label(verwacht[5] / area)
+
+
+def test_buildings_totals_match_per_surface_sums(invoer):
+    chunk = pd.DataFrame({f"{vlak}_{veld}": waarden[:, i] for veld, waarden in invoer.items()
+                          for i, vlak in enumerate(VLAKKEN)})
+    uitvoer = calculate_buildings(chunk, delta_t=15, emissie_per_kwh=0.184, energy_kost=0.6, subsidy_percentage=20)
+    for g in range(len(chunk)):
+        verwacht = [_referentie(invoer["area"][g, v], invoer["current_rc"][g, v], invoer["desired_rc"][g, v], 0.184, 15,
+                                20, 0.6, invoer["material_kost"][g, v], invoer["installation_kost"][g, v])
+                    for v in range(len(VLAKKEN))]
+        assert uitvoer["cost"].iloc[g] == pytest.approx(sum(r[0] for r in verwacht))
+        assert uitvoer["savings"].iloc[g] == pytest.approx(sum(r[1] for r in verwacht))
+        assert uitvoer["payback"].iloc[g] == pytest.approx(max(r[3] for r in verwacht))
+        kwh_per_m2 = sum(r[5] for r in verwacht) / invoer["area"][g].sum()
+        assert uitvoer["energy_label"].iloc[g] == calculate_energy_label(kwh_per_m2)
@@ -0,0 +1,70 @@
+import numpy as np
+
+from verduurzaming.graaf import ComputationGraph, surface_nodes
+from verduurzaming.vlakken import SurfaceTable
+
+PARAMETERS = (15, 0.184, 0.6, 20, 4800)
+
+
+def test_only_dirty_nodes_are_recomputed():
+    graaf = ComputationGraph()
+    aanroepen = []
+    graaf.input("a", 1)
+    graaf.input("b", 2)
+    graaf.node("dubbel_a", lambda a: aanroepen.append("dubbel_a") or a * 2, "a")
+    graaf.node("dubbel_b", lambda b: aanroepen.append("dubbel_b") or b * 2, "b")
+    graaf.node("som", lambda x, y: aanroepen.append("som") or x + y, "dubbel_a", "dubbel_b")
+    assert graaf.get("som") == 6
+
+    aanroepen.clear()
+    graaf.input("a", 1)
+    assert graaf.get("som") == 6 and aanroepen == []
+
+    graaf.input("a", 5)
+    assert graaf.get("som") == 14 and aanroepen == ["dubbel_a", "som"]
+
+
+def test_equal_result_stops_propagation():
+    graaf = ComputationGraph()
+    graaf.input("x", 3)
+    graaf.node("teken", lambda x: x > 0, "x")
+    graaf.node("tekst", lambda teken: "positief" if teken else "negatief", "teken")
+    graaf.get("tekst")
+    graaf.reset_stats()
+    graaf.input("x", 4)
+    assert graaf.get("tekst") == "positief"
+    assert graaf.recomputed == ["teken"]
+
+
+def test_surface_edit_recomputes_one_surface_and_matches_full_calculation():
+    graaf = ComputationGraph()
+    vlakken = SurfaceTable.default()
+    surface_nodes(graaf, vlakken, PARAMETERS)
+    graaf.get("totals")
+
+    tabel = vlakken.to_frame()
+    tabel.loc[1, "desired_rc"] = 7.0
+    gewijzigd = SurfaceTable.from_frame(tabel)
+    graaf.reset_stats()
+    surface_nodes(graaf, gewijzigd, PARAMETERS)
+    totals = graaf.get("totals")
+    assert graaf.recomputed == [f"vlak:{gewijzigd.names[1]}", "resultaat", "totals"]
+
+    volledig = gewijzigd.calculate(*PARAMETERS)
+    for sleutel, waarden in graaf.get("resultaat").items():
+        if sleutel == "energy_label":
+            assert waarden.tolist() == volledig[sleutel].tolist()
+        else:
+            np.testing.assert_allclose(waarden, volledig[sleutel])
+    assert totals == {sleutel: waarden[0].item() for sleutel, waarden in gewijzigd.totals(volledig).items()}
+
+
+def test_removed_surface_drops_its_nodes():
+    graaf = ComputationGraph()
+    vlakken = SurfaceTable.default()
+    surface_nodes(graaf, vlakken, PARAMETERS)
+    graaf.get("totals")
+    kleiner = SurfaceTable.from_frame(vlakken.to_frame().iloc[1:])
+    surface_nodes(graaf, kleiner, PARAMETERS)
+    assert graaf.names("vlak:") == [f"vlak:{naam}" for naam in kleiner.names]
+    assert len(graaf.get("resultaat")["saved_kWh"]) == len(kleiner)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from verduurzaming.kasstroom import (calculate_discounted_payback, calculate_irr, calculate_npv, cash_flows,
+                                     discount)
+
+
+def test_npv_is_zero_at_irr():
+    investment = np.array([1000.0, 5000.0, 2500.0])
+    savings = np.array([150.0, 400.0, 90.0])
+    irr = calculate_irr(investment, savings, years=30, escalation=0.02, degradation=0.005)
+    assert np.isfinite(irr).all()
+    npv = calculate_npv(investment, savings, irr, years=30, escalation=0.02, degradation=0.005)
+    # De IRR is op 1e-7 nauwkeurig; relatief aan de investering is de NPV dan vrijwel 0
+    assert npv / investment == pytest.approx(np.zeros(3), abs=1e-5)
+
+
+def test_irr_outside_bounds_is_nan():
+    # Zonder besparing is er geen rente waarbij de investering terugkomt; bij een enorme besparing ligt de IRR
+    # boven upper
+    assert np.isnan(calculate_irr(10_000.0, 0.0, years=10))
+    assert np.isnan(calculate_irr(1000.0, 1e6, years=10))
+    # Binnen de horizon niet nominaal terugverdiend geeft een negatieve IRR
+    assert -0.99 < calculate_irr(10_000.0, 10.0, years=10) < 0
+
+
+def test_closed_form_npv_matches_discounted_flows():
+    stromen = cash_flows(2000.0, 180.0, years=25, escalation=0.03, degradation=0.01, subsidy=400.0, subsidy_year=2)
+    gesloten = calculate_npv(2000.0, 180.0, 0.04, years=25, escalation=0.03, degradation=0.01, subsidy=400.0,
+                             subsidy_year=2)
+    assert discount(stromen, 0.04).sum() == pytest.approx(gesloten)
+
+
+def test_discounted_payback_interpolates_within_year():
+    stromen = np.array([-250.0, 100.0, 100.0, 100.0])
+    assert calculate_discounted_payback(stromen) == pytest.approx(2.5)
+    assert np.isinf(calculate_discounted_payback(np.array([-1000.0, 100.0, 100.0])))
@@ -0,0 +1,44 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from verduurzaming.klimaat import DegreeHourTable, climate_year_from_bytes, load_hourly_temperatures
+
+KNMI = b"""# BRON: KONINKLIJK NEDERLANDS METEOROLOGISCH INSTITUUT (KNMI)
+# Opmerking: door invoering van de nieuwe meetapparatuur
+#
+# STN      LON(east)   LAT(north)     ALT(m)  NAME
+# 260:         5.180       52.100       1.90  De Bilt
+#
+# T        : Temperatuur (in 0.1 graden Celsius) op 1.50 m hoogte tijdens de waarneming
+#
+# STN,YYYYMMDD,   HH,   DD,    T
+  260,20230101,    1,  230,   95
+  260,20230101,    2,  230,  -12
+  260,20230101,    3,  240,     
+"""
+
+
+def test_knmi_header_is_read_from_last_comment_line():
+    temperaturen = load_hourly_temperatures(BytesIO(KNMI))
+    np.testing.assert_allclose(temperaturen[:2], [9.5, -1.2])
+    assert np.isnan(temperaturen[2])
+    assert climate_year_from_bytes(KNMI).hours == 2
+
+
+def test_plain_csv_with_comments():
+    temperaturen = load_hourly_temperatures(BytesIO(b"# bron: eigen meting\ntemperature\n4.5\n-2\n"))
+    np.testing.assert_allclose(temperaturen, [4.5, -2.0])
+
+
+def test_missing_temperature_column_is_an_error():
+    with pytest.raises(ValueError, match="temperatuurkolom"):
+        load_hourly_temperatures(BytesIO(b"datum,neerslag\n1,2\n"))
+
+
+def test_degree_hours_match_direct_sum():
+    temperaturen = np.random.default_rng(1).normal(8, 6, 500)
+    tabel = DegreeHourTable(temperaturen)
+    for setpoint in (-30.0, 15.0, 20.0, 60.0):
+        assert tabel.degree_hours(setpoint) == pytest.approx(np.maximum(setpoint - temperaturen, 0).sum())
@@ -0,0 +1,34 @@
+import math
+
+import numpy as np
+import pytest
+
+from verduurzaming.berekening import calculate_energy_label, calculate_energy_labels
+from verduurzaming.labels import LabelTable, default_label_table
+
+
+@pytest.fixture
+def tabel():
+    return default_label_table()
+
+
+def test_scalar_and_vector_agree(tabel):
+    grenzen = np.array(tabel.thresholds)
+    waarden = np.concatenate([grenzen, np.nextafter(grenzen, np.inf), np.nextafter(grenzen, -np.inf),
+                              [-10.0, 0.0, 1e6, math.inf, -math.inf, math.nan]])
+    verwacht = [tabel.label(float(waarde)) for waarde in waarden]
+    assert tabel.classify(waarden)[1].tolist() == verwacht
+
+
+# Bewust anders dan de oorspronkelijke if/elif-keten, die NaN A+++++ gaf
+def test_nan_gets_least_efficient_label(tabel):
+    assert tabel.label(math.nan) == tabel.labels[-1] == "G"
+    assert tabel.codes([math.nan]).tolist() == [len(tabel.labels) - 1]
+    assert calculate_energy_label(math.nan) == "G"
+    assert calculate_energy_labels(np.array([math.nan])).tolist() == ["G"]
+
+
+def test_threshold_is_inclusive_upper_bound():
+    tabel = LabelTable(["A", "B", "C"], [10, 20], ["#0f0", "#ff0", "#f00"])
+    assert [tabel.label(waarde) for waarde in (10, 10.5, 20, 21)] == ["A", "B", "B", "C"]
+    assert tabel.upper_bound("B") == 20 and tabel.upper_bound("C") == math.inf
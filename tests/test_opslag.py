@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from verduurzaming.opslag import ResultStore, make_record
+
+DATA = {"Dak": (1200.0, 850.0, 156.4, 4.2, 510.0)}
+TOTALS = {"cost": 1200.0, "savings": 850.0, "co2_savings": 156.4, "payback": 4.2, "total_savings_euro": 510.0,
+          "total_kwh_per_m2_per_year": 120.0, "energy_label": "C"}
+
+
+@pytest.fixture
+def opslag(tmp_path):
+    store = ResultStore(tmp_path / "berekeningen.sqlite", flush_interval=0.05)
+    yield store
+    store.close()
+
+
+def test_bad_record_does_not_lose_the_rest_of_the_batch(opslag):
+    opslag.save_many([
+        make_record("a", {"delta_t": np.int64(15), "rc": np.array([4.0, 5.0])}, DATA, TOTALS, parameter_version="t/1"),
+        make_record("b", {"onbruikbaar": object()}, DATA, TOTALS, parameter_version="t/1"),
+        make_record("c", {"delta_t": 15.0}, DATA, TOTALS, parameter_version="t/1"),
+    ])
+    opslag.flush()
+    assert opslag.latest("a")["inputs"] == {"delta_t": 15, "rc": [4.0, 5.0]}
+    assert opslag.latest("b") is None
+    assert opslag.latest("c")["energy_label"] == "C"
+
+    # De schrijver draait daarna gewoon door
+    opslag.save(make_record("d", {}, DATA, TOTALS, parameter_version="t/1"))
+    opslag.flush()
+    rij = opslag.latest("d")
+    assert rij["parameter_version"] == "t/1"
+    assert [vlak["category"] for vlak in opslag.surfaces(rij["id"])] == ["Dak"]
+
+
+def test_aggregate_counts_latest_calculation_per_building(opslag):
+    opslag.save_many([make_record("a", {}, DATA, TOTALS, created_at="2026-01-01T00:00:00", parameter_version="t/1"),
+                      make_record("a", {}, DATA, {**TOTALS, "energy_label": "A"}, created_at="2026-02-01T00:00:00",
+                                  parameter_version="t/1")])
+    opslag.flush()
+    assert [rij["energy_label"] for rij in opslag.history("a")] == ["A", "C"]
+    assert [(rij["groep"], rij["calculations"]) for rij in opslag.aggregate("energy_label")] == [("A", 1)]
+    assert sum(rij["calculations"] for rij in opslag.aggregate("energy_label", latest_only=False)) == 2
@@ -0,0 +1,76 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from verduurzaming.labels import default_label_table
+from verduurzaming.optimalisatie import (cheapest_package_for_label, option_tables, optimize_package,
+                                         rc_for_label)
+
+PARAMETERS = dict(delta_t=15, emissie_per_kwh=0.184, energy_kost=0.6, subsidy_percentage=20)
+
+
+@pytest.fixture
+def tabellen():
+    rng = np.random.default_rng(7)
+    area = rng.uniform(5, 80, (6, 3))
+    current_rc = rng.uniform(0.3, 2.0, (6, 3))
+    rc_options = np.array([2.5, 4.0, 6.0])
+    kost_per_m2 = rng.uniform(20, 90, (6, 3, 3))
+    return option_tables(area, current_rc, rc_options, kost_per_m2, **PARAMETERS)
+
+
+# Alle combinaties van één optie per vlak, per gebouw
+def _alle_pakketten(tabellen, gebouw):
+    opties = tabellen["cost"].shape[2]
+    vlakken = range(tabellen["cost"].shape[1])
+    for keuze in itertools.product(range(opties), repeat=len(vlakken)):
+        yield (sum(tabellen["cost"][gebouw, j, o] for j, o in zip(vlakken, keuze)),
+               sum(tabellen["saved_kWh"][gebouw, j, o] for j, o in zip(vlakken, keuze)))
+
+
+def test_optimize_package_matches_brute_force(tabellen):
+    budget = 3000.0
+    # Een fijn raster, zodat afronden op budgetstappen het optimum niet verandert
+    pakket = optimize_package(tabellen, budget, step=0.01)
+    for gebouw in range(tabellen["cost"].shape[0]):
+        beste = max(besparing for kosten, besparing in _alle_pakketten(tabellen, gebouw) if kosten <= budget)
+        assert pakket["cost"][gebouw] <= budget
+        assert pakket["saved_kWh"][gebouw] == pytest.approx(beste)
+
+
+def test_cheapest_package_for_label_matches_brute_force(tabellen):
+    tabel = default_label_table()
+    doel = "C"
+    pakket = cheapest_package_for_label(tabellen, doel, resolution=20_000)
+    nodig = tabellen["current_kWh"].sum(axis=1) - tabel.upper_bound(doel) * tabellen["area"].sum(axis=1)
+    for gebouw in range(tabellen["cost"].shape[0]):
+        haalbaar = [kosten for kosten, besparing in _alle_pakketten(tabellen, gebouw)
+                    if besparing >= nodig[gebouw] - 1e-9 and np.isfinite(kosten)]
+        assert pakket["feasible"][gebouw] == bool(haalbaar)
+        if haalbaar:
+            # Kosten worden op het raster naar boven afgerond: hooguit één stap per vlak duurder
+            stap = np.where(np.isfinite(tabellen["cost"]), tabellen["cost"], 0).max(axis=2).sum(axis=1).max() / 20_000
+            assert min(haalbaar) - 1e-6 <= pakket["cost"][gebouw] <= min(haalbaar) + 3 * stap
+
+
+def test_rc_for_label_reaches_label_at_no_more_cost_than_a_grid():
+    area = np.array([[40.0, 60.0, 90.0]])
+    current_rc = np.array([[0.5, 1.0, 0.8]])
+    c = np.array([[8.0, 6.0, 10.0]])
+    installatie = np.array([[15.0, 20.0, 10.0]])
+    pakket = rc_for_label(area, current_rc, c, installatie, "B", **PARAMETERS)
+    assert pakket["feasible"][0]
+    assert pakket["total_kwh_per_m2_per_year"][0] <= default_label_table().upper_bound("B")
+
+    # Geen combinatie van RC-waarden op een raster haalt het label goedkoper
+    k = PARAMETERS["delta_t"] * 4800 / 1000
+    grens = default_label_table().upper_bound("B") * area.sum()
+    raster = np.linspace(0.5, 10, 96)
+    rc = np.stack(np.meshgrid(*(np.concatenate([[huidig], raster[raster > huidig]]) for huidig in current_rc[0]),
+                              indexing="ij"), axis=-1).reshape(-1, 3)
+    haalt = (area[0] * k / rc).sum(axis=1) <= grens
+    subsidie = 1 - PARAMETERS["subsidy_percentage"] / 100
+    kosten = (area[0] * (c[0] * rc + installatie[0]) * subsidie * (rc > current_rc[0])).sum(axis=1)
+    assert haalt.any()
+    assert pakket["cost"][0] <= kosten[haalt].min() + 1e-6
@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from verduurzaming import calculate_energy_label, default_parameter_table, parameters
+from verduurzaming.batch import VLAKKEN, calculate_buildings
+
+
+@pytest.fixture
+def tabellen(tmp_path, monkeypatch):
+    shutil.copytree(os.path.dirname(parameters.DEFAULT_PARAMETERS_PATH), tmp_path, dirs_exist_ok=True)
+    monkeypatch.setenv("VERDUURZAMING_PARAMETERS", str(tmp_path / "parameters.json"))
+    monkeypatch.setattr(parameters, "CONTROLE_INTERVAL", 0)
+    default_parameter_table.cache_clear()
+    yield tmp_path
+    monkeypatch.undo()
+    default_parameter_table.cache_clear()
+
+
+# Past een JSON-bestand aan en zet de wijzigtijd vooruit, zodat de wijziging zeker wordt opgemerkt
+def _wijzig(pad, aanpassen):
+    data = json.loads(pad.read_text(encoding="utf-8"))
+    aanpassen(data)
+    status = pad.stat()
+    pad.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(pad, ns=(status.st_atime_ns, status.st_mtime_ns + 1_000_000_000))
+
+
+def _gebouw():
+    return pd.DataFrame({f"{vlak}_{veld}": [waarde] for vlak in VLAKKEN for veld, waarde in
+                         (("area", 50.0), ("current_rc", 1.0), ("desired_rc", 4.0), ("material_kost", 40.0),
+                          ("installation_kost", 10.0))})
+
+
+def test_changed_tables_are_used_without_restart(tabellen):
+    assert calculate_energy_label(1000.0) == "G"
+    co2 = calculate_buildings(_gebouw())["co2_savings"].iloc[0]
+
+    def hernoem(data):
+        data["version"] = "test-2"
+        data["labels"][-1]["label"] = "H"
+    _wijzig(tabellen / "labels.json", hernoem)
+
+    def emissie(data):
+        data["version"] = "test-2"
+        data["emission"]["Gas"] *= 2
+    _wijzig(tabellen / "parameters.json", emissie)
+
+    assert calculate_energy_label(1000.0) == "H"
+    assert default_parameter_table().labels.labels[-1] == "H"
+    assert default_parameter_table().table_version == "test-2/test-2"
+    assert calculate_buildings(_gebouw())["co2_savings"].iloc[0] == pytest.approx(2 * co2)
+
+
+def test_invalid_table_is_rejected(tabellen):
+    _wijzig(tabellen / "parameters.json", lambda data: data["emission"].update(Gas="veel"))
+    with pytest.raises(ValueError, match="Emissie van Gas"):
+        default_parameter_table()
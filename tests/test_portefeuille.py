@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from verduurzaming.batch import VLAKKEN
+from verduurzaming.portefeuille import Portfolio
+
+
+@pytest.fixture
+def gebouwen():
+    rng = np.random.default_rng(3)
+    n = 40
+    kolommen = {"building_id": [f"g{i}" for i in range(n)],
+                "complex": rng.choice(["Noord", "Zuid", "Oost"], n),
+                "construction_year": rng.integers(1930, 2010, n)}
+    for vlak in VLAKKEN:
+        kolommen[f"{vlak}_area"] = rng.uniform(10, 90, n)
+        kolommen[f"{vlak}_current_rc"] = rng.uniform(0.2, 2.0, n)
+        kolommen[f"{vlak}_desired_rc"] = rng.uniform(2.5, 6.0, n)
+        kolommen[f"{vlak}_material_kost"] = rng.uniform(20, 80, n)
+        kolommen[f"{vlak}_installation_kost"] = rng.uniform(5, 30, n)
+    return pd.DataFrame(kolommen)
+
+
+def test_incremental_update_equals_full_recompute(gebouwen):
+    portefeuille = Portfolio(gebouwen.copy())
+    portefeuille.update("g3", roof_desired_rc=8.0, complex="West")
+    portefeuille.update("g17", wall_current_rc=0.1)
+    portefeuille.update("g3", floor_area=5.0)
+
+    gewijzigd = gebouwen.copy()
+    gewijzigd.loc[3, ["roof_desired_rc", "complex", "floor_area"]] = [8.0, "West", 5.0]
+    gewijzigd.loc[17, "wall_current_rc"] = 0.1
+    opnieuw = Portfolio(gewijzigd)
+
+    for groep in ("complex", "energy_label"):
+        pd.testing.assert_frame_equal(portefeuille.aggregate(groep), opnieuw.aggregate(groep), check_exact=False)
+    assert portefeuille.totals() == pytest.approx(opnieuw.totals())
+    filters = {"complex": ["Zuid", "West"], "construction_year": (1950, 2000)}
+    assert portefeuille.totals(filters) == pytest.approx(opnieuw.totals(filters))
+
+
+def test_missing_group_values_are_onbekend(gebouwen):
+    gebouwen["complex"] = gebouwen["complex"].astype(object)
+    gebouwen.loc[[0, 5], "complex"] = [np.nan, None]
+    gebouwen["construction_year"] = gebouwen["construction_year"].astype(float)
+    gebouwen.loc[7, "construction_year"] = np.nan
+    portefeuille = Portfolio(gebouwen)
+
+    assert portefeuille.values("complex")[-1] == "onbekend"
+    assert portefeuille.aggregate("complex").loc["onbekend", "buildings"] == 2
+    assert portefeuille.aggregate("construction_year").index[-1] == "onbekend"
+    assert portefeuille.totals({"construction_year": (1900, 2100)})["buildings"] == len(gebouwen) - 1
+    portefeuille.update("g1", complex=None)
+    assert portefeuille.aggregate("complex").loc["onbekend", "buildings"] == 3
+
+
+def test_duplicate_building_id_is_rejected(gebouwen):
+    gebouwen.loc[4, "building_id"] = "g2"
+    with pytest.raises(ValueError, match="g2"):
+        Portfolio(gebouwen)
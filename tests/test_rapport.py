@@ -0,0 +1,37 @@
+from io import BytesIO
+
+import fpdf.fpdf
+import pytest
+from fpdf.ttfonts import TTFontFile
+
+from verduurzaming import rapport
+
+DATA = {"Vloer": (1200.0, 850.5, 156.5, 4.2, 510.3), "Dak": (2400.0, 1310.0, 241.0, 5.1, 786.0)}
+TOTALS = {"cost": 3600.0, "savings": 2160.5, "co2_savings": 397.5, "payback": 4.7, "total_savings_euro": 1296.3,
+          "energy_label": "B"}
+
+
+def test_subset_cache_is_reused_without_patching_fpdf():
+    with rapport._SUBSETS_LOCK:
+        rapport._SUBSETS.clear()
+    eerste = rapport.render_pdf(DATA, TOTALS)
+    assert len(rapport._SUBSETS) == 1
+    tweede = rapport.render_pdf({"Wanden": (900.0, 400.0, 73.6, 3.3, 240.0)}, {**TOTALS, "energy_label": "C"})
+    assert len(rapport._SUBSETS) == 1
+    assert fpdf.fpdf.TTFontFile is TTFontFile
+
+    pypdf = pytest.importorskip("pypdf")
+    tekst = pypdf.PdfReader(BytesIO(eerste)).pages[0].extract_text()
+    assert "Energielabel: B" in tekst and "Vloer" in tekst and "€3,600.00" in tekst
+    assert "Energielabel: C" in pypdf.PdfReader(BytesIO(tweede)).pages[0].extract_text()
+
+
+def test_other_fpdf_version_falls_back_to_plain_fpdf(monkeypatch):
+    monkeypatch.setattr(fpdf.fpdf, "FPDF_VERSION", "1.7.3")
+    rapport._rapport_pdf_class.cache_clear()
+    try:
+        assert rapport._rapport_pdf_class() is fpdf.fpdf.FPDF
+        assert rapport.render_pdf(DATA, TOTALS).startswith(b"%PDF")
+    finally:
+        monkeypatch.undo()
+        rapport._rapport_pdf_class.cache_clear()
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from verduurzaming.berekening import calculate_costs_with_rc
+from verduurzaming.scenario import compare_scenarios, comparison_frame
+from verduurzaming.vlakken import SurfaceTable
+
+PARAMETERS = dict(delta_t=15, emissie_per_kwh=0.184, energy_kost=0.6, subsidy_percentage=20)
+
+
+@pytest.fixture
+def vlakken():
+    return SurfaceTable(["Vloer", "Dak", "Wanden"], [50.0, 60.0, 90.0], [0.5, 0.8, 1.2], [4.0, 5.0, 4.0],
+                        [30.0, 40.0, 25.0], [10.0, 12.0, 8.0])
+
+
+def test_shared_pairs_are_calculated_once(vlakken):
+    scenarios = {"Dak": {"Dak": 6.0}, "Dak en vloer": {"Dak": 6.0, "Vloer": 4.0}, "Alles": dict.fromkeys(vlakken.names, 6.0)}
+    vergelijking = compare_scenarios(vlakken, scenarios, **PARAMETERS)
+    # Vloer: niet, 4 en 6; Dak: 6; Wanden: niet en 6
+    assert vergelijking["unique"] == 6
+    assert vergelijking["names"] == list(scenarios)
+    np.testing.assert_allclose(vergelijking["result"]["total_kost_with"][1], vergelijking["result"]["total_kost_with"][4])
+
+
+def test_scenario_totals_match_scalar_calculation(vlakken):
+    scenarios = {"Dak en vloer": {"Dak": 6.0, "Vloer": 4.0}, "Wanden": {"Wanden": 3.0}}
+    vergelijking = compare_scenarios(vlakken, scenarios, **PARAMETERS)
+    for s, keuze in enumerate(scenarios.values()):
+        kosten = besparing = 0.0
+        for i, naam in enumerate(vlakken.names):
+            if naam in keuze:
+                rc = keuze[naam]
+                uitkomst = calculate_costs_with_rc(vlakken.area[i], vlakken.current_rc[i], rc, None, 0.184, 15, 4800,
+                                                   20, 0.6, vlakken.material_kost[i] * rc / vlakken.desired_rc[i],
+                                                   vlakken.installation_kost[i])
+                kosten += uitkomst[0]
+                besparing += uitkomst[1]
+        assert vergelijking["totals"]["cost"][s] == pytest.approx(kosten)
+        assert vergelijking["totals"]["savings"][s] == pytest.approx(besparing)
+    assert list(comparison_frame(vergelijking).index) == list(scenarios)
+
+
+def test_unknown_surface_is_rejected(vlakken):
+    with pytest.raises(ValueError, match="onbekende vlakken"):
+        compare_scenarios(vlakken, {"Fout": {"Kelder": 4.0}}, **PARAMETERS)
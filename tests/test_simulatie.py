@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from verduurzaming.simulatie import sample, simulate, summarize
+
+VLAKKEN = dict(area=np.array([40.0, 60.0]), current_rc=np.array([0.5, 1.0]), desired_rc=np.array([4.0, 6.0]),
+               material_kost=np.array([30.0, 45.0]), installation_kost=np.array([10.0, 12.0]), emissie_per_kwh=0.184)
+
+
+def test_energy_price_and_delta_t_are_never_negative():
+    verdelingen = {"energy_kost": ("normal", 0.05, 0.2), "delta_t": ("normal", 2, 5), "subsidy_percentage": 20}
+    samples = simulate(**VLAKKEN, distributions=verdelingen, n_samples=5000, seed=1)
+    assert (samples["savings_euro"] >= 0).all()
+    assert (samples["saved_kWh"] >= 0).all()
+    assert (samples["savings_euro"] == 0).any()
+
+
+def test_fixed_distributions_match_one_calculation():
+    verdelingen = {"energy_kost": 0.6, "delta_t": 15, "subsidy_percentage": 20}
+    samples = simulate(**VLAKKEN, distributions=verdelingen, n_samples=10, seed=2)
+    tabel = summarize(samples, ["Vloer", "Dak"])
+    assert tabel.loc[("Totaal", "cost"), "P5"] == pytest.approx(tabel.loc[("Totaal", "cost"), "P95"])
+    assert samples["total"]["savings"][0] == pytest.approx(samples["saved_kWh"][0].sum())
+
+
+def test_invalid_triangular_is_rejected():
+    with pytest.raises(ValueError, match="Driehoeksverdeling"):
+        sample(np.random.default_rng(0), ("triangular", 10, 30, 20), 5)
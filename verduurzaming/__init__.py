@@ -0,0 +1,26 @@
+# Rekenkern van de verduurzamingscalculator, los van de Streamlit-interface
+from .berekening import (
+    calculate_energy_label,
+    calculate_energy_labels,
+    get_label_color,
+    calculate_u_value,
+    calculate_energy_loss,
+    calculate_savings,
+    calculate_total_cost,
+    calculate_payback_period,
+    calculate_CO2,
+    calculate_costs_with_rc,
+    calculate_costs_batch,
+    calculate_costs_frame,
+)
+from .labels import (
+    LabelTable,
+    load_label_table,
+    default_label_table,
+    classify_energy_labels,
+)
+from .parameters import (
+    ParameterTable,
+    load_parameter_table,
+    default_parameter_table,
+)
@@ -0,0 +1,453 @@
+# Lokale HTTP JSON API voor de berekeningen, als kale ASGI-applicatie zonder framework:
+#   python -m verduurzaming.api --port 8000          (vereist uvicorn: pip install uvicorn)
+#   uvicorn verduurzaming.api:app --port 8000
+#
+#   POST /costs      kosten en besparing per vlak, zoals calculate_costs_with_rc; elk veld een getal of een lijst
+#   POST /buildings  één gebouw {"surfaces": [...], ...} of een lijst gebouwen; resultaten per vlak en totalen
+#   POST /label      energielabel voor kwh_per_m2_per_year (getal of lijst)
+#   POST /report     PDF-rapport voor één gebouw
+#   GET  /metrics    latentie (kwantielen) en batchgroottes in Prometheus-tekstformaat
+#   GET  /health
+#
+# Gelijktijdige kleine verzoeken voor /costs en /buildings worden verzameld in een asyncio-rij en samen
+# in één gevectoriseerde berekening gedaan (micro-batching): de eerste wacht hooguit max_wait seconden
+# op anderen, of tot er max_batch vlakken zijn. Elk antwoord noemt in de header x-parameter-version de
+# versie van de parametertabel waarmee gerekend is.
+import argparse
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .berekening import RESULTAAT_KOLOMMEN, calculate_costs_batch, calculate_energy_labels, get_label_color
+from .parameters import default_parameter_table
+from .vlakken import VELDEN, SurfaceTable
+from .werkrij import QueueFull, WorkQueue, load_shared_resources
+
+# Algemene parameters, per verzoek of per gebouw te overschrijven; de standaardwaarden komen uit de parametertabel
+PARAMETERS = ("delta_t", "energy_kost", "subsidy_percentage", "hours_per_year", "emissie_per_kwh")
+
+# Kwantielen van de latentie op /metrics, over de laatste LATENTIE_VENSTER verzoeken per route
+KWANTIELEN = (0.5, 0.9, 0.99)
+LATENTIE_VENSTER = 10_000
+
+MAX_BODY = 32 * 2**20
+
+
+class ApiError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# Getallen voor JSON; oneindig of NaN (bijvoorbeeld een terugverdientijd zonder besparing) wordt null
+def _json_lijst(waarden):
+    return [waarde if math.isfinite(waarde) else None for waarde in np.asarray(waarden, dtype=float).tolist()]
+
+
+def _getallen(waarde, naam):
+    try:
+        return np.asarray(waarde, dtype=float)
+    except (TypeError, ValueError):
+        raise ApiError(f"{naam} moet een getal of een lijst getallen zijn") from None
+
+
+def _standaard():
+    tabel = default_parameter_table()
+    return {**{naam: tabel.defaults[naam] for naam in PARAMETERS[:3]}, "hours_per_year": tabel.hours_per_year,
+            "emissie_per_kwh": tabel.emission_for(tabel.defaults["heating_type"])}
+
+
+# Algemene parameters uit een verzoek, met heating_type als alternatief voor emissie_per_kwh
+def _parameters(invoer, basis=None):
+    parameters = dict(basis or _standaard())
+    if "heating_type" in invoer:
+        if not isinstance(invoer["heating_type"], str):
+            raise ApiError("heating_type moet een tekst zijn, bijvoorbeeld \"Gas\"")
+        try:
+            parameters["emissie_per_kwh"] = default_parameter_table().emission_for(invoer["heating_type"])
+        except ValueError as fout:
+            raise ApiError(str(fout)) from None
+    for naam in PARAMETERS:
+        if naam in invoer:
+            parameters[naam] = _getallen(invoer[naam], naam)
+    return parameters
+
+
+# Micro-batching: items van gelijktijdige verzoeken worden verzameld en samen verwerkt door
+# verwerk(items) -> resultaten (in dezelfde volgorde). grootte(item) is het aantal vlakken van een item.
+# verwerk draait op een thread, zodat de event loop intussen verzoeken blijft aannemen voor de volgende batch.
+class MicroBatcher:
+    def __init__(self, verwerk, grootte, max_batch=4096, max_wait=0.002, metrics=None, naam=""):
+        self.verwerk = verwerk
+        self.grootte = grootte
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self.naam = naam
+        self._rij = None
+        self._taak = None
+
+    async def submit(self, item):
+        if self._taak is None:
+            self._rij = asyncio.Queue()
+            self._taak = asyncio.get_running_loop().create_task(self._verzamel())
+        future = asyncio.get_running_loop().create_future()
+        await self._rij.put((item, future))
+        return await future
+
+    async def _verzamel(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._rij.get()]
+            aantal = self.grootte(batch[0][0])
+            einde = loop.time() + self.max_wait
+            while aantal < self.max_batch:
+                try:
+                    if self._rij.empty():
+                        resterend = einde - loop.time()
+                        if resterend <= 0:
+                            break
+                        batch.append(await asyncio.wait_for(self._rij.get(), resterend))
+                    else:
+                        batch.append(self._rij.get_nowait())
+                except asyncio.TimeoutError:
+                    break
+                aantal += self.grootte(batch[-1][0])
+
+            items = [item for item, _ in batch]
+            try:
+                resultaten = await loop.run_in_executor(None, self.verwerk, items)
+            except Exception as fout:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(fout)
+                continue
+            for (_, future), resultaat in zip(batch, resultaten):
+                if not future.done():
+                    future.set_result(resultaat)
+            if self.metrics is not None:
+                self.metrics.batch(self.naam, len(batch), aantal)
+
+    async def close(self):
+        if self._taak is not None:
+            self._taak.cancel()
+            try:
+                await self._taak
+            except asyncio.CancelledError:
+                pass
+            self._taak = None
+
+
+# Latentie per route (laatste LATENTIE_VENSTER verzoeken) en batchgroottes, voor /metrics
+class ApiMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latentie = {}
+        self._verzoeken = {}
+        self._batches = {}
+
+    def request(self, route, status, seconden):
+        with self._lock:
+            self._latentie.setdefault(route, deque(maxlen=LATENTIE_VENSTER)).append(seconden)
+            sleutel = (route, status)
+            self._verzoeken[sleutel] = self._verzoeken.get(sleutel, 0) + 1
+
+    def batch(self, naam, verzoeken, vlakken):
+        with self._lock:
+            totaal = self._batches.setdefault(naam, [0, 0, 0])
+            totaal[0] += 1
+            totaal[1] += verzoeken
+            totaal[2] += vlakken
+
+    # Kwantielen van de latentie per route in seconden
+    def quantiles(self):
+        with self._lock:
+            vensters = {route: np.array(waarden) for route, waarden in self._latentie.items()}
+        return {route: dict(zip(KWANTIELEN, np.quantile(waarden, KWANTIELEN).tolist()))
+                for route, waarden in vensters.items() if len(waarden)}
+
+    def prometheus_text(self):
+        kwantielen = self.quantiles()
+        with self._lock:
+            verzoeken = dict(self._verzoeken)
+            batches = {naam: list(totaal) for naam, totaal in self._batches.items()}
+            sommen = {route: (sum(waarden), len(waarden)) for route, waarden in self._latentie.items()}
+
+        regels = ["# HELP verduurzaming_api_requests_total Aantal verzoeken per route en status.",
+                  "# TYPE verduurzaming_api_requests_total counter"]
+        regels += [f'verduurzaming_api_requests_total{{route="{route}",status="{status}"}} {aantal}'
+                   for (route, status), aantal in sorted(verzoeken.items())]
+        regels += [f"# HELP verduurzaming_api_request_seconds Latentie per route over de laatste {LATENTIE_VENSTER} verzoeken.",
+                   "# TYPE verduurzaming_api_request_seconds summary"]
+        for route, waarden in kwantielen.items():
+            regels += [f'verduurzaming_api_request_seconds{{route="{route}",quantile="{q}"}} {waarde}'
+                       for q, waarde in waarden.items()]
+            regels.append(f'verduurzaming_api_request_seconds_sum{{route="{route}"}} {sommen[route][0]}')
+            regels.append(f'verduurzaming_api_request_seconds_count{{route="{route}"}} {sommen[route][1]}')
+        regels += ["# HELP verduurzaming_api_batches_total Aantal gezamenlijke berekeningen (micro-batches).",
+                   "# TYPE verduurzaming_api_batches_total counter"]
+        regels += [f'verduurzaming_api_batches_total{{route="{naam}"}} {totaal[0]}' for naam, totaal in batches.items()]
+        regels += ["# HELP verduurzaming_api_batched_requests_total Verzoeken verwerkt in een micro-batch.",
+                   "# TYPE verduurzaming_api_batched_requests_total counter"]
+        regels += [f'verduurzaming_api_batched_requests_total{{route="{naam}"}} {totaal[1]}' for naam, totaal in batches.items()]
+        regels += ["# HELP verduurzaming_api_surfaces_total Doorgerekende vlakken.",
+                   "# TYPE verduurzaming_api_surfaces_total counter"]
+        regels += [f'verduurzaming_api_surfaces_total{{route="{naam}"}} {totaal[2]}' for naam, totaal in batches.items()]
+        return "\n".join(regels) + "\n"
+
+
+# Invoer van /costs: elk veld een getal of een lijst; enkelvoudig als alle velden getallen zijn
+def _vlakken_invoer(invoer):
+    if not isinstance(invoer, dict):
+        raise ApiError("Verwacht een JSON-object met de velden " + ", ".join(VELDEN))
+    ontbrekend = [veld for veld in VELDEN if veld not in invoer]
+    if ontbrekend:
+        raise ApiError(f"Ontbrekende velden: {', '.join(ontbrekend)}")
+    velden = {veld: _getallen(invoer[veld], veld) for veld in VELDEN}
+    parameters = _parameters(invoer)
+    try:
+        vorm = np.broadcast_shapes(*(np.shape(waarde) for waarde in (*velden.values(), *parameters.values())))
+    except ValueError:
+        raise ApiError("Lijsten moeten even lang zijn") from None
+    if len(vorm) > 1:
+        raise ApiError("Verwacht getallen of lijsten, geen geneste lijsten")
+    kolommen = {naam: np.broadcast_to(waarde, vorm).reshape(-1)
+                for naam, waarde in {**velden, **parameters}.items()}
+    return {"kolommen": kolommen, "enkelvoudig": vorm == (), "aantal": int(np.prod(vorm, dtype=int))}
+
+
+def _bereken_vlakken(items):
+    kolommen = {naam: np.concatenate([item["kolommen"][naam] for item in items]) for naam in items[0]["kolommen"]}
+    result = calculate_costs_batch(
+        kolommen["area"], kolommen["current_rc"], kolommen["desired_rc"], kolommen["material_kost"],
+        kolommen["installation_kost"], kolommen["delta_t"], kolommen["emissie_per_kwh"], kolommen["energy_kost"],
+        kolommen["subsidy_percentage"], degree_hours=kolommen["delta_t"] * kolommen["hours_per_year"])
+    grenzen = np.cumsum([0] + [item["aantal"] for item in items])
+    resultaten = []
+    for item, begin, eind in zip(items, grenzen[:-1], grenzen[1:]):
+        uitvoer = {sleutel: _json_lijst(result[sleutel][begin:eind]) for sleutel in RESULTAAT_KOLOMMEN}
+        uitvoer["energy_label"] = result["energy_label"][begin:eind].tolist()
+        if item["enkelvoudig"]:
+            uitvoer = {sleutel: waarden[0] for sleutel, waarden in uitvoer.items()}
+        resultaten.append(uitvoer)
+    return resultaten
+
+
+# Invoer van /buildings: één gebouw of een lijst gebouwen, elk met een lijst vlakken
+def _gebouwen_invoer(invoer):
+    enkelvoudig = isinstance(invoer, dict) and "buildings" not in invoer
+    if isinstance(invoer, dict) and "buildings" in invoer:
+        basis = _parameters(invoer)
+        gebouwen = invoer["buildings"]
+    else:
+        basis = None
+        gebouwen = [invoer] if enkelvoudig else invoer
+    if not isinstance(gebouwen, list) or not gebouwen:
+        raise ApiError("Verwacht een gebouw of een niet-lege lijst gebouwen")
+
+    namen, velden, index, parameters = [], {veld: [] for veld in VELDEN}, [], []
+    for i, gebouw in enumerate(gebouwen):
+        if not isinstance(gebouw, dict) or not isinstance(gebouw.get("surfaces"), list) or not gebouw["surfaces"]:
+            raise ApiError(f"Gebouw {i}: verwacht een object met een niet-lege lijst surfaces")
+        for j, vlak in enumerate(gebouw["surfaces"]):
+            if not isinstance(vlak, dict):
+                raise ApiError(f"Gebouw {i}, vlak {j}: verwacht een object")
+            ontbrekend = [veld for veld in VELDEN if veld not in vlak]
+            if ontbrekend:
+                raise ApiError(f"Gebouw {i}, vlak {j}: ontbrekende velden {', '.join(ontbrekend)}")
+            namen.append(str(vlak.get("name", f"Vlak {j + 1}")))
+            for veld in VELDEN:
+                velden[veld].append(vlak[veld])
+        index += [i] * len(gebouw["surfaces"])
+        parameters.append(_parameters(gebouw, basis))
+
+    try:
+        velden = {veld: np.asarray(waarden, dtype=float) for veld, waarden in velden.items()}
+        per_gebouw = {naam: np.array([float(p[naam]) for p in parameters]) for naam in parameters[0]}
+    except (TypeError, ValueError):
+        raise ApiError("Vlakken en parameters moeten getallen zijn") from None
+    return {"namen": namen, "velden": velden, "index": np.array(index), "parameters": per_gebouw,
+            "enkelvoudig": enkelvoudig, "aantal": len(namen), "gebouwen": len(gebouwen)}
+
+
+def _bereken_gebouwen(items):
+    verschuiving = np.cumsum([0] + [item["gebouwen"] for item in items])[:-1]
+    vlakken = SurfaceTable(
+        [naam for item in items for naam in item["namen"]],
+        *(np.concatenate([item["velden"][veld] for item in items]) for veld in VELDEN),
+        building=np.concatenate([item["index"] + begin for item, begin in zip(items, verschuiving)]))
+    parameters = {naam: np.concatenate([item["parameters"][naam] for item in items]) for naam in items[0]["parameters"]}
+    result = vlakken.calculate(parameters["delta_t"], parameters["emissie_per_kwh"], parameters["energy_kost"],
+                               parameters["subsidy_percentage"],
+                               degree_hours=parameters["delta_t"] * parameters["hours_per_year"])
+    totalen = vlakken.totals(result)
+    totalen = {sleutel: (waarden.tolist() if sleutel == "energy_label" else _json_lijst(waarden))
+               for sleutel, waarden in totalen.items()}
+    kolommen = {sleutel: _json_lijst(result[sleutel]) for sleutel in RESULTAAT_KOLOMMEN}
+
+    resultaten, gebouw = [], 0
+    for item in items:
+        uitvoer = []
+        for _ in range(item["gebouwen"]):
+            rijen = np.flatnonzero(vlakken.building == gebouw)
+            uitvoer.append({
+                "surfaces": [{"name": vlakken.names[r], **{sleutel: kolommen[sleutel][r] for sleutel in kolommen}}
+                             for r in rijen],
+                "totals": {sleutel: waarden[gebouw] for sleutel, waarden in totalen.items()},
+            })
+            gebouw += 1
+        resultaten.append(uitvoer[0] if item["enkelvoudig"] else uitvoer)
+    return resultaten
+
+
+# data en totals voor rapport.render_pdf, uit het resultaat van één gebouw
+def _rapport_invoer(invoer):
+    gebouw = _bereken_gebouwen([_gebouwen_invoer(invoer)])[0]
+    if isinstance(gebouw, list):
+        raise ApiError("Een rapport is voor één gebouw")
+    data = {vlak["name"]: tuple(float("inf") if vlak[sleutel] is None else vlak[sleutel]
+                                for sleutel in RESULTAAT_KOLOMMEN[:5]) for vlak in gebouw["surfaces"]}
+    totals = {sleutel: float("inf") if waarde is None else waarde for sleutel, waarde in gebouw["totals"].items()}
+    return data, totals
+
+
+def _render_rapport(data, totals):
+    from .rapport import render_pdf
+    return render_pdf(data, totals)
+
+
+class CalculatorAPI:
+    def __init__(self, max_batch=4096, max_wait=0.002, report_workers=None):
+        self.metrics = ApiMetrics()
+        self.costs = MicroBatcher(_bereken_vlakken, lambda item: item["aantal"], max_batch, max_wait,
+                                  self.metrics, "/costs")
+        self.buildings = MicroBatcher(_bereken_gebouwen, lambda item: item["aantal"], max_batch, max_wait,
+                                      self.metrics, "/buildings")
+        self.report_workers = report_workers
+        self._rapporten = None
+        self.routes = {
+            ("POST", "/costs"): self._costs,
+            ("POST", "/buildings"): self._buildings,
+            ("POST", "/label"): self._label,
+            ("POST", "/report"): self._report,
+            ("GET", "/metrics"): self._metrics,
+            ("GET", "/health"): self._health,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            bericht = await receive()
+            if bericht["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif bericht["type"] == "lifespan.shutdown":
+                await self.costs.close()
+                await self.buildings.close()
+                if self._rapporten is not None:
+                    self._rapporten.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        begin = time.perf_counter()
+        pad = scope["path"].rstrip("/") or "/"
+        route = self.routes.get((scope["method"], pad))
+        try:
+            if route is None:
+                bekend = any(pad == p for _, p in self.routes)
+                raise ApiError("Methode niet toegestaan" if bekend else "Niet gevonden", 405 if bekend else 404)
+            status, type, body = await route(await self._lees(receive) if scope["method"] == "POST" else None)
+        except ApiError as fout:
+            status, type, body = fout.status, "application/json", json.dumps({"error": str(fout)}).encode()
+        except QueueFull:
+            status, type, body = 503, "application/json", json.dumps({"error": "Te druk, probeer het zo opnieuw"}).encode()
+
+        headers = [(b"content-type", type.encode()), (b"content-length", str(len(body)).encode()),
+                   (b"x-parameter-version", default_parameter_table().table_version.encode())]
+        if status == 503:
+            headers.append((b"retry-after", b"1"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+        if route is not None:
+            self.metrics.request(pad, status, time.perf_counter() - begin)
+
+    async def _lees(self, receive):
+        delen, lengte = [], 0
+        while True:
+            bericht = await receive()
+            delen.append(bericht.get("body", b""))
+            lengte += len(delen[-1])
+            if lengte > MAX_BODY:
+                raise ApiError("Verzoek te groot", 413)
+            if not bericht.get("more_body", False):
+                break
+        try:
+            return json.loads(b"".join(delen) or b"null")
+        except ValueError:
+            raise ApiError("Ongeldige JSON") from None
+
+    @staticmethod
+    def _json(data, status=200):
+        return status, "application/json", json.dumps(data, allow_nan=False).encode()
+
+    async def _costs(self, invoer):
+        return self._json(await self.costs.submit(_vlakken_invoer(invoer)))
+
+    async def _buildings(self, invoer):
+        return self._json(await self.buildings.submit(_gebouwen_invoer(invoer)))
+
+    async def _label(self, invoer):
+        if not isinstance(invoer, dict) or "kwh_per_m2_per_year" not in invoer:
+            raise ApiError("Verwacht een JSON-object met kwh_per_m2_per_year")
+        waarden = _getallen(invoer["kwh_per_m2_per_year"], "kwh_per_m2_per_year")
+        labels = calculate_energy_labels(waarden)
+        if np.ndim(labels) == 0:
+            return self._json({"energy_label": str(labels), "color": get_label_color(str(labels))})
+        labels = labels.reshape(-1).tolist()
+        return self._json({"energy_label": labels, "color": [get_label_color(label) for label in labels]})
+
+    # PDF's via een begrensde wachtrij van threads; bij een volle rij 503 met Retry-After
+    async def _report(self, invoer):
+        data, totals = _rapport_invoer(invoer)
+        if self._rapporten is None:
+            self._rapporten = WorkQueue(self.report_workers, processes=False, initializer=load_shared_resources)
+        pdf = await asyncio.wrap_future(self._rapporten.submit(_render_rapport, data, totals))
+        return 200, "application/pdf", pdf
+
+    async def _metrics(self, _invoer):
+        return 200, "text/plain; version=0.0.4", self.metrics.prometheus_text().encode()
+
+    async def _health(self, _invoer):
+        return self._json({"status": "ok", "parameter_version": default_parameter_table().table_version})
+
+
+app = CalculatorAPI()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m verduurzaming.api", description="HTTP JSON API voor de berekeningen")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=4096, help="Maximaal aantal vlakken per micro-batch")
+    parser.add_argument("--max-wait", type=float, default=0.002, help="Maximale wachttijd (s) op andere verzoeken")
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError as exc:
+        raise RuntimeError("Voor de API is uvicorn nodig: pip install uvicorn") from exc
+    uvicorn.run(CalculatorAPI(args.max_batch, args.max_wait), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# Verwerking van portefeuillebestanden (CSV of Parquet) in blokken van vaste grootte
+from pathlib import Path
+
+import numpy as np
+
+from .berekening import calculate_costs_batch
+from .parameters import default_parameter_table
+
+
+# Vlakken zoals in de app: kolomvoorvoegsel -> categorienaam
+VLAKKEN = {
+    "floor": "Vloer",
+    "roof": "Dak",
+    "wall": "Wanden",
+    "window": "Ramen",
+}
+VLAK_VELDEN = ("area", "current_rc", "desired_rc", "material_kost", "installation_kost")
+
+# Algemene parameters die ook per gebouw als kolom mogen voorkomen
+ALGEMENE_KOLOMMEN = ("delta_t", "emissie_per_kwh", "energy_kost", "subsidy_percentage")
+
+TOTAAL_KOLOMMEN = ("cost", "savings", "co2_savings", "total_savings_euro")
+
+
+def invoer_kolommen():
+    return [f"{vlak}_{veld}" for vlak in VLAKKEN for veld in VLAK_VELDEN]
+
+
+# Functie om een blok gebouwen door te rekenen; geeft per gebouw de uitkomsten per vlak en de totalen.
+# Met klimaat (een klimaat.DegreeHourTable) komen de graaduren bij setpoint, of bij de kolom setpoint
+# per gebouw, in de plaats van delta_t * hours_per_year. Met cash_flow (een dict met de instellingen voor
+# kasstroom.calculate_npv, waaronder discount_rate) komen de NPV, IRR en verdisconteerde terugverdientijd erbij.
+# Met target_label komen per vlak de goedkoopste RC-waarden om dat label te halen erbij (zie
+# optimalisatie.rc_for_label), met de kosten en of het label met RC tot max_rc haalbaar is.
+# Een kolom heating_type wordt via de parametertabel (parameters, standaard die van het proces) omgezet
+# naar emissie per gebouw; de versie van die tabel komt in de kolom parameter_version. Zonder emissie_per_kwh
+# geldt de emissie van het standaardtype verwarming uit die tabel.
+def calculate_buildings(chunk, delta_t=15, emissie_per_kwh=None, energy_kost=0.6,
+                        subsidy_percentage=20, hours_per_year=4800, klimaat=None, setpoint=20.0,
+                        cash_flow=None, target_label=None, max_rc=10.0, parameters=None):
+    import pandas as pd
+
+    parameters = parameters or default_parameter_table()
+    if emissie_per_kwh is None:
+        emissie_per_kwh = parameters.emission_for(parameters.defaults["heating_type"])
+
+    ontbrekend = [kolom for kolom in invoer_kolommen() if kolom not in chunk]
+    if ontbrekend:
+        raise ValueError(f"Ontbrekende kolommen in invoer: {', '.join(ontbrekend)}")
+
+    # (gebouwen, vlakken)-matrices per invoerveld
+    invoer = {
+        veld: np.column_stack([chunk[f"{vlak}_{veld}"].to_numpy(dtype=float) for vlak in VLAKKEN])
+        for veld in VLAK_VELDEN
+    }
+    algemeen = {
+        "delta_t": delta_t,
+        "emissie_per_kwh": emissie_per_kwh,
+        "energy_kost": energy_kost,
+        "subsidy_percentage": subsidy_percentage,
+    }
+    for naam in ALGEMENE_KOLOMMEN:
+        if naam in chunk:
+            algemeen[naam] = chunk[naam].to_numpy(dtype=float)[:, None]
+    if "heating_type" in chunk and "emissie_per_kwh" not in chunk:
+        algemeen["emissie_per_kwh"] = parameters.emission_array(chunk["heating_type"])[:, None]
+
+    degree_hours = None
+    if klimaat is not None:
+        if "setpoint" in chunk:
+            setpoint = chunk["setpoint"].to_numpy(dtype=float)[:, None]
+        degree_hours = klimaat.degree_hours(setpoint)
+
+    result = calculate_costs_batch(
+        invoer["area"], invoer["current_rc"], invoer["desired_rc"],
+        invoer["material_kost"], invoer["installation_kost"],
+        algemeen["delta_t"], algemeen["emissie_per_kwh"], algemeen["energy_kost"],
+        algemeen["subsidy_percentage"], hours_per_year, degree_hours,
+    )
+
+    uitvoer = {}
+    if "building_id" in chunk:
+        uitvoer["building_id"] = chunk["building_id"].to_numpy()
+    for i, vlak in enumerate(VLAKKEN):
+        for sleutel in ("total_kost_with", "saved_kWh", "co2_savings", "payback_time", "savings_euro"):
+            uitvoer[f"{vlak}_{sleutel}"] = result[sleutel][:, i]
+
+    # Totalen per gebouw, op dezelfde manier als in de app
+    uitvoer["cost"] = result["total_kost_with"].sum(axis=1)
+    uitvoer["savings"] = result["saved_kWh"].sum(axis=1)
+    uitvoer["co2_savings"] = result["co2_savings"].sum(axis=1)
+    uitvoer["payback"] = result["payback_time"].max(axis=1)
+    uitvoer["total_savings_euro"] = result["savings_euro"].sum(axis=1)
+    uitvoer["total_kwh_per_m2_per_year"] = result["desired_kWh"].sum(axis=1) / invoer["area"].sum(axis=1)
+    # Label als geordende categorie: één byte per gebouw in plaats van een string
+    labels = parameters.labels
+    uitvoer["energy_label"] = labels.categorical(labels.codes(uitvoer["total_kwh_per_m2_per_year"]))
+    uitvoer["parameter_version"] = pd.Categorical.from_codes(np.zeros(len(chunk), dtype=np.int8),
+                                                             categories=[parameters.table_version])
+
+    if cash_flow is not None:
+        from .kasstroom import calculate_discounted_payback, calculate_irr, calculate_npv, cash_flows
+        instellingen = dict(cash_flow)
+        discount_rate = instellingen.pop("discount_rate", 0.0)
+        investment = (invoer["material_kost"] + invoer["installation_kost"]) * invoer["area"]
+        instellingen["subsidy"] = investment * np.asarray(algemeen["subsidy_percentage"], dtype=float) / 100
+        savings_euro = result["savings_euro"]
+        uitvoer["npv"] = calculate_npv(investment, savings_euro, discount_rate, axis=1, **instellingen)
+        uitvoer["irr"] = calculate_irr(investment, savings_euro, axis=1, **instellingen)
+        uitvoer["discounted_payback"] = calculate_discounted_payback(
+            cash_flows(investment, savings_euro, **instellingen).sum(axis=1), discount_rate)
+
+    if target_label is not None:
+        from .optimalisatie import rc_for_label
+        # Materiaalkosten schalen met de RC-waarde: de opgegeven prijs geldt voor de gewenste RC
+        doel = rc_for_label(invoer["area"], invoer["current_rc"], invoer["material_kost"] / invoer["desired_rc"],
+                            invoer["installation_kost"], target_label, algemeen["delta_t"], algemeen["emissie_per_kwh"],
+                            algemeen["energy_kost"], algemeen["subsidy_percentage"], hours_per_year, degree_hours,
+                            max_rc)
+        for i, vlak in enumerate(VLAKKEN):
+            uitvoer[f"{vlak}_label_rc"] = doel["rc"][:, i]
+        uitvoer["label_cost"] = doel["cost"]
+        uitvoer["label_feasible"] = doel["feasible"]
+
+    return pd.DataFrame(uitvoer, index=chunk.index)
+
+
+# Functie om een invoerbestand blok voor blok in te lezen zonder het hele bestand in het geheugen te laden
+def iter_chunks(path, chunksize=50_000):
+    path = Path(path)
+    kolommen = set(invoer_kolommen()) | set(ALGEMENE_KOLOMMEN) | {"building_id", "setpoint", "heating_type"}
+
+    if path.suffix.lower() in (".parquet", ".pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Voor Parquet-bestanden is pyarrow nodig: pip install pyarrow") from exc
+        bestand = pq.ParquetFile(path)
+        aanwezig = [naam for naam in bestand.schema_arrow.names if naam in kolommen]
+        for batch in bestand.iter_batches(batch_size=chunksize, columns=aanwezig):
+            yield batch.to_pandas()
+    else:
+        import pandas as pd
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=lambda naam: naam in kolommen)
+
+
+# Schrijft blokken weg naar CSV of Parquet, afhankelijk van de extensie van het uitvoerbestand
+class ChunkWriter:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.parquet = self.path.suffix.lower() in (".parquet", ".pq")
+        self._writer = None
+        self._eerste = True
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            tabel = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, tabel.schema)
+            self._writer.write_table(tabel)
+        else:
+            df.to_csv(self.path, mode="w" if self._eerste else "a", header=self._eerste, index=False)
+        self._eerste = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Functie om een hele portefeuille door te rekenen; het geheugengebruik blijft begrensd door chunksize.
+# Met reports_path wordt per gebouw een PDF-rapport in een ZIP-bestand gezet, verdeeld over processes.
+# Geeft de totalen over de portefeuille terug, inclusief de verdeling over energielabels en de versie
+# van de parametertabel. De tabel wordt één keer voor de hele run vastgelegd.
+def run_batch(input_path, output_path, chunksize=50_000, reports_path=None, processes=None, **params):
+    from contextlib import nullcontext
+    params["parameters"] = params.get("parameters") or default_parameter_table()
+    totalen = dict.fromkeys(TOTAAL_KOLOMMEN, 0.0)
+    totalen["buildings"] = 0
+    totalen["parameter_version"] = params["parameters"].table_version
+    labels = dict.fromkeys(params["parameters"].labels.labels, 0)
+
+    if reports_path is not None:
+        from .rapport import ReportZip, reports_from_frame
+        rapporten = ReportZip(reports_path, processes)
+    else:
+        rapporten = nullcontext()
+
+    with ChunkWriter(output_path) as writer, rapporten:
+        for chunk in iter_chunks(input_path, chunksize):
+            resultaat = calculate_buildings(chunk, **params)
+            writer.write(resultaat)
+            if reports_path is not None:
+                rapporten.add(list(reports_from_frame(resultaat)))
+
+            totalen["buildings"] += len(resultaat)
+            for kolom in TOTAAL_KOLOMMEN:
+                totalen[kolom] += float(resultaat[kolom].sum())
+            if "npv" in resultaat:
+                totalen["npv"] = totalen.get("npv", 0.0) + float(resultaat["npv"].sum())
+            aantallen = np.bincount(resultaat["energy_label"].cat.codes.to_numpy(), minlength=len(labels))
+            for label, aantal in zip(labels, aantallen.tolist()):
+                labels[label] += aantal
+
+    totalen.update({f"label_{label}": aantal for label, aantal in labels.items()})
+    return totalen
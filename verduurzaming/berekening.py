@@ -0,0 +1,124 @@
+# Rekenregels zonder UI-afhankelijkheden. NumPy en pandas worden pas geïmporteerd
+# wanneer een vectorfunctie wordt aangeroepen, zodat deze module in milliseconden laadt.
+from .labels import default_label_table
+
+
+# Volgorde van de uitkomsten van calculate_costs_with_rc
+RESULTAAT_KOLOMMEN = ("total_kost_with", "saved_kWh", "co2_savings", "payback_time", "savings_euro", "desired_kWh")
+
+
+def calculate_energy_label(kwh_per_m2_per_year):
+    return default_label_table().label(kwh_per_m2_per_year)
+
+# Vectorversie van calculate_energy_label voor een array kWh/m²/jaar
+def calculate_energy_labels(kwh_per_m2_per_year):
+    return default_label_table().classify(kwh_per_m2_per_year)[1]
+
+def get_label_color(energy_label):
+    return default_label_table().color(energy_label)  # Default to white if not found
+
+def calculate_u_value(rc_value):
+    return 1 / rc_value
+
+# Functie om energieverlies te berekenen
+def calculate_energy_loss(u_value, area, delta_t, hours_per_year=4800):
+    return (u_value * area * delta_t * hours_per_year) / 1000
+
+# Functie om kostenbesparing te berekenen
+def calculate_savings(q1, q2, energy_cost_per_kwh):
+    energy_saving = q1 - q2
+    cost_saving = energy_saving * energy_cost_per_kwh
+    return energy_saving, cost_saving
+
+# Functie om totale kosten te berekenen inclusief subsidie
+def calculate_total_cost(area, material_cost, installation_cost, subsidy_percentage):
+    total_cost = (material_cost + installation_cost) * area
+    subsidized_cost = total_cost * (1 - subsidy_percentage)
+    return total_cost, subsidized_cost
+
+# Functie om terugverdientijd te berekenen
+def calculate_payback_period(total_cost, annual_savings):
+    return total_cost / annual_savings if annual_savings != 0 else float('inf')
+
+def calculate_CO2(kWh,emissie):
+    return kWh * emissie
+
+
+# Functie voor de berekening van kosten, besparing, CO2-besparing en terugverdientijd van één vlak.
+# Dunne schil om calculate_costs_batch; cost_per_m2 wordt niet gebruikt en blijft voor compatibiliteit.
+def calculate_costs_with_rc(area, current_rc, desired_rc, cost_per_m2, emissie_per_kwh, delta_t, hours_per_year, subsidy_percentage, energy_kost, material_kost, installation_kost):
+    result = calculate_costs_batch(area, current_rc, desired_rc, material_kost, installation_kost,
+                                   delta_t, emissie_per_kwh, energy_kost, subsidy_percentage, hours_per_year)
+    return tuple(float(result[key]) for key in RESULTAAT_KOLOMMEN)
+
+
+# Vectorversie van calculate_costs_with_rc voor hele portefeuilles in één keer.
+# Alle argumenten mogen scalars of NumPy-arrays zijn en worden tegen elkaar gebroadcast,
+# dus bijvoorbeeld een (gebouwen, vlakken)-matrix met een scalaire ΔT werkt direct.
+# Met degree_hours (graaduren uit een klimaatjaar, zie klimaat.py) vervalt ΔT * hours_per_year.
+# Geeft een dict met arrays terug, met de sleutels uit RESULTAAT_KOLOMMEN plus energy_label.
+def calculate_costs_batch(area, current_rc, desired_rc, material_kost, installation_kost, delta_t,
+                          emissie_per_kwh, energy_kost, subsidy_percentage, hours_per_year=4800,
+                          degree_hours=None):
+    import numpy as np
+
+    area = np.asarray(area, dtype=float)
+    current_rc = np.asarray(current_rc, dtype=float)
+    desired_rc = np.asarray(desired_rc, dtype=float)
+    if degree_hours is None:
+        degree_hours = np.asarray(delta_t, dtype=float) * hours_per_year
+
+    # Warmteverlies in kWh: U * A * ΔT * uren / 1000, met U = 1 / RC
+    verlies_per_u = area * (np.asarray(degree_hours, dtype=float) / 1000)
+    current_kWh = verlies_per_u / current_rc
+    desired_kWh = verlies_per_u / desired_rc
+    saved_kWh = current_kWh - desired_kWh
+    savings_euro = saved_kWh * energy_kost
+
+    # Kosten na subsidie (subsidie in procenten)
+    total_kost_without = (np.asarray(material_kost, dtype=float) + installation_kost) * area
+    total_kost_with = total_kost_without * (1 - np.asarray(subsidy_percentage, dtype=float) / 100)
+
+    co2_savings = saved_kWh * emissie_per_kwh
+
+    # Terugverdientijd, oneindig als er niets bespaard wordt
+    total_kost_with, savings_euro = np.broadcast_arrays(total_kost_with, savings_euro)
+    payback_time = np.full(savings_euro.shape, np.inf)
+    np.divide(total_kost_with, savings_euro, out=payback_time, where=savings_euro != 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kwh_per_m2 = desired_kWh / area
+    energy_label = calculate_energy_labels(kwh_per_m2)
+
+    return {
+        "total_kost_with": total_kost_with,
+        "saved_kWh": saved_kWh,
+        "co2_savings": np.broadcast_to(co2_savings, saved_kWh.shape),
+        "payback_time": payback_time,
+        "savings_euro": savings_euro,
+        "desired_kWh": desired_kWh,
+        "energy_label": energy_label,
+    }
+
+
+# Zelfde berekening op een DataFrame met één rij per vlak of gebouw.
+# Ontbrekende kolommen voor de algemene parameters worden aangevuld met de opgegeven standaardwaarden.
+def calculate_costs_frame(df, delta_t=15, emissie_per_kwh=0.184, energy_kost=0.6, subsidy_percentage=20, hours_per_year=4800):
+    import pandas as pd
+
+    def kolom(naam, standaard):
+        return df[naam].to_numpy(dtype=float) if naam in df else standaard
+
+    result = calculate_costs_batch(
+        df["area"].to_numpy(dtype=float),
+        df["current_rc"].to_numpy(dtype=float),
+        df["desired_rc"].to_numpy(dtype=float),
+        df["material_kost"].to_numpy(dtype=float),
+        df["installation_kost"].to_numpy(dtype=float),
+        kolom("delta_t", delta_t),
+        kolom("emissie_per_kwh", emissie_per_kwh),
+        kolom("energy_kost", energy_kost),
+        kolom("subsidy_percentage", subsidy_percentage),
+        hours_per_year,
+    )
+    return pd.DataFrame(result, index=df.index)
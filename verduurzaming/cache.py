@@ -0,0 +1,45 @@
+# Begrensde LRU-caches voor herhaalde Streamlit-runs. Elke widgetwijziging draait het hele
+# script opnieuw; met deze caches worden ongewijzigde PDF-rapporten en grafieken hergebruikt. De resultaten
+# per vlak worden door de rekengraaf (graaf.py) hergebruikt, niet hier.
+# De grootte is per cache in te stellen met de omgevingsvariabele VERDUURZAMING_CACHE.
+# Wat van de energielabels afhangt, heeft de labeltabel in de sleutel: wordt labels.json opnieuw ingelezen of
+# een andere parametertabel gekozen, dan is dat een nieuwe tabel en wordt er opnieuw gerekend.
+import os
+from functools import lru_cache
+
+from .labels import default_label_table
+
+CACHE_GROOTTE = int(os.environ.get("VERDUURZAMING_CACHE", 256))
+
+
+@lru_cache(maxsize=CACHE_GROOTTE)
+def _pdf(data, totals, charts, scenarios, labels):
+    from .rapport import generate_pdf
+    return generate_pdf(dict(data), dict(totals), charts=charts,
+                        scenarios=None if scenarios is None else {naam: dict(waarden) for naam, waarden in scenarios})
+
+
+# PDF-rapport als bytes; data en totals als tuples van (sleutel, waarde) paren,
+# scenarios als tuple van (naam, totals) zoals scenario.scenario_totals. De labelkleuren komen uit de tabel.
+def cached_pdf(data, totals, charts=False, scenarios=None):
+    return _pdf(data, totals, charts, scenarios, default_label_table())
+
+
+def _caches():
+    from . import grafieken
+    return {
+        "pdf": _pdf,
+        "cost_savings_chart": grafieken.render_cost_savings_chart,
+        "co2_chart": grafieken.render_co2_chart,
+        "scenario_chart": grafieken.render_scenario_chart,
+    }
+
+
+# Hits, misses en vulling per cache, bijvoorbeeld voor een debugweergave
+def cache_info():
+    return {naam: functie.cache_info()._asdict() for naam, functie in _caches().items()}
+
+
+def clear_caches():
+    for functie in _caches().values():
+        functie.cache_clear()
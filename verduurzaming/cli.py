@@ -0,0 +1,98 @@
+# Opdrachtregel voor het doorrekenen van portefeuilles zonder Streamlit:
+#   python -m verduurzaming portefeuille.csv resultaten.csv --chunksize 50000
+import argparse
+import csv
+import os
+import sys
+from pathlib import Path
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m verduurzaming",
+        description="Reken een portefeuille (CSV of Parquet, één rij per gebouw) door in blokken.",
+    )
+    parser.add_argument("input", help="Invoerbestand (.csv of .parquet)")
+    parser.add_argument("output", help="Uitvoerbestand met resultaten per gebouw (.csv of .parquet)")
+    parser.add_argument("--totals", help="CSV-bestand voor de totalen (standaard <output>_totalen.csv)")
+    parser.add_argument("--reports", help="ZIP-bestand met een PDF-rapport per gebouw")
+    parser.add_argument("--processes", type=int, help="Aantal processen voor de rapporten (standaard alle cores)")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Aantal gebouwen per blok")
+    parser.add_argument("--parameters", help="Parametertabel (JSON), bijvoorbeeld een oude versie om een run te herhalen")
+    parser.add_argument("--delta-t", type=float, help="Temperatuurverschil (°C, standaard uit de parametertabel)")
+    parser.add_argument("--energy-kost", type=float, help="Energiekosten (euro/kWh, standaard uit de parametertabel)")
+    parser.add_argument("--subsidy", type=float, help="Subsidiepercentage (0-100, standaard uit de parametertabel)")
+    parser.add_argument("--heating-type", help="Type verwarming, bepaalt de CO2-emissie per kWh (standaard uit de parametertabel)")
+    parser.add_argument("--hours-per-year", type=float, help="Stookuren per jaar (standaard uit de parametertabel)")
+    parser.add_argument("--climate", help="CSV met uurtemperaturen; vervangt --delta-t en --hours-per-year door graaduren")
+    parser.add_argument("--setpoint", type=float, default=20.0, help="Stooktemperatuur (°C) bij --climate")
+    parser.add_argument("--cash-flow", action="store_true", help="Voeg NPV, IRR en verdisconteerde terugverdientijd toe")
+    parser.add_argument("--years", type=int, default=30, help="Horizon van de kasstroomprojectie (jaren)")
+    parser.add_argument("--discount-rate", type=float, default=0.04, help="Disconteringsvoet per jaar (0.04 = 4%%)")
+    parser.add_argument("--escalation", type=float, default=0.02, help="Stijging van de energieprijs per jaar")
+    parser.add_argument("--degradation", type=float, default=0.0, help="Afname van de besparing per jaar door veroudering")
+    parser.add_argument("--subsidy-year", type=int, default=0, help="Jaar waarin de subsidie wordt uitgekeerd")
+    parser.add_argument("--target-label", help="Voeg per vlak de goedkoopste RC-waarden voor dit label toe (een label uit de parametertabel)")
+    parser.add_argument("--max-rc", type=float, default=10.0, help="Hoogste RC-waarde per vlak bij --target-label")
+    return parser
+
+
+def main(argv=None):
+    from .batch import run_batch
+    from .klimaat import climate_year
+    from .parameters import default_parameter_table
+
+    args = build_parser().parse_args(argv)
+    # Via de omgeving, zodat ook de processen voor de rapporten deze tabel gebruiken
+    if args.parameters:
+        os.environ["VERDUURZAMING_PARAMETERS"] = str(Path(args.parameters).resolve())
+        default_parameter_table.cache_clear()
+    try:
+        parameters = default_parameter_table()
+        emissie_per_kwh = parameters.emission_for(args.heating_type or parameters.defaults["heating_type"])
+    except (OSError, ValueError) as fout:
+        raise SystemExit(str(fout))
+    # Pas na het laden van de tabel bekend, want --parameters kan andere labels hebben
+    labels = parameters.labels.labels
+    if args.target_label is not None and args.target_label not in labels:
+        raise SystemExit(f"--target-label moet een van {', '.join(labels)} zijn, niet {args.target_label!r}")
+    standaard = parameters.defaults
+    if args.chunksize < 1:
+        raise SystemExit("--chunksize moet minimaal 1 zijn")
+    if args.cash_flow and not 0 <= args.subsidy_year <= args.years:
+        raise SystemExit("--subsidy-year moet tussen 0 en --years liggen")
+
+    cash_flow = None
+    if args.cash_flow:
+        cash_flow = dict(years=args.years, discount_rate=args.discount_rate, escalation=args.escalation,
+                         degradation=args.degradation, subsidy_year=args.subsidy_year)
+
+    totalen = run_batch(
+        args.input,
+        args.output,
+        chunksize=args.chunksize,
+        reports_path=args.reports,
+        processes=args.processes,
+        delta_t=standaard["delta_t"] if args.delta_t is None else args.delta_t,
+        emissie_per_kwh=emissie_per_kwh,
+        energy_kost=standaard["energy_kost"] if args.energy_kost is None else args.energy_kost,
+        subsidy_percentage=standaard["subsidy_percentage"] if args.subsidy is None else args.subsidy,
+        hours_per_year=parameters.hours_per_year if args.hours_per_year is None else args.hours_per_year,
+        klimaat=climate_year(args.climate) if args.climate else None,
+        setpoint=args.setpoint,
+        cash_flow=cash_flow,
+        target_label=args.target_label,
+        max_rc=args.max_rc,
+        parameters=parameters,
+    )
+
+    output = Path(args.output)
+    totals_path = Path(args.totals) if args.totals else output.with_name(f"{output.stem}_totalen.csv")
+    with open(totals_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Categorie", "Waarde"])
+        writer.writerows(totalen.items())
+
+    print(f"{totalen['buildings']} gebouwen verwerkt met parameters {totalen['parameter_version']} -> {output}, "
+          f"totalen in {totals_path}", file=sys.stderr)
+    return 0
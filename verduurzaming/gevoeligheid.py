@@ -0,0 +1,105 @@
+# Gevoeligheidsanalyse: parameters één voor één variëren (tornado) of twee tegelijk over een
+# raster (heatmap). Alle varianten worden als extra as voor de vlakken gezet en in één aanroep
+# van calculate_costs_batch doorgerekend, dus een raster van 50 x 50 over vier vlakken is één
+# berekening over 10.000 rijen in plaats van 2.500 losse runs.
+import numpy as np
+
+from .berekening import calculate_costs_batch
+
+# Parameters per vlak (arrays van vorm (vlakken,)) en parameters voor het hele gebouw
+VLAK_PARAMETERS = ("area", "current_rc", "desired_rc", "material_kost", "installation_kost")
+GEBOUW_PARAMETERS = ("delta_t", "energy_kost", "subsidy_percentage", "emissie_per_kwh")
+
+PARAMETER_NAMEN = {
+    "delta_t": "Temperatuurverschil (°C)",
+    "energy_kost": "Energiekosten (€/kWh)",
+    "subsidy_percentage": "Subsidie (%)",
+    "emissie_per_kwh": "CO2-emissie (kg/kWh)",
+    "area": "Oppervlakte (factor)",
+    "current_rc": "Huidige RC (factor)",
+    "desired_rc": "Gewenste RC (factor)",
+    "material_kost": "Materiaalkosten (factor)",
+    "installation_kost": "Installatiekosten (factor)",
+}
+
+METRIEKEN = {
+    "cost": "Kosten (€)",
+    "savings": "Besparing (kWh)",
+    "co2_savings": "CO2-besparing (kg)",
+    "payback": "Terugverdientijd (jaar)",
+    "total_savings_euro": "Bespaarde energiekosten (€)",
+}
+
+
+# Rekent varianten door; varianten is een dict parameter -> array met de extra assen vooraan.
+# Gebouwparameters krijgen een as voor de vlakken, vlakparameters worden als factor op de basis toegepast.
+def _evaluate(base, varianten, hours_per_year):
+    invoer = {}
+    for naam in VLAK_PARAMETERS:
+        waarde = np.asarray(base[naam], dtype=float)
+        if naam in varianten:
+            waarde = waarde * np.asarray(varianten[naam], dtype=float)[..., None]
+        invoer[naam] = waarde
+    for naam in GEBOUW_PARAMETERS:
+        waarde = varianten.get(naam, base[naam])
+        invoer[naam] = np.asarray(waarde, dtype=float)[..., None]
+
+    result = calculate_costs_batch(invoer["area"], invoer["current_rc"], invoer["desired_rc"],
+                                   invoer["material_kost"], invoer["installation_kost"], invoer["delta_t"],
+                                   invoer["emissie_per_kwh"], invoer["energy_kost"],
+                                   invoer["subsidy_percentage"], hours_per_year)
+    # Totalen zoals in de app: sommen over de vlakken en de langste terugverdientijd
+    return {
+        "cost": result["total_kost_with"].sum(axis=-1),
+        "savings": result["saved_kWh"].sum(axis=-1),
+        "co2_savings": result["co2_savings"].sum(axis=-1),
+        "payback": result["payback_time"].max(axis=-1),
+        "total_savings_euro": result["savings_euro"].sum(axis=-1),
+    }
+
+
+def _waarden(base, naam, factoren):
+    # Gebouwparameters worden absoluut gevarieerd, vlakparameters als factor op de basis
+    factoren = np.asarray(factoren, dtype=float)
+    return factoren * base[naam] if naam in GEBOUW_PARAMETERS else factoren
+
+
+# Tornado: elke parameter op factor laag en hoog (bijvoorbeeld 0.8 en 1.2), de rest op de basis.
+# Geeft per metriek de basiswaarde en arrays laag/hoog per parameter, gesorteerd op grootste effect.
+def tornado(base, parameters, low=0.8, high=1.2, metric="payback", hours_per_year=4800):
+    parameters = list(parameters)
+    aantal = len(parameters)
+    varianten = {}
+    for i, naam in enumerate(parameters):
+        # Rij 2i is laag, rij 2i+1 is hoog; de overige rijen houden de basiswaarde
+        factoren = np.ones(2 * aantal)
+        factoren[2 * i], factoren[2 * i + 1] = low, high
+        varianten[naam] = _waarden(base, naam, factoren)
+    totalen = _evaluate(base, varianten, hours_per_year)[metric].reshape(aantal, 2)
+    basis = float(_evaluate(base, {}, hours_per_year)[metric])
+
+    volgorde = np.argsort(-np.abs(totalen[:, 1] - totalen[:, 0]))
+    return {
+        "parameters": [parameters[i] for i in volgorde],
+        "low": totalen[volgorde, 0],
+        "high": totalen[volgorde, 1],
+        "base": basis,
+    }
+
+
+# Enkele parameter over een reeks waarden (absoluut voor gebouwparameters, factor voor vlakparameters)
+def sweep(base, parameter, values, hours_per_year=4800):
+    return _evaluate(base, {parameter: np.asarray(values, dtype=float)}, hours_per_year)
+
+
+# Twee parameters over een raster; geeft per metriek een matrix van vorm (len(values_y), len(values_x))
+def grid(base, param_x, values_x, param_y, values_y, hours_per_year=4800):
+    if param_x == param_y:
+        raise ValueError("Kies twee verschillende parameters voor het raster")
+    values_x = np.asarray(values_x, dtype=float)
+    values_y = np.asarray(values_y, dtype=float)
+    varianten = {
+        param_x: np.broadcast_to(values_x[None, :], (values_y.size, values_x.size)),
+        param_y: np.broadcast_to(values_y[:, None], (values_y.size, values_x.size)),
+    }
+    return _evaluate(base, varianten, hours_per_year)
@@ -0,0 +1,158 @@
+# Rekengraaf met bijgehouden afhankelijkheden: invoer -> resultaat per vlak -> totalen -> label -> grafieken,
+# tabel en PDF. Een knoop wordt pas berekend als erom gevraagd wordt, en alleen opnieuw als een van zijn
+# afhankelijkheden sinds de vorige keer een nieuwe versie heeft. Komt er na een herberekening dezelfde waarde
+# uit (bijvoorbeeld hetzelfde label), dan houdt de knoop zijn versie en blijven de knopen erna ongemoeid.
+# In de app staat de graaf per sessie in session_state, zodat een wijziging van één RC-waarde alleen dat vlak,
+# de totalen en wat daarvan afhangt opnieuw berekent.
+import itertools
+import threading
+
+import numpy as np
+
+from .berekening import RESULTAAT_KOLOMMEN, calculate_costs_batch
+
+# Velden van de invoerknoop per vlak, in deze volgorde
+VLAK_INVOER = ("area", "current_rc", "desired_rc", "material_kost", "installation_kost")
+
+
+# Gelijkheid voor de waarden in de graaf: arrays, DataFrames, dicts, reeksen en objecten met attributen
+def _gelijk(a, b):
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+    try:
+        if isinstance(a, np.ndarray):
+            return a.shape == b.shape and a.dtype == b.dtype and bool(
+                np.array_equal(a, b, equal_nan=a.dtype.kind in "fc"))
+        if hasattr(a, "equals"):
+            return bool(a.equals(b))
+        if isinstance(a, dict):
+            return a.keys() == b.keys() and all(_gelijk(a[sleutel], b[sleutel]) for sleutel in a)
+        if isinstance(a, (list, tuple)):
+            return len(a) == len(b) and all(_gelijk(x, y) for x, y in zip(a, b))
+        if hasattr(a, "__dict__") and not callable(a):
+            return _gelijk(vars(a), vars(b))
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+# Een knoop; staat is (waarde, versie) als één tuple, zodat een andere thread nooit een waarde met de versie
+# van een vorige berekening leest. lock zorgt dat één thread de knoop berekent en de andere daarop wachten.
+class _Knoop:
+    __slots__ = ("functie", "afhankelijkheden", "staat", "gezien", "lock")
+
+    def __init__(self, functie, afhankelijkheden, staat=(None, None)):
+        self.functie = functie
+        self.afhankelijkheden = afhankelijkheden
+        self.staat = staat
+        self.gezien = None
+        self.lock = threading.Lock()
+
+
+# De lock van de graaf beschermt alleen de administratie (knopen, versies, recomputed); berekend wordt
+# buiten die lock, onder de lock van de knoop zelf. Zo kunnen threads van de render-pool verschillende knopen
+# tegelijk berekenen, en rekent een knoop die door meerdere threads wordt gevraagd toch maar één keer.
+class ComputationGraph:
+    def __init__(self):
+        self._knopen = {}
+        self._versies = itertools.count()
+        self._lock = threading.Lock()
+        # Knopen die sinds reset_stats() opnieuw zijn berekend, in volgorde
+        self.recomputed = []
+
+    # Zet de waarde van een invoerknoop; geeft True als die anders is dan de vorige waarde
+    def input(self, naam, waarde):
+        with self._lock:
+            knoop = self._knopen.get(naam)
+            if knoop is not None and knoop.functie is None and _gelijk(knoop.staat[0], waarde):
+                return False
+            self._knopen[naam] = _Knoop(None, (), (waarde, next(self._versies)))
+            return True
+
+    # Legt een berekende knoop vast: functie(*waarden van afhankelijkheden). Bestaat de knoop al met dezelfde
+    # afhankelijkheden, dan houdt hij zijn waarde; functie moet dan hetzelfde berekenen als de vorige.
+    def node(self, naam, functie, *afhankelijkheden):
+        with self._lock:
+            knoop = self._knopen.get(naam)
+            if knoop is not None and knoop.functie is not None and knoop.afhankelijkheden == afhankelijkheden:
+                knoop.functie = functie
+            else:
+                self._knopen[naam] = _Knoop(functie, afhankelijkheden)
+
+    def remove(self, naam):
+        with self._lock:
+            self._knopen.pop(naam, None)
+
+    def names(self, prefix=""):
+        with self._lock:
+            return [naam for naam in self._knopen if naam.startswith(prefix)]
+
+    def __contains__(self, naam):
+        return naam in self._knopen
+
+    # Waarde van een knoop, na het bijwerken van de knopen waar hij van afhangt
+    def get(self, naam):
+        return self._bijwerken(naam).staat[0]
+
+    # Werkt eerst de afhankelijkheden bij en daarna, onder de eigen lock, de knoop zelf. Een thread houdt zo
+    # nooit meer dan één knooplock tegelijk vast.
+    def _bijwerken(self, naam):
+        with self._lock:
+            knoop = self._knopen[naam]
+        if knoop.functie is None:
+            return knoop
+        afhankelijk = [self._bijwerken(afhankelijkheid) for afhankelijkheid in knoop.afhankelijkheden]
+        with knoop.lock:
+            staten = [knoop_ervoor.staat for knoop_ervoor in afhankelijk]
+            versies = tuple(versie for _, versie in staten)
+            if versies != knoop.gezien:
+                waarde = knoop.functie(*(waarde for waarde, _ in staten))
+                oud, versie = knoop.staat
+                gewijzigd = versie is None or not _gelijk(oud, waarde)
+                with self._lock:
+                    if gewijzigd:
+                        knoop.staat = (waarde, next(self._versies))
+                    self.recomputed.append(naam)
+                knoop.gezien = versies
+        return knoop
+
+    def reset_stats(self):
+        with self._lock:
+            self.recomputed = []
+
+
+# Resultaat van één vlak: uitkomsten als getallen, zoals één rij van calculate_costs_batch
+def _bereken_vlak(parameters, invoer):
+    delta_t, emissie_per_kwh, energy_kost, subsidy_percentage, hours_per_year = parameters
+    result = calculate_costs_batch(*invoer, delta_t, emissie_per_kwh, energy_kost, subsidy_percentage, hours_per_year)
+    return {**{sleutel: float(result[sleutel]) for sleutel in RESULTAAT_KOLOMMEN}, "energy_label": str(result["energy_label"])}
+
+
+# Resultaten per vlak samengevoegd tot arrays, in het formaat van SurfaceTable.calculate
+def _samenvoegen(*vlakken):
+    return {
+        **{sleutel: np.array([vlak[sleutel] for vlak in vlakken], dtype=float) for sleutel in RESULTAAT_KOLOMMEN},
+        "energy_label": np.array([vlak["energy_label"] for vlak in vlakken]),
+    }
+
+
+# Knopen voor de vlakken van één gebouw (een SurfaceTable): per vlak een invoerknoop "invoer:<naam>" en een
+# resultaatknoop "vlak:<naam>", samengevoegd in "resultaat" en daarna "totals" (een dict met getallen, zoals
+# SurfaceTable.totals voor één gebouw). parameters is (delta_t, emissie_per_kwh, energy_kost,
+# subsidy_percentage, hours_per_year). Knopen van vlakken die niet meer in de tabel staan, worden verwijderd.
+def surface_nodes(graaf, vlakken, parameters):
+    graaf.input("vlakken", vlakken)
+    graaf.input("parameters", tuple(parameters))
+    invoer = np.column_stack([getattr(vlakken, veld) for veld in VLAK_INVOER]).tolist()
+    for naam, waarden in zip(vlakken.names, invoer):
+        graaf.input(f"invoer:{naam}", tuple(waarden))
+        graaf.node(f"vlak:{naam}", _bereken_vlak, "parameters", f"invoer:{naam}")
+    for naam in set(graaf.names("vlak:")) - {f"vlak:{naam}" for naam in vlakken.names}:
+        graaf.remove(naam)
+        graaf.remove(f"invoer:{naam[len('vlak:'):]}")
+
+    graaf.node("resultaat", _samenvoegen, *(f"vlak:{naam}" for naam in vlakken.names))
+    graaf.node("totals", lambda vlakken, resultaat: {sleutel: waarden[0].item() for sleutel, waarden in
+                                                      vlakken.totals(resultaat).items()}, "vlakken", "resultaat")
@@ -0,0 +1,211 @@
+# Grafieken. Voor de app zijn het Vega-Lite-specificaties die de browser tekent (st.vega_lite_chart),
+# opgebouwd uit de resultatentabel; er wordt dan per run geen figuur meer gemaakt. Matplotlib wordt alleen
+# nog gebruikt voor PNG's in het PDF-rapport: direct met Figure en de Agg-canvas, zonder pyplot, dus er
+# blijven geen figuren in globale toestand achter.
+from functools import lru_cache
+from io import BytesIO
+
+from .cache import CACHE_GROOTTE
+
+# Aantal categorieën waarboven de labels op de x-as schuin komen te staan
+MAX_RECHTE_LABELS = 6
+
+
+def _png(fig, dpi=100):
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi)
+    # Artiesten direct vrijgeven in plaats van te wachten op de garbage collector
+    fig.clear()
+    return buffer.getvalue()
+
+
+def _figure(figsize=(10, 6)):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+# Bij veel vlakken passen de namen niet naast elkaar; dan schuin onder de as
+def _draai_labels(ax, categories):
+    if len(categories) > MAX_RECHTE_LABELS:
+        ax.tick_params(axis='x', labelrotation=45, labelsize=8)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')
+        ax.figure.subplots_adjust(bottom=0.25)
+
+
+# PNG voor het rapport: kosten en besparingen met dubbele y-as; argumenten zijn tuples zodat ze als cachesleutel dienen
+@lru_cache(maxsize=CACHE_GROOTTE)
+def render_cost_savings_chart(categories, costs, savings):
+    fig = _figure()
+    ax1 = fig.subplots()
+
+    # Primaire y-as voor kosten
+    ax1.bar(categories, costs, width=0.35, label="Kosten (€)", color='skyblue', align='center')
+    ax1.set_ylabel('Kosten (€)', color='blue')
+    ax1.set_xlabel('Categorieën')
+    ax1.tick_params(axis='y', labelcolor='blue')
+    _draai_labels(ax1, categories)
+
+    # Secundaire y-as voor besparingen
+    ax2 = ax1.twinx()
+    ax2.bar([i + 0.35 for i in range(len(categories))], savings, width=0.35, label="Besparing (kWh)", color='lightgreen', align='center')
+    ax2.set_ylabel('Besparing (kWh)', color='green')
+    ax2.tick_params(axis='y', labelcolor='green')
+
+    # Titel en legenda
+    ax2.set_title('Kosten en Besparing per Categorie')
+    fig.legend(loc="upper left", bbox_to_anchor=(0.1, 0.9))
+    return _png(fig)
+
+
+# PNG voor het rapport: staafdiagram voor CO2-besparing
+@lru_cache(maxsize=CACHE_GROOTTE)
+def render_co2_chart(categories, co2_savings):
+    fig = _figure()
+    ax = fig.subplots()
+    ax.bar(categories, co2_savings, color='lightcoral')
+    ax.set_title('CO2-besparing per Categorie')
+    ax.set_xlabel('Categorieën')
+    ax.set_ylabel('CO2-besparing (kg)')
+    _draai_labels(ax, categories)
+    return _png(fig)
+
+
+# PNG voor het rapport: per scenario de kosten en de besparing naast elkaar; argumenten zijn tuples
+@lru_cache(maxsize=CACHE_GROOTTE)
+def render_scenario_chart(scenarios, costs, savings):
+    fig = _figure()
+    ax1 = fig.subplots()
+    posities = range(len(scenarios))
+    ax1.bar([i - 0.175 for i in posities], costs, width=0.35, label="Kosten (€)", color='skyblue')
+    ax1.set_ylabel('Kosten (€)', color='blue')
+    ax1.tick_params(axis='y', labelcolor='blue')
+    ax1.set_xticks(list(posities), scenarios)
+    _draai_labels(ax1, scenarios)
+
+    ax2 = ax1.twinx()
+    ax2.bar([i + 0.175 for i in posities], savings, width=0.35, label="Besparing (kWh)", color='lightgreen')
+    ax2.set_ylabel('Besparing (kWh)', color='green')
+    ax2.tick_params(axis='y', labelcolor='green')
+
+    ax2.set_title('Kosten en Besparing per Scenario')
+    fig.legend(loc="upper left", bbox_to_anchor=(0.1, 0.9))
+    return _png(fig)
+
+
+# Resultatentabel (index = categorie) als records voor Vega-Lite; oneindige waarden zijn geen geldige JSON
+def _records(df):
+    import numpy as np
+
+    tabel = df.replace([np.inf, -np.inf], np.nan).rename_axis("Categorie").reset_index()
+    return tabel.astype(object).where(tabel.notna(), None).to_dict("records")
+
+
+# Kosten en besparing per categorie naast elkaar, elk met een eigen y-as zoals in de PDF-grafiek
+def cost_savings_spec(df, cost_column="Kosten (€)", savings_column="Besparing (kWh)"):
+    return {
+        "data": {"values": _records(df)},
+        "title": "Kosten en Besparing per Categorie",
+        "encoding": {
+            "x": {"field": "Categorie", "type": "nominal", "sort": None, "title": "Categorieën", "axis": {"labelAngle": 0 if len(df) <= MAX_RECHTE_LABELS else -45}},
+            "tooltip": [{"field": "Categorie"},
+                        {"field": cost_column, "type": "quantitative", "format": ",.2f"},
+                        {"field": savings_column, "type": "quantitative", "format": ",.2f"}],
+        },
+        "layer": [
+            {"mark": {"type": "bar", "color": "skyblue", "xOffset": -11, "width": 20},
+             "encoding": {"y": {"field": cost_column, "type": "quantitative", "axis": {"titleColor": "blue"}}}},
+            {"mark": {"type": "bar", "color": "lightgreen", "xOffset": 11, "width": 20},
+             "encoding": {"y": {"field": savings_column, "type": "quantitative",
+                                "axis": {"orient": "right", "titleColor": "green"}}}},
+        ],
+        "resolve": {"scale": {"y": "independent"}},
+    }
+
+
+def co2_spec(df, co2_column="CO2-besparing (kg)"):
+    return {
+        "data": {"values": _records(df)},
+        "title": "CO2-besparing per Categorie",
+        "mark": {"type": "bar", "color": "lightcoral"},
+        "encoding": {
+            "x": {"field": "Categorie", "type": "nominal", "sort": None, "title": "Categorieën", "axis": {"labelAngle": 0 if len(df) <= MAX_RECHTE_LABELS else -45}},
+            "y": {"field": co2_column, "type": "quantitative"},
+            "tooltip": [{"field": "Categorie"}, {"field": co2_column, "type": "quantitative", "format": ",.2f"}],
+        },
+    }
+
+
+# Scenario's over elkaar: per categorie een balk per scenario in een eigen kleur; df in lange vorm
+# met de kolommen Scenario en Categorie (scenario.surfaces_frame)
+def scenario_spec(df, column="Besparing (kWh)"):
+    import numpy as np
+
+    tabel = df.replace([np.inf, -np.inf], np.nan)
+    categorieen = list(dict.fromkeys(tabel["Categorie"]))
+    return {
+        "data": {"values": tabel.astype(object).where(tabel.notna(), None).to_dict("records")},
+        "title": f"{column} per Categorie en Scenario",
+        "mark": "bar",
+        "encoding": {
+            "x": {"field": "Categorie", "type": "nominal", "sort": categorieen, "title": "Categorieën",
+                  "axis": {"labelAngle": 0 if len(categorieen) <= MAX_RECHTE_LABELS else -45}},
+            "xOffset": {"field": "Scenario", "type": "nominal", "sort": None},
+            "y": {"field": column, "type": "quantitative"},
+            "color": {"field": "Scenario", "type": "nominal", "sort": None},
+            "tooltip": [{"field": "Scenario"}, {"field": "Categorie"},
+                        {"field": column, "type": "quantitative", "format": ",.2f"}],
+        },
+    }
+
+
+# Tornadodiagram: per parameter een balk van de uitkomst bij lage tot hoge waarde, rond de basis
+def tornado_spec(names, low, high, base, xlabel):
+    rijen = [{"Parameter": naam, "Variant": variant, "Van": base, "Tot": waarde}
+             for naam, laag, hoog in zip(names, low, high)
+             for variant, waarde in (("Laag", laag), ("Hoog", hoog))]
+    return {
+        "data": {"values": rijen},
+        "title": "Gevoeligheid per parameter",
+        "layer": [
+            {"mark": "bar",
+             "encoding": {
+                 "y": {"field": "Parameter", "type": "nominal", "sort": list(names), "title": None},
+                 "x": {"field": "Van", "type": "quantitative", "title": xlabel, "scale": {"zero": False}},
+                 "x2": {"field": "Tot"},
+                 "color": {"field": "Variant", "type": "nominal", "sort": ["Laag", "Hoog"],
+                           "scale": {"domain": ["Laag", "Hoog"], "range": ["skyblue", "lightcoral"]}},
+                 "tooltip": [{"field": "Parameter"}, {"field": "Variant"},
+                             {"field": "Tot", "type": "quantitative", "format": ",.2f", "title": xlabel}],
+             }},
+            {"mark": {"type": "rule", "color": "black"}, "data": {"values": [{"Basis": base}]},
+             "encoding": {"x": {"field": "Basis", "type": "quantitative"}}},
+        ],
+    }
+
+
+# Heatmap van een uitkomst over twee parameters; values heeft rijen (y) en kolommen (x)
+def heatmap_spec(x, y, values, xlabel, ylabel, title):
+    import numpy as np
+
+    waarden = np.asarray(values, dtype=float)
+    xx, yy = np.meshgrid(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    rijen = [{"x": float(a), "y": float(b), "waarde": float(w) if np.isfinite(w) else None}
+             for a, b, w in zip(xx.ravel(), yy.ravel(), waarden.ravel())]
+    return {
+        "data": {"values": rijen},
+        "title": title,
+        "mark": "rect",
+        "encoding": {
+            "x": {"field": "x", "type": "ordinal", "title": xlabel, "axis": {"format": ".2f", "labelOverlap": True}},
+            "y": {"field": "y", "type": "ordinal", "title": ylabel, "sort": "descending",
+                  "axis": {"format": ".2f", "labelOverlap": True}},
+            "color": {"field": "waarde", "type": "quantitative", "title": title, "scale": {"scheme": "viridis"}},
+            "tooltip": [{"field": "x", "format": ".2f", "title": xlabel}, {"field": "y", "format": ".2f", "title": ylabel},
+                        {"field": "waarde", "format": ",.2f", "title": title}],
+        },
+    }
@@ -0,0 +1,124 @@
+# Meerjarige kasstroomprojectie: jaarlijkse besparingen met stijgende energieprijzen, afnemende
+# isolatiewaarde (degradatie), contante waarde (NPV), interne rentabiliteit (IRR) en subsidie die
+# pas na een aantal jaar wordt uitgekeerd. De besparing per jaar is een meetkundige reeks, dus de
+# contante waarde heeft een gesloten vorm en de IRR kan voor alle gebouwen tegelijk met bisectie.
+# De jaren staan steeds op de laatste as: invoer van vorm (gebouwen, vlakken) geeft een
+# kasstroommatrix van vorm (gebouwen, vlakken, jaren + 1).
+import numpy as np
+
+from .berekening import calculate_costs_batch
+
+HORIZON = 30
+
+
+# Groeifactor van de besparing per jaar: prijsstijging maal het deel dat na degradatie overblijft
+def _groei(escalation, degradation):
+    return (1 + np.asarray(escalation, dtype=float)) * (1 - np.asarray(degradation, dtype=float))
+
+
+# Som van x^0 + x^1 + ... + x^(n-1), ook waar x (bijna) 1 is
+def _meetkundige_som(x, n):
+    x = np.asarray(x, dtype=float)
+    een = np.isclose(x, 1.0)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        som = (1 - x ** n) / (1 - x)
+    return np.where(een, float(n), som)
+
+
+# Functie om de nominale kasstromen per jaar te berekenen; jaar 0 is de investering.
+# De subsidie (in euro's) komt binnen in subsidy_year, 0 betekent direct bij de investering.
+def cash_flows(investment, savings_euro, years=HORIZON, escalation=0.0, degradation=0.0,
+               subsidy=0.0, subsidy_year=0):
+    jaren = np.arange(years + 1)
+    investment, savings_euro, groei, subsidy, subsidy_year = (
+        np.asarray(waarde, dtype=float)[..., None]
+        for waarde in (investment, savings_euro, _groei(escalation, degradation), subsidy, subsidy_year)
+    )
+    stromen = np.where(jaren >= 1, savings_euro * groei ** np.maximum(jaren - 1, 0), 0.0)
+    stromen = stromen - investment * (jaren == 0) + subsidy * (jaren == subsidy_year)
+    return stromen
+
+
+# Functie om kasstromen contant te maken met een vaste disconteringsvoet
+def discount(flows, discount_rate):
+    jaren = np.arange(np.shape(flows)[-1])
+    return flows / (1 + np.asarray(discount_rate, dtype=float)[..., None]) ** jaren
+
+
+# Functie om de contante waarde in gesloten vorm te berekenen, zonder de jarenmatrix op te bouwen.
+# Met axis worden de vlakken opgeteld tot een waarde per gebouw.
+def calculate_npv(investment, savings_euro, discount_rate, years=HORIZON, escalation=0.0, degradation=0.0,
+                  subsidy=0.0, subsidy_year=0, axis=None):
+    voet = 1 + np.asarray(discount_rate, dtype=float)
+    q = _groei(escalation, degradation) / voet
+    npv = (np.asarray(savings_euro, dtype=float) / voet * _meetkundige_som(q, years)
+           - np.asarray(investment, dtype=float)
+           + np.asarray(subsidy, dtype=float) / voet ** np.asarray(subsidy_year, dtype=float))
+    return npv if axis is None else npv.sum(axis=axis)
+
+
+# Functie om de IRR te bepalen met bisectie over alle gebouwen tegelijk. Na de investering zijn alle
+# kasstromen positief, dus de NPV daalt met de rente en er is hooguit één nulpunt. Geeft NaN waar de
+# investering binnen de horizon niet terugverdiend wordt of de IRR buiten [lower, upper] ligt.
+def calculate_irr(investment, savings_euro, years=HORIZON, escalation=0.0, degradation=0.0,
+                  subsidy=0.0, subsidy_year=0, axis=None, lower=-0.99, upper=10.0, tol=1e-7):
+    def npv(rente):
+        if axis is not None and np.ndim(rente):
+            rente = np.expand_dims(rente, axis)
+        return calculate_npv(investment, savings_euro, rente, years, escalation, degradation,
+                             subsidy, subsidy_year, axis)
+
+    laag = np.full(np.shape(npv(0.0)), lower)
+    hoog = np.full_like(laag, upper)
+    geldig = (npv(laag) >= 0) & (npv(hoog) <= 0)
+    # Elke stap halveert het interval; het aantal stappen ligt vooraf vast
+    for _ in range(int(np.ceil(np.log2((upper - lower) / tol)))):
+        midden = (laag + hoog) / 2
+        positief = npv(midden) > 0
+        laag = np.where(positief, midden, laag)
+        hoog = np.where(positief, hoog, midden)
+    return np.where(geldig, (laag + hoog) / 2, np.nan)
+
+
+# Functie om de (verdisconteerde) terugverdientijd uit een kasstroommatrix te halen, met lineaire
+# interpolatie binnen het jaar. Oneindig als de cumulatieve kasstroom binnen de horizon negatief blijft.
+def calculate_discounted_payback(flows, discount_rate=0.0):
+    cumulatief = np.cumsum(discount(flows, discount_rate), axis=-1)
+    terug = cumulatief >= 0
+    jaar = np.argmax(terug, axis=-1)
+    gevonden = terug.any(axis=-1)
+
+    vorige = np.take_along_axis(cumulatief, np.maximum(jaar - 1, 0)[..., None], axis=-1)[..., 0]
+    huidige = np.take_along_axis(cumulatief, jaar[..., None], axis=-1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fractie = np.where(jaar > 0, -vorige / (huidige - vorige), 0.0)
+    return np.where(gevonden, np.maximum(jaar - 1, 0) + fractie, np.inf)
+
+
+# Functie om een projectie per vlak en per gebouw te maken vanuit dezelfde invoer als calculate_costs_batch.
+# Invoer van vorm (gebouwen, vlakken); de vlakken staan op de laatste as en worden opgeteld per gebouw.
+def project_buildings(area, current_rc, desired_rc, material_kost, installation_kost, delta_t, energy_kost,
+                      subsidy_percentage, discount_rate=0.04, years=HORIZON, escalation=0.02, degradation=0.0,
+                      subsidy_year=0, hours_per_year=4800, degree_hours=None):
+    result = calculate_costs_batch(area, current_rc, desired_rc, material_kost, installation_kost, delta_t,
+                                   0.0, energy_kost, subsidy_percentage, hours_per_year, degree_hours)
+    savings_euro = result["savings_euro"]
+    investment = np.broadcast_to(
+        (np.asarray(material_kost, dtype=float) + installation_kost) * np.asarray(area, dtype=float),
+        savings_euro.shape)
+    subsidy = investment * np.asarray(subsidy_percentage, dtype=float) / 100
+    instellingen = dict(years=years, escalation=escalation, degradation=degradation,
+                        subsidy=subsidy, subsidy_year=subsidy_year)
+
+    flows = cash_flows(investment, savings_euro, **instellingen)
+    gebouw_flows = flows.sum(axis=-2)
+    return {
+        "flows": flows,
+        "building_flows": gebouw_flows,
+        "npv": calculate_npv(investment, savings_euro, discount_rate, **instellingen),
+        "building_npv": calculate_npv(investment, savings_euro, discount_rate, axis=-1, **instellingen),
+        "irr": calculate_irr(investment, savings_euro, **instellingen),
+        "building_irr": calculate_irr(investment, savings_euro, axis=-1, **instellingen),
+        "discounted_payback": calculate_discounted_payback(flows, discount_rate),
+        "building_discounted_payback": calculate_discounted_payback(gebouw_flows, discount_rate),
+    }
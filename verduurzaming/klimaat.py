@@ -0,0 +1,97 @@
+# Warmteverlies op basis van een klimaatjaar met uurtemperaturen in plaats van een vaste ΔT en
+# een vast aantal stookuren. Het klimaatjaar wordt één keer gesorteerd en gecumuleerd, daarna
+# kost het berekenen van de graaduren voor elke stooktemperatuur alleen een binaire zoekactie:
+#   graaduren(setpoint) = som over uren van max(setpoint - T, 0)
+# zodat een portefeuille net zo snel blijft als met de vaste formule U * A * ΔT * uren.
+import os
+from functools import lru_cache
+from io import BytesIO, StringIO
+
+import numpy as np
+
+# Kolomnamen die als uurtemperatuur worden herkend, met de schaal naar °C
+# (KNMI-uurgegevens geven T in 0,1 °C)
+TEMPERATUUR_KOLOMMEN = {"temperature": 1.0, "temperatuur": 1.0, "T": 0.1}
+
+
+class DegreeHourTable:
+    def __init__(self, temperatures):
+        temperatures = np.asarray(temperatures, dtype=float)
+        temperatures = temperatures[np.isfinite(temperatures)]
+        if temperatures.size == 0:
+            raise ValueError("Klimaatjaar bevat geen temperaturen")
+        self.hours = temperatures.size
+        self._gesorteerd = np.sort(temperatures)
+        self._cumulatief = np.concatenate([[0.0], np.cumsum(self._gesorteerd)])
+
+    # Graaduren (°C·h) onder setpoint; setpoint mag een scalar of array zijn
+    def degree_hours(self, setpoint):
+        setpoint = np.asarray(setpoint, dtype=float)
+        koud = np.searchsorted(self._gesorteerd, setpoint, side='left')
+        return koud * setpoint - self._cumulatief[koud]
+
+    # Gemiddelde ΔT over alle uren, voor vergelijking met de vaste formule
+    def mean_delta_t(self, setpoint):
+        return self.degree_hours(setpoint) / self.hours
+
+
+# Of een veld een getal is; zo is te zien of de eerste regel na het commentaar al gegevens zijn
+def _is_getal(veld):
+    try:
+        float(veld)
+    except ValueError:
+        return False
+    return True
+
+
+# Leest uurtemperaturen uit een CSV (pad of bestand). Regels die met # beginnen, zijn commentaar. In een
+# KNMI-bestand staan de kolomnamen in de laatste commentaarregel ("# STN,YYYYMMDD,   HH, ... T, ...") en begint
+# het bestand daarna direct met gegevens; die regel wordt dan als kop gebruikt.
+def load_hourly_temperatures(source, column=None, scale=None):
+    import pandas as pd
+
+    if hasattr(source, "read"):
+        inhoud = source.read()
+    else:
+        with open(source, "rb") as file:
+            inhoud = file.read()
+    if isinstance(inhoud, bytes):
+        inhoud = inhoud.decode("utf-8", errors="replace")
+    regels = inhoud.splitlines()
+    kop = None
+    begin = 0
+    while begin < len(regels) and (not regels[begin].strip() or regels[begin].lstrip().startswith("#")):
+        if "," in regels[begin]:
+            kop = regels[begin].lstrip().lstrip("#")
+        begin += 1
+    gegevens = StringIO("\n".join(regels[begin:]))
+    if kop is not None and begin < len(regels) and _is_getal(regels[begin].split(",")[0]):
+        df = pd.read_csv(gegevens, header=None, names=[naam.strip() for naam in kop.split(",")],
+                         comment="#", skipinitialspace=True)
+    else:
+        df = pd.read_csv(gegevens, comment="#", skipinitialspace=True)
+    df.columns = [str(naam).strip() for naam in df.columns]
+    if column is None:
+        column = next((naam for naam in TEMPERATUUR_KOLOMMEN if naam in df.columns), None)
+        if column is None:
+            raise ValueError(f"Geen temperatuurkolom gevonden; verwacht een van {', '.join(TEMPERATUUR_KOLOMMEN)}")
+    if scale is None:
+        scale = TEMPERATUUR_KOLOMMEN.get(column, 1.0)
+    return pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float) * scale
+
+
+@lru_cache(maxsize=16)
+def _climate_year(path, mtime, size, column, scale):
+    return DegreeHourTable(load_hourly_temperatures(path, column, scale))
+
+
+# Klimaatjaar uit een bestand, per proces gecached; een gewijzigd bestand wordt opnieuw ingelezen
+def climate_year(path, column=None, scale=None):
+    status = os.stat(path)
+    return _climate_year(os.fspath(path), status.st_mtime_ns, status.st_size, column, scale)
+
+
+# Klimaatjaar uit de inhoud van een geüpload bestand, gecached op die inhoud
+@lru_cache(maxsize=8)
+def climate_year_from_bytes(data, column=None, scale=None):
+    return DegreeHourTable(load_hourly_temperatures(BytesIO(data), column, scale))
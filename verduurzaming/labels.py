@@ -0,0 +1,95 @@
+# Energielabels als gegevens: een gesorteerde lijst bovengrenzen met per label een kleur.
+# Classificeren is een binaire zoekactie (bisect voor één waarde, np.searchsorted voor arrays),
+# en de grenzen komen uit een JSON-bestand, zodat bijvoorbeeld de NTA 8800-grenzen
+# zonder codewijziging kunnen worden ingeladen. Welk bestand dat is, staat in de parametertabel
+# (zie parameters.py); net als die tabel wordt het opnieuw ingelezen als het op schijf verandert.
+import json
+from bisect import bisect_left
+from pathlib import Path
+
+from .parameters import cached_file, default_parameter_table
+
+DEFAULT_LABELS_PATH = Path(__file__).resolve().parent / "data" / "labels.json"
+
+ONBEKENDE_KLEUR = "#FFFFFF"
+
+
+class LabelTable:
+    # labels: van zuinig naar onzuinig; thresholds: de bovengrens per label behalve het laatste
+    def __init__(self, labels, thresholds, colors, version=None):
+        if len(thresholds) != len(labels) - 1:
+            raise ValueError("Er moet precies één grens minder zijn dan er labels zijn")
+        if any(a >= b for a, b in zip(thresholds, thresholds[1:])):
+            raise ValueError("Labelgrenzen moeten strikt oplopen")
+        if len(colors) != len(labels):
+            raise ValueError("Elk label heeft een kleur nodig")
+        self.labels = tuple(labels)
+        self.thresholds = tuple(float(grens) for grens in thresholds)
+        self.colors = tuple(colors)
+        self.version = version
+        self._kleur_per_label = dict(zip(self.labels, self.colors))
+
+    @classmethod
+    def from_dict(cls, data):
+        rijen = data["labels"]
+        if any(rij.get("max") is None for rij in rijen[:-1]):
+            raise ValueError("Alleen het laatste label mag geen bovengrens hebben")
+        return cls([rij["label"] for rij in rijen], [rij["max"] for rij in rijen[:-1]],
+                   [rij.get("color", ONBEKENDE_KLEUR) for rij in rijen], data.get("version"))
+
+    # Label voor één waarde in kWh/m²/jaar. NaN (bijvoorbeeld bij een oppervlakte van 0) krijgt het
+    # onzuinigste label, net als in codes(). Let op: de oorspronkelijke if/elif-keten gaf NaN het zuinigste
+    # label (A+++++); dat is bewust veranderd, omdat een onbekend verbruik geen goed label mag opleveren.
+    def label(self, kwh_per_m2_per_year):
+        if kwh_per_m2_per_year != kwh_per_m2_per_year:
+            return self.labels[-1]
+        return self.labels[bisect_left(self.thresholds, kwh_per_m2_per_year)]
+
+    def color(self, label):
+        return self._kleur_per_label.get(label, ONBEKENDE_KLEUR)
+
+    # Bovengrens (kWh/m²/jaar) die bij een label hoort; oneindig voor het laatste label
+    def upper_bound(self, label):
+        index = self.labels.index(label)
+        return self.thresholds[index] if index < len(self.thresholds) else float("inf")
+
+    # Compacte labelcodes (0 = zuinigste label) voor een array kWh/m²/jaar; NaN krijgt het onzuinigste label
+    def codes(self, kwh_per_m2_per_year):
+        import numpy as np
+        waarden = np.asarray(kwh_per_m2_per_year, dtype=float)
+        codes = np.searchsorted(self.thresholds, waarden, side='left')
+        return np.where(np.isnan(waarden), len(self.thresholds), codes).astype(np.uint8)
+
+    # Codes, labelteksten en kleuren voor een hele array in één keer
+    def classify(self, kwh_per_m2_per_year):
+        import numpy as np
+        codes = self.codes(kwh_per_m2_per_year)
+        return codes, np.array(self.labels)[codes], np.array(self.colors)[codes]
+
+    # Geordende pandas Categorical, bijvoorbeeld als compacte DataFrame-kolom
+    def categorical(self, codes):
+        import pandas as pd
+        return pd.Categorical.from_codes(codes, categories=list(self.labels), ordered=True)
+
+
+def _lees_labeltabel(path):
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    try:
+        return LabelTable.from_dict(data)
+    except (KeyError, ValueError) as fout:
+        raise ValueError(f"{path}: {fout}") from None
+
+
+def load_label_table(path=DEFAULT_LABELS_PATH):
+    return cached_file(path, _lees_labeltabel)
+
+
+# Labeltabel van de parametertabel van dit proces
+def default_label_table():
+    return default_parameter_table().labels
+
+
+# Codes, labels en kleuren voor een array kWh/m²/jaar, met de standaardtabel of een eigen tabel
+def classify_energy_labels(kwh_per_m2_per_year, table=None):
+    return (table or default_label_table()).classify(kwh_per_m2_per_year)
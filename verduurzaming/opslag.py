@@ -0,0 +1,209 @@
+# Opslag van berekeningen in een lokale SQLite-database. Schrijven gebeurt op een eigen thread:
+# save() zet een record in een wachtrij en keert direct terug, de schrijver bundelt records tot
+# één transactie. Lezen kan tegelijk dankzij WAL-modus.
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calculations (
+    id INTEGER PRIMARY KEY,
+    building_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    energy_label TEXT,
+    cost REAL,
+    savings REAL,
+    co2_savings REAL,
+    payback REAL,
+    total_savings_euro REAL,
+    total_kwh_per_m2_per_year REAL,
+    inputs TEXT NOT NULL,
+    parameter_version TEXT
+);
+CREATE TABLE IF NOT EXISTS surfaces (
+    calculation_id INTEGER NOT NULL REFERENCES calculations(id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    cost REAL,
+    saved_kWh REAL,
+    co2_savings REAL,
+    payback_time REAL,
+    savings_euro REAL
+);
+CREATE INDEX IF NOT EXISTS idx_calculations_building ON calculations(building_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_calculations_label ON calculations(energy_label);
+CREATE INDEX IF NOT EXISTS idx_calculations_created ON calculations(created_at);
+CREATE INDEX IF NOT EXISTS idx_surfaces_calculation ON surfaces(calculation_id);
+"""
+
+TOTAAL_KOLOMMEN = ("cost", "savings", "co2_savings", "payback", "total_savings_euro", "total_kwh_per_m2_per_year")
+GROEPEN = {"energy_label": "energy_label", "building_id": "building_id", "day": "substr(created_at, 1, 10)"}
+
+log = logging.getLogger(__name__)
+
+
+def _verbind(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+# Waarden van numpy (np.float32, np.int64, arrays) in de invoer als gewone JSON-getallen en -lijsten
+def _json_waarde(waarde):
+    if hasattr(waarde, "tolist"):
+        return waarde.tolist()
+    raise TypeError(f"{type(waarde).__name__} kan niet als JSON worden opgeslagen")
+
+
+# Record voor save(): data zoals in de app (categorie -> (kosten, besparing, co2, terugverdientijd, euro)),
+# totals zoals in de app en de invoer als dict met JSON-waarden. parameter_version is de versie van de
+# parametertabel waarmee gerekend is, standaard die van dit proces.
+def make_record(building_id, inputs, data, totals, created_at=None, parameter_version=None):
+    if parameter_version is None:
+        from .parameters import default_parameter_table
+        parameter_version = default_parameter_table().table_version
+    return {
+        "building_id": str(building_id),
+        "created_at": created_at or datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "parameter_version": parameter_version,
+        "inputs": inputs,
+        "data": {categorie: tuple(float(w) for w in waarden) for categorie, waarden in data.items()},
+        "totals": {
+            **{kolom: None if totals.get(kolom) is None else float(totals[kolom]) for kolom in TOTAAL_KOLOMMEN},
+            "energy_label": None if totals.get("energy_label") is None else str(totals["energy_label"]),
+        },
+    }
+
+
+class ResultStore:
+    def __init__(self, path, batch_size=500, flush_interval=0.5):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        with _verbind(self.path) as conn:
+            conn.executescript(SCHEMA)
+            # Databases van voor de parametertabellen missen de kolom met de versie
+            if "parameter_version" not in {rij[1] for rij in conn.execute("PRAGMA table_info(calculations)")}:
+                conn.execute("ALTER TABLE calculations ADD COLUMN parameter_version TEXT")
+        self._lezer = _verbind(self.path)
+        self._lees_lock = threading.Lock()
+        self._wachtrij = queue.Queue()
+        self._schrijver = threading.Thread(target=self._schrijf_lus, name="verduurzaming-opslag", daemon=True)
+        self._schrijver.start()
+        atexit.register(self.close)
+
+    # Zet een record (zie make_record) in de wachtrij; blokkeert niet
+    def save(self, record):
+        self._wachtrij.put(record)
+
+    def save_many(self, records):
+        for record in records:
+            self._wachtrij.put(record)
+
+    # Wacht tot alle records in de wachtrij zijn weggeschreven
+    def flush(self):
+        self._wachtrij.join()
+
+    def close(self):
+        if self._schrijver.is_alive():
+            self._wachtrij.put(None)
+            self._schrijver.join()
+        self._lezer.close()
+
+    def _schrijf_lus(self):
+        conn = _verbind(self.path)
+        stoppen = False
+        while not stoppen:
+            record = self._wachtrij.get()
+            bundel = [record]
+            # Verzamel wat er nog meer klaarstaat, tot batch_size of tot het interval verstreken is
+            while len(bundel) < self.batch_size:
+                try:
+                    bundel.append(self._wachtrij.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    break
+            if None in bundel:
+                stoppen = True
+            records = [r for r in bundel if r is not None]
+            try:
+                if records:
+                    self._schrijf_bundel(conn, records)
+            except Exception:
+                log.exception("Opslaan van %d berekeningen mislukt", len(records))
+            finally:
+                for _ in bundel:
+                    self._wachtrij.task_done()
+        conn.close()
+
+    # Een fout in de bundel rolt alleen die transactie terug; daarna wordt elk record apart geschreven,
+    # zodat alleen een onbruikbaar record verloren gaat en de schrijver blijft draaien
+    def _schrijf_bundel(self, conn, records):
+        try:
+            self._schrijf(conn, records)
+        except Exception:
+            if len(records) == 1:
+                raise
+            for record in records:
+                try:
+                    self._schrijf(conn, [record])
+                except Exception:
+                    log.exception("Berekening van gebouw %r niet opgeslagen", record.get("building_id"))
+
+    @staticmethod
+    def _schrijf(conn, records):
+        with conn:
+            for record in records:
+                totals = record["totals"]
+                cursor = conn.execute(
+                    "INSERT INTO calculations (building_id, created_at, energy_label, cost, savings, co2_savings,"
+                    " payback, total_savings_euro, total_kwh_per_m2_per_year, inputs, parameter_version)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (record["building_id"], record["created_at"], totals["energy_label"],
+                     *(totals[kolom] for kolom in TOTAAL_KOLOMMEN), json.dumps(record["inputs"], default=_json_waarde),
+                     record.get("parameter_version")))
+                conn.executemany(
+                    "INSERT INTO surfaces (calculation_id, category, cost, saved_kWh, co2_savings, payback_time,"
+                    " savings_euro) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, categorie, *waarden) for categorie, waarden in record["data"].items()])
+
+    def _query(self, sql, params=()):
+        with self._lees_lock:
+            cursor = self._lezer.execute(sql, params)
+            kolommen = [beschrijving[0] for beschrijving in cursor.description]
+            return [dict(zip(kolommen, rij)) for rij in cursor.fetchall()]
+
+    # Eerdere berekeningen van een gebouw, nieuwste eerst, met de invoer als dict
+    def history(self, building_id, limit=20):
+        rijen = self._query("SELECT * FROM calculations WHERE building_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+                            (str(building_id), limit))
+        for rij in rijen:
+            rij["inputs"] = json.loads(rij["inputs"])
+        return rijen
+
+    def latest(self, building_id):
+        rijen = self.history(building_id, limit=1)
+        return rijen[0] if rijen else None
+
+    def surfaces(self, calculation_id):
+        return self._query("SELECT * FROM surfaces WHERE calculation_id = ?", (calculation_id,))
+
+    # Totalen over alle opgeslagen berekeningen, gegroepeerd op energy_label, building_id of day.
+    # Met latest_only telt per gebouw alleen de nieuwste berekening mee.
+    def aggregate(self, group_by="energy_label", since=None, latest_only=True):
+        if group_by not in GROEPEN:
+            raise ValueError(f"Onbekende groepering {group_by!r}, kies uit {', '.join(GROEPEN)}")
+        voorwaarden, params = [], []
+        if since is not None:
+            voorwaarden.append("created_at >= ?")
+            params.append(since)
+        if latest_only:
+            voorwaarden.append("id IN (SELECT max(id) FROM calculations GROUP BY building_id)")
+        waar = f"WHERE {' AND '.join(voorwaarden)}" if voorwaarden else ""
+        return self._query(
+            f"SELECT {GROEPEN[group_by]} AS groep, count(*) AS calculations, sum(cost) AS cost, sum(savings) AS savings,"
+            f" sum(co2_savings) AS co2_savings, sum(total_savings_euro) AS total_savings_euro"
+            f" FROM calculations {waar} GROUP BY groep ORDER BY groep", params)
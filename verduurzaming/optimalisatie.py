@@ -0,0 +1,326 @@
+# Optimalisatie van maatregelpakketten: per vlak één RC-niveau (of niets doen) kiezen zodat
+# binnen een budget zoveel mogelijk kWh of CO2 wordt bespaard, of een doellabel tegen minimale
+# kosten wordt gehaald. Dit is een knapzakprobleem met meerdere keuzes; het wordt per gebouw
+# opgelost met dynamisch programmeren over een budgetraster, gevectoriseerd over alle gebouwen.
+import numpy as np
+
+from .berekening import calculate_costs_batch, calculate_energy_labels
+from .labels import default_label_table
+
+DOELEN = {"kwh": "saved_kWh", "co2": "co2_savings", "euro": "savings_euro"}
+
+
+# Kosten- en besparingstabellen voor alle opties, vorm (gebouwen, vlakken, opties + 1).
+# Optie 0 is "niets doen" met de huidige RC; rc_options en kost_per_m2 (materiaal + installatie)
+# hebben vorm (opties,), (vlakken, opties) of (gebouwen, vlakken, opties).
+# Opties die de RC niet verbeteren krijgen oneindige kosten en worden dus nooit gekozen.
+def option_tables(area, current_rc, rc_options, kost_per_m2, delta_t, emissie_per_kwh, energy_kost,
+                  subsidy_percentage, hours_per_year=4800):
+    area = np.atleast_2d(np.asarray(area, dtype=float))
+    current_rc = np.broadcast_to(np.asarray(current_rc, dtype=float), area.shape)
+    rc_options = np.asarray(rc_options, dtype=float)
+    kost_per_m2 = np.asarray(kost_per_m2, dtype=float)
+
+    result = calculate_costs_batch(area[..., None], current_rc[..., None], rc_options, kost_per_m2, 0.0,
+                                   delta_t, emissie_per_kwh, energy_kost, subsidy_percentage, hours_per_year)
+    vorm = np.broadcast_shapes(result["saved_kWh"].shape, result["total_kost_with"].shape)
+    niets = np.zeros(area.shape + (1,))
+
+    def met_niets(waarden, nul=niets):
+        return np.concatenate([nul, np.broadcast_to(waarden, vorm)], axis=-1)
+
+    current_kWh = area * (np.asarray(delta_t, dtype=float) * hours_per_year / 1000) / current_rc
+    cost = met_niets(result["total_kost_with"])
+    cost[..., 1:][~(np.broadcast_to(rc_options, vorm) > current_rc[..., None])] = np.inf
+
+    return {
+        "area": area,
+        "current_kWh": current_kWh,
+        "rc": met_niets(np.broadcast_to(rc_options, vorm), current_rc[..., None]),
+        "cost": cost,
+        "saved_kWh": met_niets(result["saved_kWh"]),
+        "co2_savings": met_niets(result["co2_savings"]),
+        "savings_euro": met_niets(result["savings_euro"]),
+    }
+
+
+# Dynamisch programmeren over het budgetraster. Geeft de beste waarde per budgetstap,
+# vorm (gebouwen, stappen + 1), en de gekozen optie per vlak en budgetstap.
+def _knapzak(kosten_stappen, waarde, stappen):
+    gebouwen, vlakken, opties = kosten_stappen.shape
+    rijen = np.arange(gebouwen)
+    breedte = stappen + 1
+    beste = np.zeros((gebouwen, breedte))
+    keuze = np.zeros((vlakken, gebouwen, breedte), dtype=np.int16)
+    # Verschuivingen groter dan het budget vallen altijd in de -inf aanvulling
+    verschuiving = breedte - np.minimum(kosten_stappen, breedte)
+
+    for j in range(vlakken):
+        # Links aangevuld met -inf: rij r verschoven over c stappen is het venster dat begint op breedte - c
+        aangevuld = np.concatenate([np.full((gebouwen, breedte), -np.inf), beste], axis=1)
+        vensters = np.lib.stride_tricks.sliding_window_view(aangevuld, breedte, axis=1)
+        nieuw = np.full_like(beste, -np.inf)
+        for o in range(opties):
+            kandidaat = vensters[rijen, verschuiving[:, j, o]] + waarde[:, j, o][:, None]
+            beter = kandidaat > nieuw
+            np.copyto(nieuw, kandidaat, where=beter)
+            np.copyto(keuze[j], o, where=beter)
+        beste = nieuw
+    return beste, keuze
+
+
+# Loopt de keuzes terug vanaf budgetstap start (per gebouw) en geeft de optie per vlak
+def _terugloop(keuze, kosten_stappen, start):
+    vlakken, gebouwen, _ = keuze.shape
+    rijen = np.arange(gebouwen)
+    stap = start.copy()
+    gekozen = np.zeros((gebouwen, vlakken), dtype=int)
+    for j in range(vlakken - 1, -1, -1):
+        gekozen[:, j] = keuze[j, rijen, stap]
+        stap = stap - kosten_stappen[rijen, j, gekozen[:, j]]
+    return gekozen
+
+
+def _kostenraster(cost, step):
+    # Naar boven afronden, zodat een gekozen pakket het budget nooit overschrijdt
+    eindig = np.isfinite(cost)
+    stappen = np.where(eindig, np.ceil(np.where(eindig, cost, 0) / step - 1e-9), np.iinfo(np.int32).max // 2)
+    return stappen.astype(np.int64)
+
+
+def _pakket(tables, gekozen):
+    rijen = np.arange(gekozen.shape[0])[:, None]
+    vlakken = np.arange(gekozen.shape[1])[None, :]
+    pakket = {"choice": gekozen, "rc": tables["rc"][rijen, vlakken, gekozen]}
+    for sleutel in ("cost", "saved_kWh", "co2_savings", "savings_euro"):
+        pakket[sleutel] = tables[sleutel][rijen, vlakken, gekozen].sum(axis=1)
+    desired_kWh = tables["current_kWh"].sum(axis=1) - pakket["saved_kWh"]
+    pakket["total_kwh_per_m2_per_year"] = desired_kWh / tables["area"].sum(axis=1)
+    pakket["energy_label"] = calculate_energy_labels(pakket["total_kwh_per_m2_per_year"])
+    return pakket
+
+
+# Beste pakket per gebouw binnen budget (scalar of per gebouw), voor doel "kwh", "co2" of "euro".
+# step is de grootte van een budgetstap in euro; standaard wordt het budget in resolution stappen verdeeld.
+# Kosten worden naar boven afgerond op een stap, dus een fijner raster geeft een iets beter pakket.
+def optimize_package(tables, budget, objective="kwh", step=None, resolution=250):
+    if objective not in DOELEN:
+        raise ValueError(f"Onbekend doel {objective!r}, kies uit {', '.join(DOELEN)}")
+    gebouwen = tables["cost"].shape[0]
+    budget = np.broadcast_to(np.asarray(budget, dtype=float), (gebouwen,))
+    if step is None:
+        step = max(float(budget.max()), 1.0) / resolution
+
+    kosten_stappen = _kostenraster(tables["cost"], step)
+    stappen = int(np.floor(budget.max() / step))
+    beste, keuze = _knapzak(kosten_stappen, tables[DOELEN[objective]], stappen)
+
+    start = np.floor(budget / step + 1e-9).astype(np.int64)
+    gekozen = _terugloop(keuze, kosten_stappen, start)
+    return _pakket(tables, gekozen)
+
+
+# Goedkoopste pakket per gebouw waarmee target_label (of beter) wordt gehaald.
+# feasible is False voor gebouwen waar ook alle maatregelen samen niet genoeg zijn.
+def cheapest_package_for_label(tables, target_label, resolution=250):
+    if target_label not in default_label_table().labels:
+        raise ValueError(f"Onbekend energielabel {target_label!r}")
+    grens = default_label_table().upper_bound(target_label)
+
+    # Benodigde besparing: huidig verbruik min het maximum dat bij het label hoort
+    nodig = tables["current_kWh"].sum(axis=1) - grens * tables["area"].sum(axis=1)
+
+    eindig = np.where(np.isfinite(tables["cost"]), tables["cost"], 0)
+    maximaal = eindig.max(axis=2).sum(axis=1)
+    step = max(float(maximaal.max()), 1.0) / resolution
+    kosten_stappen = _kostenraster(tables["cost"], step)
+    stappen = int(np.where(np.isfinite(tables["cost"]), kosten_stappen, 0).max(axis=2).sum(axis=1).max())
+    beste, keuze = _knapzak(kosten_stappen, tables["saved_kWh"], stappen)
+
+    # Eerste budgetstap waarop de besparing voldoende is; beste is niet-dalend in het budget
+    voldoende = beste >= nodig[:, None] - 1e-9
+    feasible = voldoende.any(axis=1)
+    start = np.where(feasible, voldoende.argmax(axis=1), stappen)
+
+    pakket = _pakket(tables, _terugloop(keuze, kosten_stappen, start))
+    pakket["feasible"] = feasible
+    return pakket
+
+
+# Pareto-front van kosten tegen besparing per gebouw: voor elke budgetstap de hoogste besparing.
+# Geeft het budgetraster (euro) en de besparing per gebouw, vorm (gebouwen, stappen + 1).
+def pareto_frontier(tables, max_budget, objective="kwh", resolution=200):
+    step = max(float(max_budget), 1.0) / resolution
+    beste, _ = _knapzak(_kostenraster(tables["cost"], step), tables[DOELEN[objective]], resolution)
+    return np.arange(resolution + 1) * step, beste
+
+
+# Doellabel met continue RC-waarden. Per vlak kost isoleren tot RC R: A * (c * R + installatie) na subsidie,
+# met c de materiaalkosten per m² per RC-eenheid, en het verlies is A * k / R (k = graaduren / 1000).
+# Ligt vast welke vlakken worden geïsoleerd, dan is de beste R bij een prijs λ per kWh verlies sqrt(λ * k / c),
+# begrensd op [huidige RC, max_rc]. Met s = 1 / sqrt(λ) is het verlies van elk vlak clip(A * sqrt(k * c) * s),
+# stuksgewijs lineair en stijgend in s, dus de s waarbij het label precies wordt gehaald volgt exact uit de
+# gesorteerde knikpunten in plaats van uit een zoektocht over een raster. Door de vaste installatiekosten is
+# de keuze welke vlakken worden aangepakt niet convex: tot MAX_EXACT_VLAKKEN vlakken worden alle keuzes
+# doorgerekend, daarboven wordt lokaal gezocht (telkens één vlak omzetten) vanuit twee startpunten.
+MAX_EXACT_VLAKKEN = 12
+
+# Bisectiestappen voor de prijs λ van het startpunt bij veel vlakken
+LAGRANGE_STAPPEN = 48
+
+# Aantal array-elementen per blok gebouwen bij het doorrekenen van alle kandidaatkeuzes
+BLOK_ELEMENTEN = 2 ** 22
+
+
+def _rc_bij_prijs(prijs, c, k, current_rc, max_rc):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.clip(np.sqrt(prijs[..., None] * k / c), current_rc, max_rc)
+
+
+# RC-waarden en kosten (zonder subsidie) als vast ligt welke vlakken worden geïsoleerd, voor
+# (..., vlakken)-arrays; oneindige kosten als die vlakken samen het doel niet halen
+def _vaste_keuze(actief, area, c, installatie, k, current_rc, max_rc, doel):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        helling = np.where(actief, area * np.sqrt(k * c), 0.0)
+        hoog = area * k / current_rc
+        laag = np.where(actief, area * k / max_rc, hoog)
+        knikt = helling > 0
+        posities = np.concatenate([np.where(knikt, laag / helling, 0.0), np.where(knikt, hoog / helling, 0.0)], axis=-1)
+    # Verlies in elk knikpunt: in het eerste knikpunt van een vlak gaat zijn bijdrage van vast (laag) naar
+    # helling * s, in het tweede naar vast (hoog); daartussen is het totaal lineair
+    volgorde = np.argsort(posities, axis=-1)
+    knikken = np.take_along_axis(posities, volgorde, axis=-1)
+    vast = np.take_along_axis(np.concatenate([np.where(knikt, -laag, 0.0), np.where(knikt, hoog, 0.0)], axis=-1),
+                              volgorde, axis=-1)
+    stijging = np.take_along_axis(np.concatenate([helling, -helling], axis=-1), volgorde, axis=-1)
+    verlies = laag.sum(axis=-1)[..., None] + np.cumsum(vast, axis=-1) + np.cumsum(stijging, axis=-1) * knikken
+
+    gehaald = (verlies <= doel[..., None]).sum(axis=-1)
+    j = np.clip(gehaald, 1, knikken.shape[-1] - 1)[..., None]
+    s0, s1 = np.take_along_axis(knikken, j - 1, axis=-1)[..., 0], np.take_along_axis(knikken, j, axis=-1)[..., 0]
+    v0, v1 = np.take_along_axis(verlies, j - 1, axis=-1)[..., 0], np.take_along_axis(verlies, j, axis=-1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(gehaald == knikken.shape[-1], knikken[..., -1], s0 + (doel - v0) * (s1 - s0) / (v1 - v0))
+        rc = np.where(actief, np.clip(np.sqrt(k / c) / s[..., None], current_rc, max_rc), current_rc)
+
+    kosten = np.where(actief, area * (c * rc + installatie), 0.0).sum(axis=-1)
+    return rc, np.where(gehaald > 0, kosten, np.inf)
+
+
+# Goedkoopste van een reeks kandidaatkeuzes per gebouw, kandidaten met vorm (gebouwen, kandidaten, vlakken)
+def _beste_keuze(kandidaten, invoer):
+    rc, kosten = _vaste_keuze(kandidaten, *(waarden[:, None] for waarden in invoer))
+    beste = kosten.argmin(axis=1)
+    rijen = np.arange(len(beste))
+    return kandidaten[rijen, beste], rc[rijen, beste], kosten[rijen, beste]
+
+
+# Lokaal zoeken: alle keuzes die in één vlak verschillen doorrekenen en de beste nemen, tot er niets meer verbetert
+def _lokaal_zoeken(actief, invoer, kan):
+    eenheid = np.eye(actief.shape[1], dtype=bool)
+    rc, kosten = _vaste_keuze(actief, *invoer)
+    for _ in range(actief.shape[1]):
+        omgezet, rc_omgezet, kosten_omgezet = _beste_keuze((actief[:, None, :] ^ eenheid) & kan[:, None, :],
+                                                           invoer)
+        beter = kosten_omgezet < kosten * (1 - 1e-9)
+        if not beter.any():
+            break
+        actief = np.where(beter[:, None], omgezet, actief)
+        rc = np.where(beter[:, None], rc_omgezet, rc)
+        kosten = np.where(beter, kosten_omgezet, kosten)
+    return actief, rc, kosten
+
+
+# Beste keuze voor een blok gebouwen
+def _label_blok(area, c, installatie, k, current_rc, max_rc, doel):
+    vlakken = area.shape[1]
+    kan = max_rc > current_rc
+    invoer = (area, c, installatie, k, current_rc, max_rc, doel)
+
+    if vlakken <= MAX_EXACT_VLAKKEN:
+        keuzes = (np.arange(2 ** vlakken)[:, None] >> np.arange(vlakken)) & 1 == 1
+        return _beste_keuze(keuzes[None] & kan[:, None, :], invoer)
+
+    # Startpunt 1: bij een prijs λ isoleert elk vlak waarvoor kosten plus beprijsd verlies lager zijn dan bij niets
+    # doen; het verlies daalt in λ, dus de kleinste λ die het label haalt volgt uit (meetkundige) bisectie
+    def lagrange(prijs):
+        rc = _rc_bij_prijs(prijs, c, k, current_rc, max_rc)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return kan & (c * rc + installatie + prijs[:, None] * k / rc < prijs[:, None] * k / current_rc)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        grens = np.maximum(c * max_rc ** 2 / k, (c * max_rc + installatie) / (k * (1 / current_rc - 1 / max_rc)))
+    hoog = np.maximum(np.where(kan & np.isfinite(grens), grens, 0.0).max(axis=1), 1e-12) * 2
+    laag = hoog * 1e-15
+    for _ in range(LAGRANGE_STAPPEN):
+        midden = np.sqrt(laag * hoog)
+        rc = np.where(lagrange(midden), _rc_bij_prijs(midden, c, k, current_rc, max_rc), current_rc)
+        haalt = (area * k / rc).sum(axis=1) <= doel
+        hoog = np.where(haalt, midden, hoog)
+        laag = np.where(haalt, laag, midden)
+
+    # Startpunt 2: alle vlakken die kunnen verbeteren
+    uitkomsten = [_lokaal_zoeken(start, invoer, kan) for start in (lagrange(hoog), kan)]
+    beste = uitkomsten[1][2] < uitkomsten[0][2]
+    return tuple(np.where(beste.reshape(-1, *[1] * (a.ndim - 1)), b, a) for a, b in zip(*uitkomsten))
+
+
+# Goedkoopste continue RC-waarden per vlak waarmee target_label (of beter) wordt gehaald, voor
+# (gebouwen, vlakken)-matrices zoals in option_tables; lege vlakken in een korte rij mogen oppervlakte 0 hebben.
+# material_kost_per_rc is de materiaalprijs per m² per RC-eenheid, in de app materiaalkosten / gewenste RC.
+# Installatiekosten tellen alleen voor vlakken die worden geïsoleerd (raised). feasible is False als ook
+# max_rc op alle vlakken niet genoeg is; rc is dan max_rc waar dat een verbetering is.
+def rc_for_label(area, current_rc, material_kost_per_rc, installation_kost, target_label, delta_t, emissie_per_kwh,
+                 energy_kost, subsidy_percentage, hours_per_year=4800, degree_hours=None, max_rc=10.0):
+    if target_label not in default_label_table().labels:
+        raise ValueError(f"Onbekend energielabel {target_label!r}")
+    area = np.atleast_2d(np.asarray(area, dtype=float))
+    gebouwen, vlakken = vorm = area.shape
+    current_rc = np.broadcast_to(np.asarray(current_rc, dtype=float), vorm)
+    c = np.broadcast_to(np.asarray(material_kost_per_rc, dtype=float), vorm)
+    installatie = np.broadcast_to(np.asarray(installation_kost, dtype=float), vorm)
+    if degree_hours is None:
+        degree_hours = np.asarray(delta_t, dtype=float) * hours_per_year
+    k = np.broadcast_to(np.asarray(degree_hours, dtype=float) / 1000, vorm)
+    max_rc = np.maximum(np.broadcast_to(np.asarray(max_rc, dtype=float), vorm), current_rc)
+
+    # Toegestaan verlies per gebouw, met een kleine marge tegen afronding bij de labelgrens
+    doel = default_label_table().upper_bound(target_label) * area.sum(axis=1) * (1 - 1e-9)
+    feasible = (area * k / max_rc).sum(axis=1) <= doel
+
+    # In blokken gebouwen, zodat de kandidaatkeuzes per blok in het geheugen passen
+    kandidaten = 2 ** vlakken if vlakken <= MAX_EXACT_VLAKKEN else vlakken
+    blok = max(1, BLOK_ELEMENTEN // (kandidaten * 2 * max(vlakken, 1)))
+    actief = np.zeros(vorm, dtype=bool)
+    rc = current_rc.copy()
+    for start in range(0, gebouwen, blok):
+        rijen = slice(start, start + blok)
+        actief[rijen], rc[rijen], _ = _label_blok(area[rijen], c[rijen], installatie[rijen], k[rijen],
+                                                  current_rc[rijen], max_rc[rijen], doel[rijen])
+
+    # Niet haalbaar: zo ver mogelijk
+    actief = np.where(feasible[:, None], actief, max_rc > current_rc)
+    rc = np.where(feasible[:, None], rc, max_rc)
+
+    result = calculate_costs_batch(area, current_rc, rc, c * rc, installatie, delta_t, emissie_per_kwh, energy_kost,
+                                   subsidy_percentage, hours_per_year, degree_hours)
+    pakket = {"rc": rc, "raised": actief}
+    for sleutel, kolom in (("cost", "total_kost_with"), ("saved_kWh", "saved_kWh"), ("co2_savings", "co2_savings"),
+                           ("savings_euro", "savings_euro")):
+        pakket[sleutel] = np.where(actief, result[kolom], 0.0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pakket["total_kwh_per_m2_per_year"] = (area * k / rc).sum(axis=1) / area.sum(axis=1)
+    pakket["energy_label"] = calculate_energy_labels(pakket["total_kwh_per_m2_per_year"])
+    pakket["feasible"] = feasible
+    return pakket
+
+
+# Doellabel met een catalogus van isolatieproducten: per vlak één van rc_options met kost_per_m2 (zie
+# option_tables), opgelost met cheapest_package_for_label. Zelfde uitkomst-sleutels als rc_for_label.
+def catalogue_rc_for_label(area, current_rc, rc_options, kost_per_m2, target_label, delta_t, emissie_per_kwh,
+                           energy_kost, subsidy_percentage, hours_per_year=4800, resolution=250):
+    tables = option_tables(area, current_rc, rc_options, kost_per_m2, delta_t, emissie_per_kwh, energy_kost,
+                           subsidy_percentage, hours_per_year)
+    pakket = cheapest_package_for_label(tables, target_label, resolution)
+    pakket["raised"] = pakket["choice"] > 0
+    return pakket
@@ -0,0 +1,160 @@
+# Parametertabellen als gegevens: CO2-emissie per type verwarming, stookuren per jaar, standaardwaarden van de
+# algemene invoer en de vlakken waarmee de app begint, in data/parameters.json. De energielabels staan in het
+# bestand waar parameters.json naar verwijst (standaard data/labels.json). Elk bestand heeft een versie; de
+# combinatie (table_version) komt bij de uitkomsten, zodat een portefeuille later met precies dezelfde tabellen
+# opnieuw kan worden doorgerekend (VERDUURZAMING_PARAMETERS of --parameters met het oude bestand).
+#
+# Een bestand wordt één keer per proces ingelezen en gecontroleerd. Verandert het op schijf (wijzigtijd of
+# grootte), dan wordt het bij het volgende gebruik opnieuw ingelezen; dat wordt hooguit eens per
+# CONTROLE_INTERVAL seconden nagekeken, zodat het opvragen van een tabel vrijwel niets kost.
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_PARAMETERS_PATH = Path(__file__).resolve().parent / "data" / "parameters.json"
+
+# Seconden tussen twee controles of een bestand op schijf veranderd is; 0 controleert bij elk gebruik
+CONTROLE_INTERVAL = float(os.environ.get("VERDUURZAMING_PARAMETER_CONTROLE", "1"))
+
+VLAK_VELDEN = ("area", "current_rc", "desired_rc", "material_kost", "installation_kost")
+
+# Ingelezen bestanden: (pad, lezer) -> (tijdstip van de laatste controle, (wijzigtijd, grootte), waarde)
+_BESTANDEN = {}
+_LOCK = threading.RLock()
+
+
+# lees(pad) voor een bestand, onthouden zolang het bestand op schijf niet verandert
+def cached_file(path, lees):
+    sleutel = (path, lees)
+    nu = time.monotonic()
+    item = _BESTANDEN.get(sleutel)
+    if item is not None and nu - item[0] < CONTROLE_INTERVAL:
+        return item[2]
+
+    status = os.stat(path)
+    kenmerk = (status.st_mtime_ns, status.st_size)
+    with _LOCK:
+        item = _BESTANDEN.get(sleutel)
+        waarde = item[2] if item is not None and item[1] == kenmerk else lees(path)
+        _BESTANDEN[sleutel] = (nu, kenmerk, waarde)
+    return waarde
+
+
+def _getal(waarde, naam, minimum=0.0, maximum=math.inf, groter=False):
+    if isinstance(waarde, bool) or not isinstance(waarde, (int, float)) or not math.isfinite(waarde):
+        raise ValueError(f"{naam} moet een getal zijn")
+    if waarde < minimum or (groter and waarde == minimum) or waarde > maximum:
+        raise ValueError(f"{naam} moet {'groter dan' if groter else 'minimaal'} {minimum:g}"
+                         f"{f' en hooguit {maximum:g}' if math.isfinite(maximum) else ''} zijn")
+    return float(waarde)
+
+
+class ParameterTable:
+    # emission: type verwarming -> kg CO2 per kWh; defaults: delta_t, energy_kost, subsidy_percentage en heating_type;
+    # surfaces: lijst van (naam, area, current_rc, desired_rc, material_kost, installation_kost)
+    def __init__(self, version, emission, hours_per_year, defaults, surfaces, labels_path):
+        if not isinstance(version, str) or not version:
+            raise ValueError("Een parametertabel heeft een versie nodig")
+        if not emission:
+            raise ValueError("Er moet minimaal één type verwarming zijn")
+        self.version = version
+        self.emission = {str(naam): _getal(factor, f"Emissie van {naam}") for naam, factor in emission.items()}
+        self.hours_per_year = _getal(hours_per_year, "hours_per_year", 0, 8784, groter=True)
+        self.defaults = {
+            "delta_t": _getal(defaults.get("delta_t"), "delta_t", 0, groter=True),
+            "energy_kost": _getal(defaults.get("energy_kost"), "energy_kost"),
+            "subsidy_percentage": _getal(defaults.get("subsidy_percentage"), "subsidy_percentage", 0, 100),
+            "heating_type": defaults.get("heating_type"),
+        }
+        if self.defaults["heating_type"] not in self.emission:
+            raise ValueError(f"Standaard verwarming {self.defaults['heating_type']!r} staat niet bij emission")
+        if not surfaces:
+            raise ValueError("Er moet minimaal één standaardvlak zijn")
+        self.surfaces = [
+            (str(naam), *(_getal(waarde, f"{veld} van {naam}", 0, groter=not veld.endswith("kost"))
+                          for veld, waarde in zip(VLAK_VELDEN, waarden)))
+            for naam, *waarden in surfaces
+        ]
+        from .labels import load_label_table
+
+        self.labels_path = Path(labels_path)
+        self._laad_labels = load_label_table
+        # Controleert meteen ook het gekoppelde labelbestand
+        self._laad_labels(self.labels_path)
+
+    @classmethod
+    def from_dict(cls, data, directory="."):
+        ontbrekend = [sleutel for sleutel in ("version", "labels", "emission", "hours_per_year", "defaults", "surfaces")
+                      if sleutel not in data]
+        if ontbrekend:
+            raise ValueError(f"Ontbrekende sleutels: {', '.join(ontbrekend)}")
+        vlakken = []
+        for i, vlak in enumerate(data["surfaces"]):
+            ontbrekend = [veld for veld in ("name", *VLAK_VELDEN) if veld not in vlak]
+            if ontbrekend:
+                raise ValueError(f"Vlak {i}: ontbrekende velden {', '.join(ontbrekend)}")
+            vlakken.append((vlak["name"], *(vlak[veld] for veld in VLAK_VELDEN)))
+        return cls(data["version"], data["emission"], data["hours_per_year"], data["defaults"], vlakken,
+                   Path(directory) / data["labels"])
+
+    # Labeltabel uit het gekoppelde bestand; wordt apart gecontroleerd op wijzigingen
+    @property
+    def labels(self):
+        return self._laad_labels(self.labels_path)
+
+    # Versie van de parameters en de labels samen, zoals die bij de uitkomsten wordt vastgelegd
+    @property
+    def table_version(self):
+        return f"{self.version}/{self.labels.version}"
+
+    # kg CO2 per kWh voor een type verwarming; een onbekend type is een fout in plaats van een stille standaardwaarde
+    def emission_for(self, heating_type):
+        try:
+            return self.emission[heating_type]
+        except KeyError:
+            raise ValueError(f"Onbekend type verwarming {heating_type!r}, kies uit {', '.join(self.emission)}") from None
+
+    # Emissie voor een hele kolom typen in één keer: elk type wordt één keer opgezocht, niet per gebouw
+    def emission_array(self, heating_types):
+        import numpy as np
+        import pandas as pd
+
+        codes, typen = pd.factorize(pd.Series(heating_types), sort=False)
+        if (codes < 0).any():
+            raise ValueError("Type verwarming ontbreekt bij een of meer gebouwen")
+        return np.array([self.emission_for(heating_type) for heating_type in typen], dtype=float)[codes]
+
+
+def _lees_parametertabel(path):
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    try:
+        return ParameterTable.from_dict(data, Path(path).parent)
+    except ValueError as fout:
+        raise ValueError(f"{path}: {fout}") from None
+
+
+def load_parameter_table(path=DEFAULT_PARAMETERS_PATH):
+    return cached_file(path, _lees_parametertabel)
+
+
+# Tabel van dit proces: VERDUURZAMING_PARAMETERS of data/parameters.json. Wordt CONTROLE_INTERVAL seconden
+# hergebruikt zonder de omgeving of het bestand te bekijken; cache_clear() leest direct opnieuw.
+def default_parameter_table():
+    nu = time.monotonic()
+    if nu - _STANDAARD[0] >= CONTROLE_INTERVAL:
+        _STANDAARD[1] = load_parameter_table(os.environ.get("VERDUURZAMING_PARAMETERS") or DEFAULT_PARAMETERS_PATH)
+        _STANDAARD[0] = nu
+    return _STANDAARD[1]
+
+
+def _leeg_standaard():
+    _STANDAARD[0] = -math.inf
+
+
+# (tijdstip van de laatste controle, tabel)
+_STANDAARD = [-math.inf, None]
+default_parameter_table.cache_clear = _leeg_standaard
@@ -0,0 +1,230 @@
+# Portefeuilleoverzicht: totalen en labelverdeling per complex, postcode, bouwjaar of energielabel, met filters.
+# Per groepering worden de sommen en labelaantallen per waarde bijgehouden. Bij een wijziging van één gebouw
+# gaat zijn oude bijdrage eraf en de nieuwe erbij, dus het ongefilterde overzicht kost geen herberekening van
+# de portefeuille. Met een filter wordt over de gebouwen gesommeerd met np.bincount op de groepscodes.
+from pathlib import Path
+
+import numpy as np
+
+from .batch import VLAKKEN, calculate_buildings
+from .parameters import default_parameter_table
+
+# Groeperingen naast het energielabel; ontbrekende kolommen worden "onbekend"
+DIMENSIES = ("complex", "postcode", "construction_year")
+ONBEKEND = "onbekend"
+
+# Bijdrage per gebouw; kwh_per_m2 van een groep volgt uit desired_kWh / area
+SOMMEN = ("buildings", "cost", "savings", "co2_savings", "total_savings_euro", "area", "desired_kWh")
+
+
+# Volgorde van groepswaarden: gesorteerd, met "onbekend" achteraan, ook in een kolom met getallen
+def _volgorde(waarde):
+    return (isinstance(waarde, str) and waarde == ONBEKEND, waarde)
+
+
+# Waarden van één groepering als codes, met een opzoektabel die bij updates kan groeien.
+# Ontbrekende waarden (NaN, None) vallen onder "onbekend".
+class _Dimensie:
+    def __init__(self, waarden):
+        import pandas as pd
+
+        codes, uniek = pd.factorize(pd.Series(waarden), sort=True)
+        self.waarden = list(uniek)
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(self.waarden), codes)
+            self.waarden.append(ONBEKEND)
+        self.codes = codes.astype(np.int64)
+        self.index = {waarde: i for i, waarde in enumerate(self.waarden)}
+
+    def code(self, waarde):
+        import pandas as pd
+
+        if pd.isna(waarde):
+            waarde = ONBEKEND
+        if waarde not in self.index:
+            self.index[waarde] = len(self.waarden)
+            self.waarden.append(waarde)
+        return self.index[waarde]
+
+    # Codes die aan een filter voldoen: een lijst waarden of een (min, max)-bereik
+    def toegestaan(self, filter):
+        if isinstance(filter, tuple):
+            laag, hoog = filter
+            return [i for i, waarde in enumerate(self.waarden) if not _volgorde(waarde)[0] and laag <= waarde <= hoog]
+        return [self.index[waarde] for waarde in filter if waarde in self.index]
+
+
+class Portfolio:
+    def __init__(self, buildings, **params):
+        # De parametertabel wordt vastgelegd, zodat latere updates met dezelfde tabel rekenen als de totalen
+        self.params = {**params, "parameters": params.get("parameters") or default_parameter_table()}
+        self.labels = self.params["parameters"].labels
+        self.parameter_version = self.params["parameters"].table_version
+        if "building_id" in buildings:
+            dubbel = buildings["building_id"][buildings["building_id"].duplicated()].unique()
+            if len(dubbel):
+                raise ValueError(f"building_id komt meer dan eens voor: {', '.join(map(str, dubbel[:10]))}")
+        self.inputs = buildings.set_index("building_id", drop=False) if "building_id" in buildings else buildings.copy()
+        for dimensie in DIMENSIES:
+            if dimensie not in self.inputs:
+                self.inputs[dimensie] = ONBEKEND
+
+        self._bijdrage, self._label = self._bereken(self.inputs)
+        self._dimensies = {dimensie: _Dimensie(self.inputs[dimensie].to_numpy()) for dimensie in DIMENSIES}
+
+        # Sommen (waarden x SOMMEN) en labelaantallen (waarden x labels) per groepering
+        n_labels = len(self.labels.labels)
+        self._sommen, self._aantallen = {}, {}
+        for naam, dimensie in self._dimensies.items():
+            self._sommen[naam] = self._som(dimensie.codes, len(dimensie.waarden), np.ones(len(self), dtype=bool))
+            self._aantallen[naam] = np.bincount(dimensie.codes * n_labels + self._label,
+                                                minlength=len(dimensie.waarden) * n_labels
+                                                ).reshape(-1, n_labels).astype(np.int64)
+        self._sommen["energy_label"] = self._som(self._label, n_labels, np.ones(len(self), dtype=bool))
+
+    @classmethod
+    def from_file(cls, path, **params):
+        import pandas as pd
+
+        path = Path(path)
+        if path.suffix.lower() in (".parquet", ".pq"):
+            return cls(pd.read_parquet(path), **params)
+        return cls(pd.read_csv(path), **params)
+
+    # Uit de inhoud van een CSV-bestand, bijvoorbeeld een upload; te gebruiken in een werkproces
+    @classmethod
+    def from_csv_bytes(cls, inhoud, **params):
+        from io import BytesIO
+        import pandas as pd
+
+        return cls(pd.read_csv(BytesIO(inhoud)), **params)
+
+    def __len__(self):
+        return len(self.inputs)
+
+    # Bijdragen (gebouwen x SOMMEN) en labelcodes voor een blok gebouwen
+    def _bereken(self, rijen):
+        resultaat = calculate_buildings(rijen, **self.params)
+        area = np.column_stack([rijen[f"{vlak}_area"].to_numpy(dtype=float) for vlak in VLAKKEN]).sum(axis=1)
+        bijdrage = np.column_stack([
+            np.ones(len(rijen)),
+            resultaat["cost"].to_numpy(),
+            resultaat["savings"].to_numpy(),
+            resultaat["co2_savings"].to_numpy(),
+            resultaat["total_savings_euro"].to_numpy(),
+            area,
+            resultaat["total_kwh_per_m2_per_year"].to_numpy() * area,
+        ])
+        return bijdrage, resultaat["energy_label"].cat.codes.to_numpy().astype(np.int64)
+
+    # Sommen per code over de gebouwen in masker, één bincount per kolom
+    def _som(self, codes, aantal, masker):
+        return np.column_stack([np.bincount(codes[masker], weights=self._bijdrage[masker, i], minlength=aantal)
+                                for i in range(len(SOMMEN))])
+
+    # Past de invoer van één gebouw aan (kolomnaam -> waarde) en werkt de totalen bij
+    # zonder de rest van de portefeuille opnieuw door te rekenen
+    def update(self, building_id, **changes):
+        onbekend = [kolom for kolom in changes if kolom not in self.inputs]
+        if onbekend:
+            raise KeyError(f"Onbekende kolommen: {', '.join(onbekend)}")
+        positie = self.inputs.index.get_loc(building_id)
+        for kolom, waarde in changes.items():
+            self.inputs.iloc[positie, self.inputs.columns.get_loc(kolom)] = waarde
+        rij = self.inputs.iloc[[positie]]
+        bijdrage, label = self._bereken(rij)
+        self._wijzig(positie, -1)
+
+        self._bijdrage[positie] = bijdrage[0]
+        self._label[positie] = label[0]
+        for naam, dimensie in self._dimensies.items():
+            code = dimensie.code(rij[naam].iat[0])
+            if code == len(self._sommen[naam]):
+                # Nieuwe waarde, bijvoorbeeld een nieuw complex: lege rij erbij
+                self._sommen[naam] = np.vstack([self._sommen[naam], np.zeros(len(SOMMEN))])
+                self._aantallen[naam] = np.vstack([self._aantallen[naam], np.zeros(len(self.labels.labels), dtype=np.int64)])
+            dimensie.codes[positie] = code
+        self._wijzig(positie, +1)
+
+    # Telt de bijdrage van één gebouw op bij (teken +1) of af van (-1) alle groeperingen
+    def _wijzig(self, positie, teken):
+        label = self._label[positie]
+        for naam, dimensie in self._dimensies.items():
+            code = dimensie.codes[positie]
+            self._sommen[naam][code] += teken * self._bijdrage[positie]
+            self._aantallen[naam][code, label] += teken
+        self._sommen["energy_label"][label] += teken * self._bijdrage[positie]
+
+    def _masker(self, filters):
+        masker = np.ones(len(self), dtype=bool)
+        for kolom, filter in filters.items():
+            if kolom == "energy_label":
+                codes = [self.labels.labels.index(label) for label in filter]
+                masker &= np.isin(self._label, codes)
+            else:
+                masker &= np.isin(self._dimensies[kolom].codes, self._dimensies[kolom].toegestaan(filter))
+        return masker
+
+    # Waarden van een groepering, gebruikt voor keuzelijsten in filters
+    def values(self, dimension):
+        if dimension == "energy_label":
+            return list(self.labels.labels)
+        return sorted((waarde for waarde, rij in zip(self._dimensies[dimension].waarden, self._sommen[dimension])
+                       if rij[0] > 0.5), key=_volgorde)
+
+    # Totalen per groep (een van DIMENSIES of energy_label), met het aantal gebouwen per label.
+    # filters: kolom -> lijst toegestane waarden, of (min, max) voor een bereik zoals het bouwjaar
+    def aggregate(self, group_by="complex", filters=None):
+        import pandas as pd
+
+        n_labels = len(self.labels.labels)
+        if group_by == "energy_label":
+            namen = list(self.labels.labels)
+            codes = self._label
+        else:
+            namen = list(self._dimensies[group_by].waarden)
+            codes = self._dimensies[group_by].codes
+
+        if filters:
+            masker = self._masker(filters)
+            sommen = self._som(codes, len(namen), masker)
+            aantallen = np.bincount(codes[masker] * n_labels + self._label[masker],
+                                    minlength=len(namen) * n_labels).reshape(-1, n_labels)
+        else:
+            sommen = self._sommen[group_by]
+            aantallen = self._aantallen.get(group_by)
+
+        tabel = pd.DataFrame(sommen, index=pd.Index(namen, name=group_by), columns=list(SOMMEN))
+        tabel["buildings"] = tabel["buildings"].round().astype(np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tabel["kwh_per_m2"] = tabel["desired_kWh"] / tabel["area"]
+        tabel = tabel.drop(columns=["area", "desired_kWh"])
+        if group_by != "energy_label":
+            tabel[[f"label_{label}" for label in self.labels.labels]] = aantallen
+        tabel = tabel[tabel["buildings"] > 0]
+        return tabel if group_by == "energy_label" else tabel.loc[sorted(tabel.index, key=_volgorde)]
+
+    # Totalen over de (gefilterde) portefeuille
+    def totals(self, filters=None):
+        if filters:
+            sommen = self._bijdrage[self._masker(filters)].sum(axis=0)
+        else:
+            sommen = self._sommen["energy_label"].sum(axis=0)
+        totaal = dict(zip(SOMMEN, sommen.tolist()))
+        totaal["buildings"] = int(round(totaal["buildings"]))
+        totaal["kwh_per_m2"] = totaal["desired_kWh"] / totaal["area"] if totaal["area"] else float("nan")
+        return totaal
+
+    # Aantal gebouwen per label, in de volgorde van de labeltabel
+    def label_distribution(self, filters=None):
+        tabel = self.aggregate("energy_label", filters)["buildings"]
+        return tabel.reindex(list(self.labels.labels), fill_value=0)
+
+    # Uitkomsten per gebouw (na filter), bijvoorbeeld voor een detailtabel
+    def buildings(self, filters=None):
+        masker = self._masker(filters or {})
+        tabel = self.inputs.loc[masker, list(DIMENSIES)].copy()
+        for i, naam in enumerate(SOMMEN[1:5], start=1):
+            tabel[naam] = self._bijdrage[masker, i]
+        tabel["energy_label"] = self.labels.categorical(self._label[masker])
+        return tabel
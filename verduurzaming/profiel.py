@@ -0,0 +1,153 @@
+# Optionele meting per fase van een Streamlit-run (invoer, berekening, grafieken, tabel, PDF, advies):
+# kloktijd en geheugentoewijzingen via tracemalloc. Aanzetten met VERDUURZAMING_PROFIEL=1; uitgeschakeld
+# kost een meetpunt alleen een attribuutcontrole. tracemalloc geldt voor het hele proces: eenmaal gestart
+# vertraagt het alle sessies, en de geheugencijfers bevatten ook wat andere sessies en threads in dezelfde
+# fase toewijzen. Daarom meet alleen VERDUURZAMING_PROFIEL het geheugen; RunProfile(memory=False) meet
+# alleen de tijd. Runs worden per proces verzameld en kunnen worden
+# weggeschreven als JSON lines (VERDUURZAMING_PROFIEL_JSONL) of als Prometheus-tekstbestand
+# (VERDUURZAMING_PROFIEL_PROM), bijvoorbeeld voor de textfile collector van node_exporter.
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Grenzen van de histogrammen in seconden, zoals gebruikelijk bij Prometheus
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_fasen = {}
+_runs = 0
+
+
+def profiling_enabled():
+    return os.environ.get("VERDUURZAMING_PROFIEL", "").lower() in ("1", "true", "ja", "yes")
+
+
+# Meting van één run. mark(naam) sluit de lopende fase af en begint de volgende, zodat een
+# lineair script niet in blokken hoeft te worden ingesprongen; finish() sluit de laatste fase af.
+class RunProfile:
+    def __init__(self, enabled=None, memory=True):
+        self.enabled = profiling_enabled() if enabled is None else enabled
+        self.memory = self.enabled and memory
+        self.stages = []
+        self._naam = None
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._begin = time.perf_counter()
+        self.timestamp = time.time()
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        self._sluit()
+        self._naam = name
+        if self.memory:
+            tracemalloc.reset_peak()
+            self._geheugen = tracemalloc.get_traced_memory()[0]
+        self._start = time.perf_counter()
+
+    def _sluit(self):
+        if self._naam is None:
+            return
+        seconden = time.perf_counter() - self._start
+        toegewezen = piek = 0
+        if self.memory:
+            huidig, hoogste = tracemalloc.get_traced_memory()
+            toegewezen, piek = huidig - self._geheugen, hoogste - self._geheugen
+        self.stages.append({"stage": self._naam, "seconds": seconden, "allocated_bytes": toegewezen, "peak_bytes": piek})
+        self._naam = None
+
+    # Sluit de run af en geeft een record terug (None als meten uit staat)
+    def finish(self):
+        if not self.enabled:
+            return None
+        self._sluit()
+        record = {
+            "timestamp": self.timestamp,
+            "seconds": time.perf_counter() - self._begin,
+            "stages": self.stages,
+        }
+        record_run(record)
+        return record
+
+
+# Voegt een run toe aan de totalen van dit proces
+def record_run(record):
+    global _runs
+    with _lock:
+        _runs += 1
+        for fase in record["stages"]:
+            totaal = _fasen.setdefault(fase["stage"], {
+                "count": 0, "seconds": 0.0, "allocated_bytes": 0, "peak_bytes": 0, "buckets": [0] * len(BUCKETS),
+            })
+            totaal["count"] += 1
+            totaal["seconds"] += fase["seconds"]
+            totaal["allocated_bytes"] += fase["allocated_bytes"]
+            totaal["peak_bytes"] = max(totaal["peak_bytes"], fase["peak_bytes"])
+            for i, grens in enumerate(BUCKETS):
+                if fase["seconds"] <= grens:
+                    totaal["buckets"][i] += 1
+
+
+def reset():
+    global _runs
+    with _lock:
+        _fasen.clear()
+        _runs = 0
+
+
+# Totalen in het tekstformaat van Prometheus
+def prometheus_text():
+    regels = [
+        "# HELP verduurzaming_runs_total Aantal gemeten Streamlit-runs.",
+        "# TYPE verduurzaming_runs_total counter",
+    ]
+    with _lock:
+        regels.append(f"verduurzaming_runs_total {_runs}")
+        fasen = {naam: dict(totaal, buckets=list(totaal["buckets"])) for naam, totaal in _fasen.items()}
+
+    regels += ["# HELP verduurzaming_stage_seconds Kloktijd per fase.",
+               "# TYPE verduurzaming_stage_seconds histogram"]
+    for naam, totaal in fasen.items():
+        for grens, aantal in zip(BUCKETS, totaal["buckets"]):
+            regels.append(f'verduurzaming_stage_seconds_bucket{{stage="{naam}",le="{grens}"}} {aantal}')
+        regels.append(f'verduurzaming_stage_seconds_bucket{{stage="{naam}",le="+Inf"}} {totaal["count"]}')
+        regels.append(f'verduurzaming_stage_seconds_sum{{stage="{naam}"}} {totaal["seconds"]}')
+        regels.append(f'verduurzaming_stage_seconds_count{{stage="{naam}"}} {totaal["count"]}')
+
+    regels += ["# HELP verduurzaming_stage_allocated_bytes_total Netto toegewezen geheugen per fase.",
+               "# TYPE verduurzaming_stage_allocated_bytes_total counter"]
+    regels += [f'verduurzaming_stage_allocated_bytes_total{{stage="{naam}"}} {totaal["allocated_bytes"]}'
+               for naam, totaal in fasen.items()]
+    regels += ["# HELP verduurzaming_stage_peak_bytes Hoogste geheugenpiek binnen een fase.",
+               "# TYPE verduurzaming_stage_peak_bytes gauge"]
+    regels += [f'verduurzaming_stage_peak_bytes{{stage="{naam}"}} {totaal["peak_bytes"]}'
+               for naam, totaal in fasen.items()]
+    return "\n".join(regels) + "\n"
+
+
+# Voegt een record als één regel JSON toe aan path
+def write_jsonl(path, record):
+    with _lock, open(path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(record) + "\n")
+
+
+# Schrijft de totalen naar path; via een tijdelijk bestand, zodat een scraper nooit een half bestand leest
+def write_prometheus(path):
+    tijdelijk = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tijdelijk, "w", encoding="utf-8") as file:
+        file.write(prometheus_text())
+    os.replace(tijdelijk, path)
+
+
+# Schrijft een record weg naar de bestanden uit de omgevingsvariabelen, voor zover ingesteld
+def export(record):
+    if record is None:
+        return
+    jsonl = os.environ.get("VERDUURZAMING_PROFIEL_JSONL")
+    if jsonl:
+        write_jsonl(jsonl, record)
+    prom = os.environ.get("VERDUURZAMING_PROFIEL_PROM")
+    if prom:
+        write_prometheus(prom)
@@ -0,0 +1,344 @@
+# PDF-rapporten. Lettertype en logo worden één keer per proces ingelezen en daarna voor elk
+# rapport hergebruikt, zodat duizenden rapporten (bijvoorbeeld voor huurdersbrieven) snel
+# en zonder gedeeld uitvoerbestand gemaakt kunnen worden.
+import tempfile
+import threading
+import types
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from .berekening import get_label_color
+
+ROOT = Path(__file__).resolve().parent.parent
+FONT_PATH = ROOT / "dejavu-sans-bold.ttf"
+LOGO_PATH = ROOT / "logo-Bb-DW.jpg"
+
+
+# Tekens die vooraf in de lettertypesubset worden gezet. Zo is de subset voor vrijwel elk
+# rapport gelijk en kan het ingebedde lettertype uit _SUBSETS worden hergebruikt.
+VASTE_TEKENS = [*range(32, 127), ord('€'), ord('²')]
+
+# Ingebedde lettertypesubsets per (bestand, tekenset), met de gegevens die FPDF daarna nog leest.
+# Rapporten worden ook op threads gemaakt (render-pool, API), dus alleen onder _SUBSETS_LOCK lezen en schrijven.
+_SUBSETS = {}
+_SUBSETS_LOCK = threading.Lock()
+MAX_SUBSETS = 32
+
+
+# FPDF-klasse voor de rapporten. FPDF maakt bij elke output een nieuwe subset van het TTF-bestand; in deze klasse
+# wordt die per tekenset onthouden. _putfonts is die van FPDF, met alleen in zijn globals een andere TTFontFile,
+# zodat andere FPDF's in het proces (zoals in simulatiemodel_app.py) er niets van merken. Dat hangt af van de
+# binnenkant van FPDF 1.7.2 (zie requirements.txt); bij een andere versie wordt de gewone FPDF gebruikt, zonder
+# cache maar met dezelfde rapporten.
+FPDF_VERSIE = "1.7.2"
+
+
+@lru_cache(maxsize=None)
+def _rapport_pdf_class():
+    import fpdf.fpdf
+    from fpdf import FPDF
+
+    if fpdf.fpdf.FPDF_VERSION != FPDF_VERSIE or "TTFontFile" not in FPDF._putfonts.__code__.co_names:
+        return FPDF
+
+    from fpdf.ttfonts import TTFontFile
+
+    class CachedTTFontFile(TTFontFile):
+        # subset bevat elk gebruikt teken, ook dubbel; de subset zelf hangt alleen af van welke tekens erin zitten
+        def makeSubset(self, file, subset):
+            key = (file, frozenset(subset))
+            with _SUBSETS_LOCK:
+                item = _SUBSETS.get(key)
+            if item is None:
+                item = (super().makeSubset(file, subset), self.codeToGlyph, self.maxUni)
+                with _SUBSETS_LOCK:
+                    if len(_SUBSETS) >= MAX_SUBSETS:
+                        _SUBSETS.clear()
+                    _SUBSETS[key] = item
+            stream, self.codeToGlyph, self.maxUni = item
+            return stream
+
+    origineel = FPDF._putfonts
+    putfonts = types.FunctionType(origineel.__code__, {**vars(fpdf.fpdf), "TTFontFile": CachedTTFontFile},
+                                  origineel.__name__, origineel.__defaults__, origineel.__closure__)
+
+    class RapportPDF(FPDF):
+        _putfonts = putfonts
+
+    return RapportPDF
+
+
+# Lettertype- en logogegevens van dit proces; wordt per worker één keer opgebouwd
+@lru_cache(maxsize=None)
+def _bronnen():
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_font('DejaVu', '', str(FONT_PATH), uni=True)
+    # De meegeleverde .pkl bevat een relatief pad; zet het absolute pad terug zodat de werkmap niet uitmaakt
+    for font in pdf.fonts.values():
+        font['ttffile'] = str(FONT_PATH)
+    for font_file in pdf.font_files.values():
+        if 'ttffile' in font_file:
+            font_file['ttffile'] = str(FONT_PATH)
+    # Het logo wordt één keer ingelezen via image(); daarna staat het in pdf.images
+    pdf.add_page()
+    pdf.image(str(LOGO_PATH), x=0, y=0, w=1)
+    logo = pdf.images[str(LOGO_PATH)]
+    return pdf.fonts, pdf.font_files, logo
+
+
+# Nieuwe FPDF met het lettertype en logo uit de cache van dit proces
+def _nieuwe_pdf():
+    fonts, font_files, logo = _bronnen()
+    pdf = _rapport_pdf_class()()
+    # Alleen de subset-lijst wordt per rapport aangevuld; de tekenbreedtes worden gedeeld
+    pdf.fonts = {key: dict(font, subset=font['subset'] + VASTE_TEKENS) for key, font in fonts.items()}
+    pdf.font_files = {key: dict(value) for key, value in font_files.items()}
+    pdf.images = {str(LOGO_PATH): dict(logo, i=1)}
+    return pdf
+
+
+# Grafieken van de resultaten per categorie op een eigen pagina. FPDF 1.7 leest afbeeldingen
+# alleen van schijf, dus de PNG's gaan via een tijdelijke map.
+def _grafiekpagina(pdf, data):
+    from .grafieken import render_co2_chart, render_cost_savings_chart
+
+    categorieen = tuple(data)
+    kosten, besparing, co2 = (tuple(waarden[i] for waarden in data.values()) for i in range(3))
+    pdf.add_page()
+    with tempfile.TemporaryDirectory() as map:
+        for i, png in enumerate((render_cost_savings_chart(categorieen, kosten, besparing),
+                                 render_co2_chart(categorieen, co2))):
+            pad = Path(map) / f"grafiek_{i}.png"
+            pad.write_bytes(png)
+            pdf.image(str(pad), x=15, w=180)
+            pdf.ln(5)
+
+
+# Kolommen van de vlakkentabel in het rapport: kop, breedte (mm) en opmaak
+TABEL_KOLOMMEN = [
+    ("Vlak", 46, "{}"),
+    ("Kosten (€)", 28, "{:,.2f}"),
+    ("Besparing (kWh)", 30, "{:,.2f}"),
+    ("CO2 (kg)", 26, "{:,.2f}"),
+    ("Terugverdientijd", 30, "{:,.2f}"),
+    ("Bespaard (€)", 30, "{:,.2f}"),
+]
+
+
+# Resultaten per vlak als tabel; de kop wordt op elke nieuwe pagina herhaald
+def _vlakkentabel(pdf, data):
+    def kop():
+        pdf.set_font("DejaVu", size=9)
+        pdf.set_fill_color(220, 220, 220)
+        for titel, breedte, _ in TABEL_KOLOMMEN:
+            pdf.cell(breedte, 7, txt=titel, border=1, fill=True, align='C')
+        pdf.ln()
+
+    kop()
+    for category, waarden in data.items():
+        if pdf.get_y() + 6 > pdf.page_break_trigger:
+            pdf.add_page()
+            kop()
+        for (_, breedte, opmaak), waarde in zip(TABEL_KOLOMMEN, (category, *waarden)):
+            pdf.cell(breedte, 6, txt=opmaak.format(waarde), border=1, align='L' if opmaak == "{}" else 'R')
+        pdf.ln()
+
+
+# Kolommen van de scenariotabel: kop, breedte (mm), sleutel in de totalen en opmaak
+SCENARIO_KOLOMMEN = [
+    ("Scenario", 44, None, "{}"),
+    ("Kosten (€)", 26, "cost", "{:,.0f}"),
+    ("Besparing (kWh)", 30, "savings", "{:,.0f}"),
+    ("CO2 (kg)", 22, "co2_savings", "{:,.0f}"),
+    ("Terugverdientijd", 30, "payback", "{:,.1f}"),
+    ("kWh/m²", 20, "total_kwh_per_m2_per_year", "{:,.1f}"),
+    ("Label", 18, "energy_label", "{}"),
+]
+
+
+# Scenario's naast elkaar op een eigen pagina: één rij per scenario met het label in zijn kleur,
+# met charts ook de grafiek van kosten en besparing per scenario
+def _scenariopagina(pdf, scenarios, charts):
+    pdf.add_page()
+    pdf.set_font("DejaVu", size=16)
+    pdf.cell(200, 10, txt="Scenario's", ln=True)
+    pdf.ln(5)
+
+    def kop():
+        pdf.set_font("DejaVu", size=9)
+        pdf.set_fill_color(220, 220, 220)
+        for titel, breedte, _, _ in SCENARIO_KOLOMMEN:
+            pdf.cell(breedte, 7, txt=titel, border=1, fill=True, align='C')
+        pdf.ln()
+
+    kop()
+    for naam, totals in scenarios.items():
+        if pdf.get_y() + 6 > pdf.page_break_trigger:
+            pdf.add_page()
+            kop()
+        for titel, breedte, sleutel, opmaak in SCENARIO_KOLOMMEN:
+            waarde = naam if sleutel is None else totals[sleutel]
+            if sleutel == "energy_label":
+                kleur = get_label_color(waarde)
+                pdf.set_fill_color(*(int(kleur[i:i+2], 16) for i in (1, 3, 5)))
+            pdf.cell(breedte, 6, txt=opmaak.format(waarde), border=1, fill=sleutel == "energy_label",
+                     align='L' if sleutel is None else 'C' if sleutel == "energy_label" else 'R')
+        pdf.ln()
+
+    if charts:
+        from .grafieken import render_scenario_chart
+
+        namen = tuple(scenarios)
+        png = render_scenario_chart(namen, tuple(scenarios[naam]["cost"] for naam in namen),
+                                    tuple(scenarios[naam]["savings"] for naam in namen))
+        pdf.ln(5)
+        with tempfile.TemporaryDirectory() as map:
+            pad = Path(map) / "scenarios.png"
+            pad.write_bytes(png)
+            pdf.image(str(pad), x=15, w=180)
+
+
+# Functie voor PDF generatie met professionele opmaak; geeft de PDF als bytes terug.
+# Met charts komen de grafieken (matplotlib) op een tweede pagina; voor bulkrapporten staat dat uit.
+# scenarios (naam -> totals) geeft een extra pagina waarop de scenario's worden vergeleken.
+def render_pdf(data, totals, charts=False, scenarios=None):
+    pdf = _nieuwe_pdf()
+    pdf.add_page()
+    pdf.set_font("DejaVu", size=12)
+
+    # Logo
+    pdf.image(str(LOGO_PATH), x=80, y=10, w=50)  # Centered on the page
+    pdf.ln(30)  # Add some space below the logo
+
+    pdf.set_font("DejaVu", size=16)
+    pdf.cell(200, 10, txt="BBDW - Resultaten Verduurzaming", ln=True, align='C')
+    pdf.ln(10)
+    pdf.set_line_width(0.5)
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(10)
+
+    # Hoofdtekst: één tabelrij per vlak, zodat ook tientallen vlakken op een paar pagina's passen
+    _vlakkentabel(pdf, data)
+    pdf.set_font("DejaVu", size=12)
+    pdf.ln(10)
+    pdf.cell(200, 10, txt="Totale Resultaten", ln=True)
+    totals_text = (f"Totaal Kosten: €{totals['cost']:,.2f}\n"
+                   f"Totaal Besparing per jaar: {totals['savings']:,.2f} kWh\n"
+                   f"Totaal CO2-besparing: {totals['co2_savings']:,.2f} kg\n"
+                   f"Totaal Terugverdientijd: {totals['payback']:,.2f} jaar\n"
+                   f"Totaal Bespaarde energiekosten: €{totals['total_savings_euro']:,.2f}\n")
+    pdf.multi_cell(0, 10, txt=totals_text)
+
+    # Energielabel met achtergrondkleur
+    label_color = get_label_color(totals["energy_label"])
+    r, g, b = tuple(int(label_color[i:i+2], 16) for i in (1, 3, 5))  # Convert hex to RGB
+    pdf.set_fill_color(r, g, b)
+    pdf.cell(200, 10, txt=f"Energielabel: {totals['energy_label']}", ln=True, fill=True)
+    pdf.ln(10)
+
+    pdf.set_font("DejaVu", size=8)
+    pdf.cell(200, 10, txt="Contact: info@bbdw.nl | www.bbdw.nl", ln=True, align='C')
+
+    if charts:
+        _grafiekpagina(pdf, data)
+    if scenarios:
+        _scenariopagina(pdf, scenarios, charts)
+
+    # FPDF 1.7 geeft de PDF als latin-1 string terug
+    return pdf.output(dest='S').encode('latin-1')
+
+
+# Zonder pdf_output blijft het rapport in het geheugen en komen de bytes terug;
+# met pdf_output wordt het naar dat pad geschreven en komt het pad terug
+def generate_pdf(data, totals, pdf_output=None, charts=False, scenarios=None):
+    pdf_bytes = render_pdf(data, totals, charts, scenarios)
+    if pdf_output is None:
+        return pdf_bytes
+    Path(pdf_output).write_bytes(pdf_bytes)
+    return pdf_output
+
+
+def _render_pdf_args(args):
+    return render_pdf(*args)
+
+
+# Rendert een reeks (data, totals)-paren, in volgorde, verdeeld over een pool van processen.
+# Met processes=1 wordt alles in dit proces gedaan; None gebruikt alle cores.
+def render_reports(reports, processes=None, chunksize=8):
+    if processes == 1:
+        yield from (render_pdf(data, totals) for data, totals in reports)
+        return
+    with ProcessPoolExecutor(max_workers=processes, initializer=_bronnen) as pool:
+        yield from pool.map(_render_pdf_args, reports, chunksize=chunksize)
+
+
+# Schrijft elk rapport naar een eigen bestand in directory; names geeft per rapport de bestandsnaam
+def write_reports(reports, directory, names, processes=None):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paden = []
+    for name, pdf_bytes in zip(names, render_reports(reports, processes)):
+        pad = directory / name
+        pad.write_bytes(pdf_bytes)
+        paden.append(pad)
+    return paden
+
+
+# ZIP-archief dat in delen gevuld kan worden, met één procespool voor alle delen.
+# fileobj mag een pad of een open binair bestand zijn, ook een niet-seekable stream.
+class ReportZip:
+    def __init__(self, fileobj, processes=None, chunksize=8):
+        self.chunksize = chunksize
+        self.count = 0
+        self._archief = zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED)
+        self._pool = None if processes == 1 else ProcessPoolExecutor(max_workers=processes, initializer=_bronnen)
+
+    # named_reports: reeks van (bestandsnaam, (data, totals))
+    def add(self, named_reports):
+        names, reports = zip(*named_reports) if named_reports else ((), ())
+        if self._pool is None:
+            rendered = (render_pdf(data, totals) for data, totals in reports)
+        else:
+            rendered = self._pool.map(_render_pdf_args, reports, chunksize=self.chunksize)
+        for name, pdf_bytes in zip(names, rendered):
+            self._archief.writestr(name, pdf_bytes)
+            self.count += 1
+
+    def close(self):
+        self._archief.close()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Schrijft alle rapporten als ZIP naar fileobj en geeft het aantal rapporten terug
+def write_zip(reports, fileobj, names, processes=None):
+    with ReportZip(fileobj, processes) as archief:
+        archief.add(list(zip(names, reports)))
+    return archief.count
+
+
+# Zet de uitvoer van batch.calculate_buildings om naar (bestandsnaam, (data, totals)) per gebouw
+def reports_from_frame(df):
+    from .batch import VLAKKEN
+
+    building_ids = df["building_id"].tolist() if "building_id" in df else df.index.tolist()
+    kolommen = {vlak: [df[f"{vlak}_{sleutel}"].tolist() for sleutel in
+                       ("total_kost_with", "saved_kWh", "co2_savings", "payback_time", "savings_euro")]
+                for vlak in VLAKKEN}
+    totaal = {kolom: df[kolom].tolist() for kolom in
+              ("cost", "savings", "co2_savings", "payback", "total_savings_euro", "energy_label")}
+
+    for i, building_id in enumerate(building_ids):
+        data = {naam: tuple(waarden[i] for waarden in kolommen[vlak]) for vlak, naam in VLAKKEN.items()}
+        totals = {kolom: waarden[i] for kolom, waarden in totaal.items()}
+        yield f"rapport_{building_id}.pdf", (data, totals)
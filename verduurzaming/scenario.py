@@ -0,0 +1,110 @@
+# Scenario's: varianten van dezelfde woning naast elkaar, zoals "alleen dak", "dak en wanden" of
+# "alles naar RC 6". Een scenario geeft per vlak de RC-waarde waarnaar het vlak wordt geïsoleerd;
+# vlakken die niet genoemd worden blijven zoals ze zijn. Alle scenario's worden samen in één aanroep van
+# calculate_costs_batch doorgerekend, met elk uniek paar (vlak, RC) maar één keer: scenario's die een vlak
+# naar dezelfde RC brengen delen dat resultaat.
+import numpy as np
+
+from .berekening import calculate_costs_batch
+from .vlakken import SurfaceTable, unique_names
+
+# Kolommen van de vergelijkingstabel: sleutel in de totalen -> kolomnaam
+VERGELIJKING_NAMEN = {
+    "cost": "Kosten (€)",
+    "savings": "Besparing (kWh)",
+    "co2_savings": "CO2-besparing (kg)",
+    "payback": "Terugverdientijd (jaar)",
+    "total_savings_euro": "Bespaarde energiekosten (€)",
+    "total_kwh_per_m2_per_year": "kWh per m² per jaar",
+    "energy_label": "Energielabel",
+}
+
+
+# Scenario's waarmee de app begint: de ingevoerde RC-waarden, alleen het dak (of het eerste vlak) en alles naar RC 6
+def default_scenarios(vlakken):
+    invoer = dict(zip(vlakken.names, vlakken.desired_rc.tolist()))
+    dak = next((naam for naam in vlakken.names if naam.lower().startswith("dak")), vlakken.names[0])
+    return {
+        "Invoer": invoer,
+        f"Alleen {dak.lower()}": {dak: invoer[dak]},
+        "Alles naar RC 6": dict.fromkeys(vlakken.names, 6.0),
+    }
+
+
+# Tabel met een kolom Scenario en per vlak een kolom met de RC-waarde (leeg is niet isoleren), zoals in de app
+def scenario_frame(scenarios, names):
+    import pandas as pd
+    return pd.DataFrame([{"Scenario": naam, **{vlak: rc.get(vlak) for vlak in names}} for naam, rc in scenarios.items()],
+                        columns=["Scenario", *names])
+
+
+def scenarios_from_frame(df):
+    namen = unique_names([str(naam) for naam in df["Scenario"]])
+    vlakken = [kolom for kolom in df.columns if kolom != "Scenario"]
+    waarden = df[vlakken].to_numpy(dtype=float)
+    return {naam: {vlak: rc for vlak, rc in zip(vlakken, rij.tolist()) if np.isfinite(rc)}
+            for naam, rij in zip(namen, waarden)}
+
+
+# Rekent alle scenario's voor de vlakken van één gebouw door. Materiaalkosten schalen met de RC-waarde (dikte),
+# zoals in het pakketadvies: material_kost geldt bij desired_rc. Een vlak dat niet wordt geïsoleerd kost niets
+# en bespaart niets, maar telt met zijn huidige verlies mee voor het label.
+# Geeft een dict met names, vlakken (SurfaceTable met één "gebouw" per scenario), result (per vlak per scenario),
+# totals (arrays per scenario), rc (scenario's x vlakken, NaN is niet isoleren) en unique (aantal berekende vlakken).
+def compare_scenarios(vlakken, scenarios, delta_t, emissie_per_kwh, energy_kost, subsidy_percentage,
+                      hours_per_year=4800, degree_hours=None):
+    namen = list(scenarios)
+    positie = {naam: i for i, naam in enumerate(vlakken.names)}
+    rc = np.full((len(namen), len(vlakken)), np.nan)
+    for s, keuze in enumerate(scenarios.values()):
+        onbekend = [naam for naam in keuze if naam not in positie]
+        if onbekend:
+            raise ValueError(f"Scenario {namen[s]!r}: onbekende vlakken {', '.join(map(str, onbekend))}")
+        for naam, waarde in keuze.items():
+            if not waarde > 0:
+                raise ValueError(f"Scenario {namen[s]!r}: RC-waarde van {naam} moet groter dan 0 zijn")
+            rc[s, positie[naam]] = waarde
+
+    # Unieke paren (vlak, RC); 0 staat voor een vlak dat niet wordt geïsoleerd
+    vlak = np.broadcast_to(np.arange(len(vlakken)), rc.shape).ravel()
+    paren, terug = np.unique(np.column_stack([vlak, np.nan_to_num(rc.ravel(), nan=0.0)]), axis=0, return_inverse=True)
+    terug = terug.reshape(-1)
+    v, doel = paren[:, 0].astype(np.int64), paren[:, 1]
+    geisoleerd = doel > 0
+    uniek = calculate_costs_batch(
+        vlakken.area[v], vlakken.current_rc[v], np.where(geisoleerd, doel, vlakken.current_rc[v]),
+        np.where(geisoleerd, vlakken.material_kost[v] * doel / vlakken.desired_rc[v], 0.0),
+        np.where(geisoleerd, vlakken.installation_kost[v], 0.0),
+        delta_t, emissie_per_kwh, energy_kost, subsidy_percentage, hours_per_year, degree_hours)
+    # Zonder isolatie is er niets terug te verdienen; 0 in plaats van oneindig, zodat het de totale
+    # terugverdientijd (de langste van de vlakken) niet bepaalt
+    uniek["payback_time"] = np.where(geisoleerd, uniek["payback_time"], 0.0)
+
+    result = {sleutel: np.asarray(waarden)[terug] for sleutel, waarden in uniek.items()}
+    tabel = SurfaceTable(list(vlakken.names) * len(namen), *(np.tile(getattr(vlakken, veld), len(namen)) for veld in
+                                                            ("area", "current_rc")),
+                         rc.ravel(), np.tile(vlakken.material_kost, len(namen)), np.tile(vlakken.installation_kost, len(namen)),
+                         building=np.repeat(np.arange(len(namen)), len(vlakken)))
+    return {"names": namen, "vlakken": tabel, "result": result, "totals": tabel.totals(result), "rc": rc,
+            "unique": len(paren)}
+
+
+# Totalen per scenario als tabel (index = scenario) met de kolommen uit VERGELIJKING_NAMEN
+def comparison_frame(vergelijking):
+    import pandas as pd
+    return pd.DataFrame({naam: vergelijking["totals"][sleutel] for sleutel, naam in VERGELIJKING_NAMEN.items()},
+                        index=pd.Index(vergelijking["names"], name="Scenario"))
+
+
+# Resultaten per vlak en scenario in lange vorm (kolommen Scenario, Categorie en de resultaatkolommen), voor de grafiek
+def surfaces_frame(vergelijking):
+    tabel = vergelijking["vlakken"].results_frame(vergelijking["result"]).reset_index()
+    tabel.insert(0, "Scenario", np.asarray(vergelijking["names"], dtype=object)[vergelijking["vlakken"].building])
+    return tabel.drop(columns="Gebouw", errors="ignore")
+
+
+# Totalen per scenario als tuple van (naam, ((sleutel, waarde), ...)), voor cached_pdf en het rapport
+def scenario_totals(vergelijking):
+    totals = vergelijking["totals"]
+    return tuple((naam, tuple((sleutel, totals[sleutel][s].item()) for sleutel in VERGELIJKING_NAMEN))
+                 for s, naam in enumerate(vergelijking["names"]))
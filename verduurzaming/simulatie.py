@@ -0,0 +1,121 @@
+# Monte Carlo-simulatie van de onzekerheid in kosten, besparing en terugverdientijd.
+# Energieprijs, ΔT en subsidie worden per trekking voor het hele gebouw getrokken; de behaalde RC
+# en de installatiekosten per vlak (als factor op de invoer). Alle trekkingen worden in één
+# gevectoriseerde aanroep van calculate_costs_batch doorgerekend.
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .berekening import calculate_costs_batch
+
+# Parameters die per trekking voor het hele gebouw gelden, en factoren die per vlak gelden
+GEBOUW_PARAMETERS = ("energy_kost", "delta_t", "subsidy_percentage")
+VLAK_FACTOREN = ("rc_factor", "installation_factor")
+
+UITKOMSTEN = ("total_kost_with", "saved_kWh", "co2_savings", "payback_time", "savings_euro")
+
+
+# Trekt size waarden uit een verdeling. spec is een getal (vast) of een tuple:
+# ("normal", gemiddelde, sd), ("uniform", laag, hoog), ("triangular", laag, modus, hoog)
+# of ("lognormal", gemiddelde, sigma) van de onderliggende normale verdeling.
+def sample(rng, spec, size):
+    if np.isscalar(spec):
+        return np.full(size, float(spec))
+    soort, *args = spec
+    if soort == "normal":
+        return rng.normal(args[0], args[1], size)
+    if soort == "uniform":
+        return rng.uniform(args[0], args[1], size)
+    if soort == "triangular":
+        laag, modus, hoog = args
+        if not laag <= modus <= hoog or laag == hoog:
+            raise ValueError(f"Driehoeksverdeling vereist laag <= modus <= hoog en laag < hoog, niet {laag:g}, {modus:g}, {hoog:g}")
+        return rng.triangular(laag, modus, hoog, size)
+    if soort == "lognormal":
+        return rng.lognormal(args[0], args[1], size)
+    raise ValueError(f"Onbekende verdeling {soort!r}")
+
+
+def _simuleer(area, current_rc, desired_rc, material_kost, installation_kost, emissie_per_kwh,
+              distributions, n_samples, seed, hours_per_year):
+    rng = np.random.default_rng(seed)
+    vlakken = area.shape[-1]
+    spec = dict(distributions)
+
+    gebouw = {naam: sample(rng, spec[naam], (n_samples, 1)) for naam in GEBOUW_PARAMETERS}
+    factoren = {naam: sample(rng, spec.get(naam, 1.0), (n_samples, vlakken)) for naam in VLAK_FACTOREN}
+
+    # Een behaalde RC kan niet onder de huidige RC uitkomen, en kosten, energieprijs en ΔT worden niet negatief
+    # (een normale verdeling rond een lage prijs geeft anders trekkingen waarin besparen geld kost)
+    achieved_rc = np.maximum(desired_rc * factoren["rc_factor"], current_rc)
+    installatie = installation_kost * np.maximum(factoren["installation_factor"], 0)
+    subsidie = np.clip(gebouw["subsidy_percentage"], 0, 100)
+    energy_kost = np.maximum(gebouw["energy_kost"], 0)
+    delta_t = np.maximum(gebouw["delta_t"], 0)
+
+    result = calculate_costs_batch(area, current_rc, achieved_rc, material_kost, installatie,
+                                   delta_t, emissie_per_kwh, energy_kost, subsidie, hours_per_year)
+    return {sleutel: result[sleutel] for sleutel in UITKOMSTEN}
+
+
+def _simuleer_args(args):
+    return _simuleer(*args)
+
+
+# Simuleert n_samples scenario's voor één gebouw met vlakken als arrays van vorm (vlakken,).
+# distributions bevat per parameter uit GEBOUW_PARAMETERS een verdeling (zie sample), en optioneel
+# rc_factor en installation_factor. Met processes > 1 worden de trekkingen over processen verdeeld,
+# elk met een eigen onafhankelijke stroom uit dezelfde seed.
+# Geeft per uitkomst een array van vorm (n_samples, vlakken) terug, plus totalen van vorm (n_samples,).
+def simulate(area, current_rc, desired_rc, material_kost, installation_kost, emissie_per_kwh,
+             distributions, n_samples=100_000, seed=None, processes=1, hours_per_year=4800):
+    ontbrekend = [naam for naam in GEBOUW_PARAMETERS if naam not in distributions]
+    if ontbrekend:
+        raise ValueError(f"Geen verdeling opgegeven voor: {', '.join(ontbrekend)}")
+
+    vaste = (np.asarray(area, dtype=float), np.asarray(current_rc, dtype=float), np.asarray(desired_rc, dtype=float),
+             np.asarray(material_kost, dtype=float), np.asarray(installation_kost, dtype=float), emissie_per_kwh)
+    seeds = np.random.SeedSequence(seed).spawn(max(processes, 1))
+    delen = np.array_split(np.arange(n_samples), len(seeds))
+    taken = [(*vaste, distributions, len(deel), s, hours_per_year) for deel, s in zip(delen, seeds)]
+
+    if len(taken) == 1:
+        resultaten = [_simuleer(*taken[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(taken)) as pool:
+            resultaten = list(pool.map(_simuleer_args, taken))
+    samples = {sleutel: np.concatenate([r[sleutel] for r in resultaten]) for sleutel in UITKOMSTEN}
+
+    # Totalen zoals in de app: sommen over de vlakken en de langste terugverdientijd
+    samples["total"] = {
+        "cost": samples["total_kost_with"].sum(axis=1),
+        "savings": samples["saved_kWh"].sum(axis=1),
+        "co2_savings": samples["co2_savings"].sum(axis=1),
+        "payback": samples["payback_time"].max(axis=1),
+        "total_savings_euro": samples["savings_euro"].sum(axis=1),
+    }
+    return samples
+
+
+# Percentielen per vlak en voor het totaal als DataFrame met rijen per (categorie, uitkomst)
+def summarize(samples, categories, percentiles=(5, 50, 95)):
+    import pandas as pd
+
+    namen, kolommen = [], []
+    for i, categorie in enumerate(categories):
+        for sleutel in UITKOMSTEN:
+            namen.append((categorie, sleutel))
+            kolommen.append(samples[sleutel][:, i])
+    for sleutel, waarden in samples["total"].items():
+        namen.append(("Totaal", sleutel))
+        kolommen.append(waarden)
+
+    # Eén sortering over alle kolommen tegelijk, daarna lineair interpoleren zoals np.percentile
+    gesorteerd = np.sort(np.vstack(kolommen), axis=1)
+    positie = np.asarray(percentiles, dtype=float) / 100 * (gesorteerd.shape[1] - 1)
+    onder = np.floor(positie).astype(int)
+    boven = np.minimum(onder + 1, gesorteerd.shape[1] - 1)
+    with np.errstate(invalid='ignore'):
+        waarden = gesorteerd[:, onder] + (gesorteerd[:, boven] - gesorteerd[:, onder]) * (positie - onder)
+    waarden = np.where(gesorteerd[:, onder] == gesorteerd[:, boven], gesorteerd[:, onder], waarden)
+    return pd.DataFrame(waarden, index=pd.MultiIndex.from_tuples(namen), columns=[f"P{p}" for p in percentiles])
@@ -0,0 +1,113 @@
+# Vlakken van één of meer gebouwen als kolommen (struct-of-arrays): per invoerveld één array over alle
+# vlakken, plus per vlak de index van het gebouw. Berekening, totalen per gebouw en de resultatentabel
+# werken op hele kolommen, dus het aantal vlakken (muren per oriëntatie, deuren, dakdelen) kost geen
+# Python-werk per vlak.
+import numpy as np
+
+from .berekening import calculate_costs_batch, calculate_energy_labels
+from .parameters import default_parameter_table
+
+VELDEN = ("area", "current_rc", "desired_rc", "material_kost", "installation_kost")
+
+# Kolommen van de resultaten per vlak, zoals in de tabel van de app en de data voor het PDF-rapport
+RESULTAAT_NAMEN = {
+    "total_kost_with": "Kosten (€)",
+    "saved_kWh": "Besparing (kWh)",
+    "co2_savings": "CO2-besparing (kg)",
+    "payback_time": "Terugverdientijd (jaar)",
+    "savings_euro": "Bespaarde energiekosten (€)",
+}
+
+
+# Dubbele namen binnen een gebouw krijgen een volgnummer ("Wand", "Wand (2)"), zodat ze als sleutel kunnen dienen
+def unique_names(names, building=None):
+    gezien = {}
+    uniek = []
+    for i, naam in enumerate(names):
+        sleutel = (0 if building is None else int(building[i]), naam)
+        gezien[sleutel] = gezien.get(sleutel, 0) + 1
+        uniek.append(naam if gezien[sleutel] == 1 else f"{naam} ({gezien[sleutel]})")
+    return uniek
+
+
+class SurfaceTable:
+    def __init__(self, names, area, current_rc, desired_rc, material_kost, installation_kost, building=None):
+        self.area, self.current_rc, self.desired_rc, self.material_kost, self.installation_kost = (
+            np.asarray(waarden, dtype=float) for waarden in (area, current_rc, desired_rc, material_kost, installation_kost))
+        self.building = np.zeros(len(self.area), dtype=np.int64) if building is None else np.asarray(building, dtype=np.int64)
+        self.names = unique_names([str(naam) for naam in names], self.building)
+        self.n_buildings = int(self.building.max()) + 1 if len(self.building) else 0
+
+    # Tabel met een kolom name en de VELDEN, en optioneel building_id (één rij per vlak)
+    @classmethod
+    def from_frame(cls, df):
+        import pandas as pd
+
+        building = None
+        if "building_id" in df:
+            building, _ = pd.factorize(df["building_id"], sort=False)
+        return cls(df["name"].tolist(), *(df[veld].to_numpy(dtype=float) for veld in VELDEN), building=building)
+
+    # Vlakken waarmee de app begint, uit de parametertabel (surfaces)
+    @classmethod
+    def default(cls, parameters=None):
+        namen, *velden = zip(*(parameters or default_parameter_table()).surfaces)
+        return cls(namen, *velden)
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame({"name": self.names, **{veld: getattr(self, veld) for veld in VELDEN}})
+
+    def __len__(self):
+        return len(self.area)
+
+    # Gebouwparameters mogen een getal zijn of een array met één waarde per gebouw
+    def _per_vlak(self, waarde):
+        return np.asarray(waarde, dtype=float)[self.building] if np.ndim(waarde) else waarde
+
+    # Resultaten per vlak in één aanroep van calculate_costs_batch
+    def calculate(self, delta_t, emissie_per_kwh, energy_kost, subsidy_percentage, hours_per_year=4800, degree_hours=None):
+        return calculate_costs_batch(
+            self.area, self.current_rc, self.desired_rc, self.material_kost, self.installation_kost,
+            self._per_vlak(delta_t), self._per_vlak(emissie_per_kwh), self._per_vlak(energy_kost),
+            self._per_vlak(subsidy_percentage), hours_per_year,
+            None if degree_hours is None else self._per_vlak(degree_hours),
+        )
+
+    # Totalen per gebouw zoals in de app: sommen, de langste terugverdientijd en het label
+    # op basis van de totale kWh per m²; arrays met één waarde per gebouw
+    def totals(self, result):
+        def som(waarden):
+            return np.bincount(self.building, weights=waarden, minlength=self.n_buildings)
+
+        payback = np.full(self.n_buildings, -np.inf)
+        np.maximum.at(payback, self.building, result["payback_time"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kwh_per_m2 = som(result["desired_kWh"]) / som(self.area)
+        return {
+            "cost": som(result["total_kost_with"]),
+            "savings": som(result["saved_kWh"]),
+            "co2_savings": som(result["co2_savings"]),
+            "payback": payback,
+            "total_savings_euro": som(result["savings_euro"]),
+            "total_kwh_per_m2_per_year": kwh_per_m2,
+            "energy_label": calculate_energy_labels(kwh_per_m2),
+        }
+
+    # Resultaten per vlak als DataFrame met de kolomnamen van de app; met building alleen dat gebouw
+    def results_frame(self, result, building=None):
+        import pandas as pd
+
+        rijen = slice(None) if building is None else self.building == building
+        tabel = pd.DataFrame({naam: np.asarray(result[sleutel])[rijen] for sleutel, naam in RESULTAAT_NAMEN.items()},
+                             index=pd.Index(np.asarray(self.names)[rijen], name="Categorie"))
+        if building is None and self.n_buildings > 1:
+            tabel.insert(0, "Gebouw", self.building)
+        return tabel
+
+    # Resultaten van één gebouw als dict naam -> (kosten, besparing, co2, terugverdientijd, euro),
+    # het formaat van generate_pdf en de opslag
+    def results_data(self, result, building=0):
+        rijen = np.flatnonzero(self.building == building)
+        kolommen = np.column_stack([np.asarray(result[sleutel])[rijen] for sleutel in RESULTAAT_NAMEN]).tolist()
+        return {self.names[i]: tuple(waarden) for i, waarden in zip(rijen, kolommen)}
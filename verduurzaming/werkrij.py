@@ -0,0 +1,79 @@
+# Begrensde wachtrij voor zwaar werk (PDF-rapporten, portefeuilles) bij veel gelijktijdige gebruikers.
+# Het werk draait in een vaste pool van processen, zodat een paar zware verzoeken de rest van de server
+# niet vertragen. Er staan nooit meer dan max_pending taken tegelijk in de rij; is die vol, dan wacht
+# submit hooguit timeout seconden op een vrije plek en geeft daarna QueueFull, zodat de app de gebruiker
+# kan vragen het zo opnieuw te proberen in plaats van de wachttijd voor iedereen op te laten lopen.
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+# Statische bronnen die elk proces één keer inleest en daarna deelt: lettertype en logo voor de PDF,
+# de labeltabel en de matplotlib-backend. Draait als initializer in elke worker.
+def load_shared_resources():
+    from .labels import default_label_table
+    from .rapport import _bronnen
+    import matplotlib.backends.backend_agg  # noqa: F401
+
+    _bronnen()
+    default_label_table()
+
+
+def default_workers():
+    return int(os.environ.get("VERDUURZAMING_WORKERS", "0")) or os.cpu_count() or 1
+
+
+def default_max_pending(workers):
+    return int(os.environ.get("VERDUURZAMING_MAX_WACHTRIJ", "0")) or workers * 4
+
+
+class WorkQueue:
+    # processes=False gebruikt threads, bijvoorbeeld voor werk dat niet te pickelen is
+    def __init__(self, workers=None, max_pending=None, processes=True, initializer=load_shared_resources):
+        self.workers = workers or default_workers()
+        self.max_pending = max_pending or default_max_pending(self.workers)
+        self._plekken = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._in_rij = 0
+        if processes:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=initializer)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, initializer=initializer,
+                                            thread_name_prefix="werkrij")
+
+    # Zet functie(*args) in de rij en geeft een Future terug; QueueFull als er binnen timeout geen plek is
+    def submit(self, functie, *args, timeout=0.0):
+        if not self._plekken.acquire(timeout=timeout):
+            raise QueueFull(f"Wachtrij vol ({self.max_pending} taken)")
+        with self._lock:
+            self._in_rij += 1
+        try:
+            future = self._pool.submit(functie, *args)
+        except BaseException:
+            self._vrij(None)
+            raise
+        future.add_done_callback(self._vrij)
+        return future
+
+    def _vrij(self, _future):
+        with self._lock:
+            self._in_rij -= 1
+        self._plekken.release()
+
+    # Aantal taken dat wacht of draait
+    @property
+    def pending(self):
+        return self._in_rij
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
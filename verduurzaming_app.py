@@ -1,287 +1,199 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import streamlit as st
-import matplotlib.pyplot as plt
-import pandas as pd
-from fpdf import FPDF
 import numpy as np
+import pandas as pd
 
+from verduurzaming import get_label_color, default_parameter_table
+from verduurzaming.cache import cached_pdf, cache_info
+from verduurzaming.optimalisatie import option_tables, optimize_package, cheapest_package_for_label, rc_for_label
+from verduurzaming.klimaat import climate_year_from_bytes
+from verduurzaming.simulatie import simulate, summarize
+from verduurzaming.gevoeligheid import tornado, grid, METRIEKEN, PARAMETER_NAMEN, GEBOUW_PARAMETERS
+from verduurzaming.kasstroom import project_buildings, discount
+from verduurzaming.profiel import RunProfile, profiling_enabled, export
+from verduurzaming.opslag import ResultStore, make_record
+from verduurzaming.grafieken import cost_savings_spec, co2_spec, tornado_spec, heatmap_spec, scenario_spec
+from verduurzaming.scenario import (default_scenarios, scenario_frame, scenarios_from_frame, compare_scenarios,
+                                    comparison_frame, surfaces_frame, scenario_totals)
+from verduurzaming.vlakken import SurfaceTable, VELDEN
+from verduurzaming.graaf import ComputationGraph, surface_nodes
+from verduurzaming.werkrij import WorkQueue, QueueFull, load_shared_resources
+
+
+# Invoer met een vaste sleutel en standaardwaarde in session_state, zodat een opgeslagen
+# berekening de invoer later kan terugzetten
+INVOER_SLEUTELS = []
+
+def invoer_sleutel(key, default):
+    if key not in st.session_state:
+        st.session_state[key] = default
+    INVOER_SLEUTELS.append(key)
+    return key
+
+# Kolommen van de vlakkentabel; elke rij is een vlak (een muur per oriëntatie, een deur, een dakdeel, ...)
+VLAK_KOLOMMEN = {
+    "name": st.column_config.TextColumn("Vlak", required=True),
+    "area": st.column_config.NumberColumn("Oppervlakte (m²)", min_value=1, max_value=1000, required=True),
+    "current_rc": st.column_config.NumberColumn("Huidige RC-waarde", min_value=0.1, max_value=5.0, step=0.1, required=True),
+    "desired_rc": st.column_config.NumberColumn("Gewenste RC-waarde", min_value=0.1, max_value=5.0, step=0.1, required=True),
+    "material_kost": st.column_config.NumberColumn("Materiaal kosten (m²)", min_value=1.0, max_value=2000.0, step=1.0, required=True),
+    "installation_kost": st.column_config.NumberColumn("Installatie kosten (m²)", min_value=1.0, max_value=2000.0, step=1.0, required=True),
+}
 
-def calculate_energy_label(kwh_per_m2_per_year):
-    if kwh_per_m2_per_year > 355.01:
-        return "G"
-    elif 355.01 >= kwh_per_m2_per_year > 325.01:
-        return "F"
-    elif 325.01 >= kwh_per_m2_per_year > 295.01:
-        return "E"
-    elif 295.01 >= kwh_per_m2_per_year > 260.01:
-        return "D"
-    elif 260.01 >= kwh_per_m2_per_year > 230.01:
-        return "C"
-    elif 230.01 >= kwh_per_m2_per_year > 210.01:
-        return "B"
-    elif 210.01 >= kwh_per_m2_per_year > 180.01:
-        return "A"
-    elif 180.01 >= kwh_per_m2_per_year > 135.01:
-        return "A+"
-    elif 135.01 >= kwh_per_m2_per_year > 90.01:
-        return "A++"
-    elif 90.01 >= kwh_per_m2_per_year > 45.01:
-        return "A+++"
-    elif 45.01 >= kwh_per_m2_per_year > 0.01:
-        return "A++++"
-    else:
-        return "A+++++"
-
-def calculate_u_value(rc_value):
-    return 1 / rc_value
-
-# Functie om energieverlies te berekenen
-def calculate_energy_loss(u_value, area, delta_t, hours_per_year=4800):
-    return (u_value * area * delta_t * hours_per_year) / 1000
-
-# Functie om kostenbesparing te berekenen
-def calculate_savings(q1, q2, energy_cost_per_kwh):
-    energy_saving = q1 - q2
-    cost_saving = energy_saving * energy_cost_per_kwh
-    return energy_saving, cost_saving
-
-# Functie om totale kosten te berekenen inclusief subsidie
-def calculate_total_cost(area, material_cost, installation_cost, subsidy_percentage):
-    total_cost = (material_cost + installation_cost) * area
-    subsidized_cost = total_cost * (1 - subsidy_percentage)
-    return total_cost, subsidized_cost
-
-# Functie om terugverdientijd te berekenen
-def calculate_payback_period(total_cost, annual_savings):
-    return total_cost / annual_savings if annual_savings != 0 else float('inf')
-
-def calculate_CO2(kWh,emissie):
-    return kWh * emissie 
-
-# Functie voor de berekening van kosten, besparing, CO2-besparing en terugverdientijd
-def calculate_costs_with_rc(area, current_rc, desired_rc, cost_per_m2, emissie_per_kwh, delta_t, hours_per_year, subsidy_percentage, energy_kost, material_kost, installation_kost):
-    # Berekening van U-waarde
-    current_u = calculate_u_value(current_rc)
-    desired_u = calculate_u_value(desired_rc)
-
-    # Warmteverlies en energieverbruik
-    current_energy_loss = calculate_energy_loss(current_u, area, delta_t)
-    desired_energy_loss = calculate_energy_loss(desired_u, area, delta_t)
-
-    # kWh kosten besparing
-    current_kWh = current_energy_loss
-    desired_kWh = desired_energy_loss
-    saved_kWh = current_kWh - desired_kWh
-    savings_euro = saved_kWh * energy_kost 
-
-    # verduurzaming
-    total_kost_without = (material_kost * area) + (installation_kost * area)
-    Add_subsidie = (total_kost_without / 100) * subsidy_percentage
-    total_kost_with = total_kost_without - Add_subsidie
-
-    # CO2 to kg
-    co2_savings = saved_kWh * emissie_per_kwh
-
-    # Terugverdientijd
-    payback_time = total_kost_with / savings_euro if savings_euro != 0 else float('inf')
-
-    return total_kost_with, saved_kWh, co2_savings, payback_time, savings_euro, desired_kWh
-
-
-# Functie voor PDF generatie met professionele opmaak
-def generate_pdf(data, totals):
-    pdf = FPDF()
-    pdf.add_page()
-    
-    # Voeg het standaard DejaVu-lettertype toe
-    pdf.add_font('DejaVu', '', 'dejavu-sans-bold.ttf', uni=True)
-    pdf.set_font("DejaVu", size=12)
-    
-    # Add local logo
-    logo_path = "logo-Bb-DW.jpg"  # Update this path to your local image file
-    pdf.image(logo_path, x=80, y=10, w=50)  # Centered on the page
-    pdf.ln(30)  # Add some space below the logo
-
-    pdf.set_font("DejaVu", size=16)
-    pdf.cell(200, 10, txt="BBDW - Resultaten Verduurzaming", ln=True, align='C')
-    pdf.ln(10)
-    pdf.set_line_width(0.5)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(10)
-
-    # Hoofdtekst
-    pdf.set_font("DejaVu", size=12)
-    for category, (cost, savings, co2_savings, payback, total_savings_euro) in data.items():
-        pdf.cell(200, 10, txt=f"{category} - Resultaten", ln=True)
-        text = (f"Kosten: €{cost:,.2f}\n"
-                f"Besparing per jaar: {savings:,.2f} kWh\n"
-                f"CO2-besparing: {co2_savings:,.2f} kg\n"
-                f"Terugverdientijd: {payback:,.2f} jaar\n"
-                f"Bespaarde energiekosten: €{total_savings_euro:,.2f}")
-        pdf.multi_cell(0, 10, txt=text)
-        pdf.ln(5)
-
-    pdf.ln(10)
-    pdf.cell(200, 10, txt="Totale Resultaten", ln=True)
-    totals_text = (f"Totaal Kosten: €{totals['cost']:,.2f}\n"
-                   f"Totaal Besparing per jaar: {totals['savings']:,.2f} kWh\n"
-                   f"Totaal CO2-besparing: {totals['co2_savings']:,.2f} kg\n"
-                   f"Totaal Terugverdientijd: {totals['payback']:,.2f} jaar\n"
-                   f"Totaal Bespaarde energiekosten: €{totals['total_savings_euro']:,.2f}\n")
-    pdf.multi_cell(0, 10, txt=totals_text)
-    
-    # Add energy label with background color
-    label_color = get_label_color(totals["energy_label"])
-    r, g, b = tuple(int(label_color[i:i+2], 16) for i in (1, 3, 5))  # Convert hex to RGB
-    pdf.set_fill_color(r, g, b)
-    pdf.cell(200, 10, txt=f"Energielabel: {totals['energy_label']}", ln=True, fill=True)
-    pdf.ln(10)
-
-    pdf.set_font("DejaVu", size=8)
-    pdf.cell(200, 10, txt="Contact: info@bbdw.nl | www.bbdw.nl", ln=True, align='C')
-
-    pdf_output = "verduurzaming_resultaten_professioneel.pdf"
-    pdf.output(pdf_output)
-    return pdf_output
-
-# Functie voor het genereren van de invoer voor elke categorie
-def generate_category_input(category_name, default_area, default_current_rc, default_desired_rc, cost_per_m2):
-    st.subheader(category_name)
-    area = st.number_input(f"Oppervlakte {category_name.lower()} (m²):", min_value=1, max_value=1000, value=default_area)
-    current_rc = st.number_input(f"Huidige RC-waarde {category_name.lower()}:", min_value=0.1, max_value=5.0, value=default_current_rc, step=0.1)
-    desired_rc = st.number_input(f"Gewenste RC-waarde {category_name.lower()}:", min_value=0.1, max_value=5.0, value=default_desired_rc, step=0.1)
-    material_kost = st.number_input(f"Materiaal kosten {category_name.lower()} (m²):", min_value=1.0, max_value=2000.0, value=20.0, step=1.0)
-    installatie_kost = st.number_input(f"Installatie kosten {category_name.lower()} (m²):", min_value=1.0, max_value=2000.0, value=10.0, step=1.0)
-    return area, current_rc, desired_rc, material_kost, installatie_kost
+# Gedeelde database voor alle sessies van dit proces
+@st.cache_resource
+def result_store():
+    return ResultStore(os.environ.get("VERDUURZAMING_DB", "verduurzaming.sqlite"))
+
+# Servermodus voor veel gelijktijdige gebruikers (VERDUURZAMING_SERVING=1): statische bronnen worden één keer
+# per proces geladen, PDF-rapporten gaan via een begrensde wachtrij met een pool van processen en het rapport
+# van een sessie blijft in session_state
+SERVING = os.environ.get("VERDUURZAMING_SERVING") == "1"
+
+# Maximale wachttijd (seconden) op een plek in de wachtrij voordat de gebruiker een melding krijgt
+WACHTRIJ_TIMEOUT = float(os.environ.get("VERDUURZAMING_WACHTRIJ_TIMEOUT", "2"))
+
+@st.cache_resource
+def gedeelde_bronnen():
+    load_shared_resources()
+    return True
+
+@st.cache_resource
+def werkrij():
+    return WorkQueue()
+
+# Gedeelde threadpool voor het gelijktijdig maken van grafieken, tabel en PDF, één per proces
+@st.cache_resource
+def render_pool():
+    return ThreadPoolExecutor(max_workers=int(os.environ.get("VERDUURZAMING_RENDER_THREADS", "4")), thread_name_prefix="render")
+
+# Uitvoer die op de pool wordt gemaakt: future -> (plaatshouder, functie die het resultaat toont)
+RENDER_TAKEN = {}
+
+# Zet werk op de pool en houdt een plaatshouder vrij op de huidige plek in de pagina
+def render_concurrently(toon, wacht_tekst, functie, *args):
+    plek = st.empty()
+    plek.caption(wacht_tekst)
+    RENDER_TAKEN[render_pool().submit(functie, *args)] = (plek, toon)
+
+# Zet de invoer van een opgeslagen berekening terug; draait als callback vóór de volgende run.
+# De vlakkentabel krijgt een nieuwe sleutel, zodat de bewerkingen in de editor niet blijven hangen.
+def open_calculation(inputs):
+    for key, value in inputs.items():
+        if key == "vlakken":
+            st.session_state["vlakken"] = pd.DataFrame(value, columns=["name", *VELDEN])
+            st.session_state["vlakken_versie"] = st.session_state.get("vlakken_versie", 0) + 1
+        else:
+            st.session_state[key] = value
+
+if SERVING:
+    gedeelde_bronnen()
+
+# Meting per fase, aan met VERDUURZAMING_PROFIEL=1 of ?debug=1 in de url. Geheugen (tracemalloc, voor het hele
+# proces) alleen met VERDUURZAMING_PROFIEL, zodat een bezoeker het niet voor alle sessies kan aanzetten
+profiel = RunProfile(profiling_enabled() or st.query_params.get("debug") == "1", memory=profiling_enabled())
+profiel.mark("input")
+
+# Emissie, stookuren en standaardwaarden uit de parametertabel; de versie komt bij opgeslagen berekeningen
+parameters = default_parameter_table()
+standaard = parameters.defaults
 
 # Streamlit layout
 st.title("Verduurzamingscalculator voor BBDW")
-subsidie_percentage = st.slider('Kies het percentage subsidie:', 0, 30, 20)
-
-delta_t = st.number_input("Temperatuurverschil (ΔT) tussen binnen en buiten (°C):", min_value=1, max_value=50, value=15)
-hours_per_year = 4800
-heating_type = st.selectbox("Kies het type verwarming:", ["Gas", "Elektriciteit gemiddeld", "Stadsverwarming","Zonne energie"])
-Energy_kost = st.number_input("Energie kosten (euro/kWh)", min_value=0.0, max_value=50.0, value=0.6)
-
-emissie = {
-        "Gas": 0.184,
-        "Elktriciteit gemiddeld": 0.4,
-        "Stadsverwarming": 0.18,
-        "Zonne energie": 0.02, 
-    }
-
-emissie_per_kwh = emissie.get(heating_type, 0.10)
-
-# Categorieën voor vloer, dak, wanden en ramen
-floor_area, floor_current_rc, floor_desired_rc, floor_materiaal_kost, floor_installatie_kost = generate_category_input('Vloer', 50, 2.5, 4.0, 20)
-roof_area, roof_current_rc, roof_desired_rc, roof_materiaal_kost, roof_installatie_kost = generate_category_input('Dak', 50, 2.5, 4.0, 50)
-wall_area, wall_current_rc, wall_desired_rc, wall_materiaal_kost, wall_installatie_kost = generate_category_input('Wanden', 50, 2.5, 4.0, 30)
-window_area, window_current_rc, window_desired_rc, window_materiaal_kost, window_installatie_kost = generate_category_input('Ramen', 50, 2.5, 4.0, 100)
-
-# Berekeningen voor alle categorieën
-floor_total_kost_with, floor_saved_kWh, floor_co2_savings, floor_payback_time, floor_savings_euro, floor_desired_kWh = calculate_costs_with_rc(
-    floor_area, floor_current_rc, floor_desired_rc, 16, emissie_per_kwh, delta_t, hours_per_year,subsidie_percentage,Energy_kost,floor_materiaal_kost,floor_installatie_kost)
-roof_total_kost_with, roof_saved_kWh, roof_co2_savings, roof_payback_time, roof_savings_euro, roof_desired_kWh = calculate_costs_with_rc(
-    roof_area, roof_current_rc, roof_desired_rc, 50, emissie_per_kwh, delta_t, hours_per_year,subsidie_percentage,Energy_kost,roof_materiaal_kost,roof_installatie_kost)
-wall_total_kost_with, wall_saved_kWh, wall_co2_savings, wall_payback_time, wall_savings_euro, wall_desired_kWh = calculate_costs_with_rc(
-    wall_area, wall_current_rc, wall_desired_rc, 30, emissie_per_kwh, delta_t, hours_per_year,subsidie_percentage,Energy_kost,wall_materiaal_kost,wall_installatie_kost)
-window_total_kost_with, window_saved_kWh, window_co2_savings, window_payback_time, window_savings_euro, window_desired_kWh = calculate_costs_with_rc(
-    window_area, window_current_rc, window_desired_rc, 100, emissie_per_kwh, delta_t, hours_per_year,subsidie_percentage,Energy_kost,window_materiaal_kost,window_installatie_kost)
-
-# Toepassing van de subsidie
-floor_cost = floor_total_kost_with
-roof_cost = roof_total_kost_with
-wall_cost = wall_total_kost_with
-window_cost = window_total_kost_with
-paybacks = np.array([floor_payback_time,roof_payback_time,wall_payback_time,window_payback_time])
-total_kwh_per_m2_per_year = (floor_desired_kWh + roof_desired_kWh + wall_desired_kWh + window_desired_kWh) / (floor_area + roof_area + wall_area + window_area)
-energy_label = calculate_energy_label(total_kwh_per_m2_per_year)
-
-# Totale kosten, besparingen, CO2-besparing, terugverdientijd inclusief verwarming
-total_cost = floor_cost + roof_cost + wall_cost + window_cost
-total_savings = floor_saved_kWh + roof_saved_kWh + wall_saved_kWh + window_saved_kWh
-total_co2_savings = floor_co2_savings + roof_co2_savings + wall_co2_savings + window_co2_savings
-total_payback = paybacks[paybacks.argmax()]
-total_savings_euro = floor_savings_euro + roof_savings_euro + wall_savings_euro + window_savings_euro
-
-# Data voor grafieken
-categories = ['Vloer', 'Dak', 'Wanden', 'Ramen']
-costs = [floor_cost, roof_cost, wall_cost, window_cost]
-savings = [floor_saved_kWh, roof_saved_kWh, wall_saved_kWh, window_saved_kWh]
-co2_savings = [floor_co2_savings, roof_co2_savings, wall_co2_savings, window_co2_savings]
-
-# Grafiek voor kosten en besparingen met dubbele y-as
-fig, ax1 = plt.subplots(figsize=(10, 6))
-
-# Primaire y-as voor kosten
-ax1.bar(categories, costs, width=0.35, label="Kosten (€)", color='skyblue', align='center')
-ax1.set_ylabel('Kosten (€)', color='blue')
-ax1.set_xlabel('Categorieën')
-ax1.tick_params(axis='y', labelcolor='blue')
-
-# Secundaire y-as voor besparingen
-ax2 = ax1.twinx()  # Maak een tweede y-as die dezelfde x-as deelt
-ax2.bar([i + 0.35 for i in range(len(categories))], savings, width=0.35, label="Besparing (kWh)", color='lightgreen', align='center')
-ax2.set_ylabel('Besparing (kWh)', color='green')
-ax2.tick_params(axis='y', labelcolor='green')
-
-# Titel en legenda
-plt.title('Kosten en Besparing per Categorie')
-fig.legend(loc="upper left", bbox_to_anchor=(0.1, 0.9))
-
-# Weergeven van de grafiek
-st.pyplot(fig)
-
-# Staafdiagram voor CO2-besparing
-fig2, ax2 = plt.subplots(figsize=(10, 6))
-ax2.bar(categories, co2_savings, color='lightcoral')
-ax2.set_title('CO2-besparing per Categorie')
-ax2.set_xlabel('Categorieën')
-ax2.set_ylabel('CO2-besparing (kg)')
-st.pyplot(fig2)
+subsidie_percentage = st.slider('Kies het percentage subsidie:', 0, 30, key=invoer_sleutel("subsidie_percentage", int(standaard["subsidy_percentage"])))
+
+delta_t = st.number_input("Temperatuurverschil (ΔT) tussen binnen en buiten (°C):", min_value=1, max_value=50, key=invoer_sleutel("delta_t", int(standaard["delta_t"])))
+hours_per_year = parameters.hours_per_year
+
+# Optioneel: graaduren uit een klimaatjaar in plaats van een vaste ΔT en stookuren.
+# Gemiddelde ΔT maal het aantal uren is precies gelijk aan de graaduren, dus de formules blijven gelijk.
+if st.checkbox("Klimaatjaar met uurtemperaturen gebruiken"):
+    klimaat_bestand = st.file_uploader("CSV met uurtemperaturen (kolom temperature, of KNMI-kolom T in 0,1 °C):", type="csv")
+    setpoint = st.number_input("Stooktemperatuur binnen (°C):", min_value=10.0, max_value=25.0, value=20.0, step=0.5)
+    if klimaat_bestand is not None:
+        try:
+            klimaat = climate_year_from_bytes(klimaat_bestand.getvalue())
+        except ValueError as fout:
+            st.error(f"Klimaatjaar kan niet worden ingelezen: {fout}")
+        else:
+            delta_t = float(klimaat.mean_delta_t(setpoint))
+            hours_per_year = klimaat.hours
+            st.caption(f"{klimaat.hours} uur, {klimaat.degree_hours(setpoint):,.0f} graaduren, gemiddelde ΔT {delta_t:.2f} °C")
+heating_type = st.selectbox("Kies het type verwarming:", list(parameters.emission), key=invoer_sleutel("heating_type", standaard["heating_type"]))
+Energy_kost = st.number_input("Energie kosten (euro/kWh)", min_value=0.0, max_value=50.0, key=invoer_sleutel("Energy_kost", standaard["energy_kost"]))
+
+emissie_per_kwh = parameters.emission_for(heating_type)
+
+# Gelijktijdig renderen: grafieken, tabel en PDF worden op een threadpool gemaakt terwijl de rest van de
+# pagina wordt opgebouwd, en verschijnen zodra ze klaar zijn. De run duurt dan ongeveer zo lang als de
+# traagste uitvoer in plaats van de som. Standaard aan met VERDUURZAMING_GELIJKTIJDIG=1.
+gelijktijdig = st.sidebar.toggle("Gelijktijdig renderen", value=os.environ.get("VERDUURZAMING_GELIJKTIJDIG") == "1")
+
+# Vlakken van de woning, standaard vloer, dak, wanden en ramen
+st.subheader("Vlakken")
+if "vlakken" not in st.session_state:
+    st.session_state["vlakken"] = SurfaceTable.default(parameters).to_frame()
+vlakken_invoer = st.data_editor(st.session_state["vlakken"], column_config=VLAK_KOLOMMEN, num_rows="dynamic", hide_index=True,
+                                key=f"vlakken_editor_{st.session_state.get('vlakken_versie', 0)}")
+# Half ingevulde nieuwe rijen tellen nog niet mee
+vlakken_invoer = vlakken_invoer.dropna()
+if vlakken_invoer.empty:
+    st.warning("Voeg minimaal één vlak toe.")
+    st.stop()
+vlakken = SurfaceTable.from_frame(vlakken_invoer)
+
+profiel.mark("compute")
+
+# Rekengraaf van deze sessie: invoer -> resultaat per vlak -> totalen -> label -> grafieken, tabel en PDF.
+# Alleen vlakken waarvan de invoer veranderd is en wat daarvan afhangt worden opnieuw berekend; de rest komt
+# uit de vorige run. Totalen zoals voorheen: sommen, de langste terugverdientijd en het label op basis van de
+# totale kWh per m²
+graaf = st.session_state.setdefault("graaf", ComputationGraph())
+graaf.reset_stats()
+surface_nodes(graaf, vlakken, (delta_t, emissie_per_kwh, Energy_kost, subsidie_percentage, hours_per_year))
+# Resultaten per categorie; de tabel is ook de bron voor de grafieken
+graaf.node("data", lambda vlakken, resultaat: vlakken.results_data(resultaat), "vlakken", "resultaat")
+graaf.node("df", lambda vlakken, resultaat: vlakken.results_frame(resultaat), "vlakken", "resultaat")
+graaf.node("label_kleur", lambda totals: get_label_color(totals["energy_label"]), "totals")
+graaf.node("kosten_grafiek", cost_savings_spec, "df")
+graaf.node("co2_grafiek", co2_spec, "df")
+
+resultaat = graaf.get("resultaat")
+totals = graaf.get("totals")
+data = graaf.get("data")
+df = graaf.get("df")
+
+categories = vlakken.names
+
+profiel.mark("charts")
+
+# Grafieken worden in de browser getekend (Vega-Lite); matplotlib is alleen nog voor het PDF-rapport
+if gelijktijdig:
+    for grafiek in ("kosten_grafiek", "co2_grafiek"):
+        render_concurrently(lambda plek, resultaat: plek.vega_lite_chart(resultaat, width="stretch"),
+                            "Grafiek wordt gemaakt…", graaf.get, grafiek)
+else:
+    st.vega_lite_chart(graaf.get("kosten_grafiek"), width="stretch")
+    st.vega_lite_chart(graaf.get("co2_grafiek"), width="stretch")
+
+profiel.mark("table")
 
 # Resultaten tonen
 st.subheader("Resultaten per categorie")
-data = {
-    "Vloer": (floor_cost, floor_saved_kWh, floor_co2_savings, floor_payback_time, floor_savings_euro),
-    "Dak": (roof_cost, roof_saved_kWh, roof_co2_savings, roof_payback_time, roof_savings_euro),
-    "Wanden": (wall_cost, wall_saved_kWh, wall_co2_savings, wall_payback_time, wall_savings_euro),
-    "Ramen": (window_cost, window_saved_kWh, window_co2_savings, window_payback_time, window_savings_euro)
-}
-
-df = pd.DataFrame.from_dict(data, orient='index', columns=["Kosten (€)", "Besparing (kWh)", "CO2-besparing (kg)", "Terugverdientijd (jaar)", "Bespaarde energiekosten (€)"])
-st.dataframe(df)
+if gelijktijdig:
+    # De omzetting naar Arrow, die st.dataframe anders in de run zelf doet, gebeurt op de pool
+    import pyarrow as pa
+    graaf.node("arrow_tabel", pa.Table.from_pandas, "df")
+    render_concurrently(lambda plek, resultaat: plek.dataframe(resultaat), "Tabel wordt gemaakt…", graaf.get, "arrow_tabel")
+else:
+    st.dataframe(df)
 
 # Totale resultaten in een tabel
-def get_label_color(energy_label):
-    label_colors = {
-        "G": "#FF0000",  # Red
-        "F": "#FF4000",  # Orange-Red
-        "E": "#FF8000",  # Orange
-        "D": "#FFBF00",  # Yellow-Orange
-        "C": "#FFFF00",  # Yellow
-        "B": "#BFFF00",  # Yellow-Green
-        "A": "#80FF00",  # Light Green
-        "A+": "#40FF00",  # Green
-        "A++": "#00FF00",  # Bright Green
-        "A+++": "#00FF80",  # Light Blue-Green
-        "A++++": "#00FFBF",  # Blue-Green
-        "A+++++": "#00FFFF"  # Cyan
-    }
-    return label_colors.get(energy_label, "#FFFFFF")  # Default to white if not found
-
 st.subheader("Totale resultaten")
 
-totals = {
-    "cost": total_cost,
-    "savings": total_savings,
-    "co2_savings": total_co2_savings,
-    "payback": total_payback,
-    "total_savings_euro": total_savings_euro,
-    "total_kwh_per_m2_per_year": total_kwh_per_m2_per_year,
-    "energy_label": energy_label
-}
-
-label_color = get_label_color(totals["energy_label"])
+label_color = graaf.get("label_kleur")
 
 totals_text = f"""
 **Totale Kosten:** €{totals['cost']:,.2f}  
@@ -294,67 +206,279 @@ totals_text = f"""
 """
 
 st.markdown(totals_text, unsafe_allow_html=True)
-
-# PDF knop
-if st.button('Genereer PDF'):
-    data = {
-        'Vloer': (floor_cost, floor_saved_kWh, floor_co2_savings, floor_payback_time, floor_savings_euro),
-        'Dak': (roof_cost, roof_saved_kWh, roof_co2_savings, roof_payback_time, roof_savings_euro),
-        'Wanden': (wall_cost, wall_saved_kWh, wall_co2_savings, wall_payback_time, wall_savings_euro),
-        'Ramen': (window_cost, window_saved_kWh, window_co2_savings, window_payback_time, window_savings_euro)
-    }
-    totals = {
-        'cost': total_cost,
-        'savings': total_savings,
-        'co2_savings': total_co2_savings,
-        'payback': total_payback,
-        'total_savings_euro': total_savings_euro,
-        'energy_label': energy_label
-    }
-    
-    # PDF genereren
-    pdf_file = generate_pdf(data, totals)
-    
-    # Lees de gegenereerde PDF in binair formaat
-    with open(pdf_file, "rb") as file:
-        pdf_data = file.read()
-    
-    # Download knop voor de PDF
-    st.download_button(
+st.caption(f"Parametertabel {parameters.table_version}")
+
+profiel.mark("scenarios")
+
+# Scenario's: varianten van deze woning naast elkaar, samen doorgerekend; ze komen ook in het PDF-rapport
+pdf_scenarios = None
+with st.expander("Scenario's vergelijken"):
+    st.caption("Per scenario de RC-waarde waarnaar een vlak wordt geïsoleerd; een leeg vak is niet isoleren.")
+    if "scenarios" not in st.session_state:
+        st.session_state["scenarios"] = scenario_frame(default_scenarios(vlakken), vlakken.names)
+    # Nieuwe of hernoemde vlakken krijgen een lege kolom; de editor begint dan opnieuw vanaf de opgeslagen scenario's
+    scenario_invoer = st.data_editor(
+        st.session_state["scenarios"].reindex(columns=["Scenario", *vlakken.names]),
+        column_config={"Scenario": st.column_config.TextColumn("Scenario", required=True),
+                       **{naam: st.column_config.NumberColumn(naam, min_value=0.1, max_value=20.0, step=0.1)
+                          for naam in vlakken.names}},
+        num_rows="dynamic", hide_index=True, key=f"scenario_editor_{hash(tuple(vlakken.names))}")
+    scenario_invoer = scenario_invoer.dropna(subset=["Scenario"])
+    if scenario_invoer.empty:
+        st.write("Voeg een scenario toe om te vergelijken.")
+    else:
+        # Ook in de graaf: een andere grafiekkeuze rekent de scenario's niet opnieuw door, een gewijzigd vlak wel
+        graaf.input("scenarios", scenarios_from_frame(scenario_invoer))
+        graaf.node("vergelijking", lambda vlakken, parameters, scenarios: compare_scenarios(vlakken, scenarios, *parameters),
+                   "vlakken", "parameters", "scenarios")
+        graaf.node("vergelijking_tabel", comparison_frame, "vergelijking")
+        graaf.node("scenario_vlakken", surfaces_frame, "vergelijking")
+        graaf.node("scenario_totalen", scenario_totals, "vergelijking")
+        vergelijking = graaf.get("vergelijking")
+        st.dataframe(graaf.get("vergelijking_tabel"))
+        graaf.input("scenario_kolom", st.selectbox("Grafiek:", ["Besparing (kWh)", "Kosten (€)", "CO2-besparing (kg)",
+                                                                "Bespaarde energiekosten (€)"]))
+        graaf.node("scenario_grafiek", scenario_spec, "scenario_vlakken", "scenario_kolom")
+        st.vega_lite_chart(graaf.get("scenario_grafiek"), width="stretch")
+        st.caption(f"{len(vergelijking['names'])} scenario's met {vergelijking['unique']} unieke vlakberekeningen.")
+        if st.checkbox("Scenario's opnemen in het PDF-rapport", value=True):
+            pdf_scenarios = graaf.get("scenario_totalen")
+
+profiel.mark("storage")
+
+# Opslaan en terugzoeken van berekeningen per gebouw
+with st.sidebar:
+    st.subheader("Opgeslagen berekeningen")
+    building_id = st.text_input("Gebouw-ID:")
+    if building_id:
+        store = result_store()
+        if st.button("Berekening opslaan"):
+            # Het wegschrijven gebeurt op de achtergrond; de run wacht er niet op
+            invoer = {key: st.session_state[key] for key in INVOER_SLEUTELS}
+            invoer["vlakken"] = vlakken.to_frame().to_dict("records")
+            store.save(make_record(building_id, invoer, data, totals, parameter_version=parameters.table_version))
+            st.caption("Berekening wordt opgeslagen.")
+        for berekening in store.history(building_id, limit=10):
+            st.button(f"{berekening['created_at']} – label {berekening['energy_label']}, €{berekening['cost']:,.0f}",
+                      key=f"open_{berekening['id']}", on_click=open_calculation, args=(berekening["inputs"],))
+    if st.checkbox("Toon totalen per energielabel"):
+        st.dataframe(result_store().aggregate("energy_label"))
+
+profiel.mark("pdf")
+
+# Download van het PDF-rapport, met grafieken
+def toon_pdf(plek, pdf_data):
+    plek.download_button(
         label="Download PDF",
         data=pdf_data,
-        file_name=pdf_file,
+        file_name="verduurzaming_resultaten_professioneel.pdf",
         mime="application/pdf"
     )
 
+pdf_invoer = (tuple(data.items()), tuple(totals.items()), True, pdf_scenarios)
+# Het rapport is het laatste knooppunt van de graaf en wordt alleen gemaakt als erom gevraagd wordt
+graaf.input("pdf_scenarios", pdf_scenarios)
+graaf.node("pdf", lambda data, totals, scenarios: cached_pdf(tuple(data.items()), tuple(totals.items()), True, scenarios),
+           "data", "totals", "pdf_scenarios")
+
+# In de servermodus gaat het rapport via de wachtrij en blijft het bewaard in de sessie zolang de invoer gelijk is.
+# Het wordt daar alleen op verzoek gemaakt, ook bij gelijktijdig renderen, zodat reruns de rij niet vullen.
+if SERVING:
+    if st.session_state.get("pdf", (None, None))[0] == pdf_invoer:
+        toon_pdf(st, st.session_state["pdf"][1])
+    elif st.button('Genereer PDF'):
+        try:
+            future = werkrij().submit(cached_pdf, *pdf_invoer, timeout=WACHTRIJ_TIMEOUT)
+        except QueueFull:
+            st.warning("Het is op dit moment erg druk. Probeer het over een paar seconden opnieuw.")
+        else:
+            with st.spinner("PDF wordt gemaakt…"):
+                st.session_state["pdf"] = (pdf_invoer, future.result())
+            toon_pdf(st, st.session_state["pdf"][1])
+# PDF knop; het rapport wordt pas gemaakt als erom gevraagd wordt en blijft in het geheugen. Gelijktijdig
+# gebeurt dat op de pool, terwijl de rest van de pagina wordt opgebouwd
+elif st.button('Genereer PDF'):
+    if gelijktijdig:
+        render_concurrently(toon_pdf, "PDF wordt gemaakt…", graaf.get, "pdf")
+    else:
+        toon_pdf(st, graaf.get("pdf"))
+
+profiel.mark("advice")
+
 # AI Advies
 if st.button('Vraag AI Advies'):
-    # Calculate a score for each category based on savings and payback time
-    scores = {
-        'Vloer': floor_savings_euro / floor_payback_time if floor_payback_time != float('inf') else 0,
-        'Dak': roof_savings_euro / roof_payback_time if roof_payback_time != float('inf') else 0,
-        'Wanden': wall_savings_euro / wall_payback_time if wall_payback_time != float('inf') else 0,
-        'Ramen': window_savings_euro / window_payback_time if window_payback_time != float('inf') else 0
-    }
-    
+    # Score per vlak: bespaarde energiekosten gedeeld door de terugverdientijd, 0 bij een oneindige terugverdientijd
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(np.isfinite(resultaat["payback_time"]), resultaat["savings_euro"] / resultaat["payback_time"], 0)
+
     # Determine the best category to focus on
-    best_category = max(scores, key=scores.get)
-    
-    # Get the savings and payback time for the best category
-    if best_category == 'Vloer':
-        savings = floor_savings_euro
-        payback_time = floor_payback_time
-    elif best_category == 'Dak':
-        savings = roof_savings_euro
-        payback_time = roof_payback_time
-    elif best_category == 'Wanden':
-        savings = wall_savings_euro
-        payback_time = wall_payback_time
-    else:  # 'Ramen'
-        savings = window_savings_euro
-        payback_time = window_payback_time
-    
+    beste = int(np.argmax(scores))
+    best_category = categories[beste]
+    savings = resultaat["savings_euro"][beste]
+    payback_time = resultaat["payback_time"][beste]
+
     # Provide advice based on the best category
     advies = (f"Op basis van uw doel om zoveel mogelijk geld te besparen in de kortst mogelijke tijd, raden wij aan om te focussen op de {best_category.lower()}. "
               f"Dit zal naar verwachting een besparing van €{savings:.2f} per jaar opleveren met een terugverdientijd van {payback_time:.2f} jaar.")
     st.write(advies)
+
+profiel.mark("analysis")
+
+# Pakketadvies: beste combinatie van RC-niveaus per vlak binnen een budget of voor een doellabel
+with st.expander("Pakketadvies"):
+    pakket_doel = st.selectbox("Doel van het pakket:", ["Meeste kWh besparing", "Meeste CO2-besparing", "Goedkoopst naar energielabel"])
+    if pakket_doel == "Goedkoopst naar energielabel":
+        labels = list(parameters.labels.labels[::-1])
+        doel_label = st.selectbox("Gewenst energielabel:", labels, index=labels.index("A") if "A" in labels else 0)
+        # Continu: elke RC-waarde tot de bovengrens is mogelijk, in plaats van de vaste stappen van 0,5
+        continu = st.checkbox("Continue RC-waarden (vrij te kiezen dikte)")
+        max_rc = st.number_input("Hoogste RC-waarde per vlak:", min_value=1.0, max_value=20.0, value=10.0, step=0.5,
+                                 disabled=not continu)
+    else:
+        budget = st.number_input("Budget (€):", min_value=0.0, max_value=1_000_000.0, value=5000.0, step=500.0)
+
+    if st.button('Bereken pakket'):
+        # Kandidaat-RC-niveaus; materiaalkosten schalen met de RC-waarde (dikte), installatiekosten niet
+        rc_niveaus = np.arange(0.5, 6.01, 0.5)
+        kost_per_m2 = (vlakken.material_kost / vlakken.desired_rc)[:, None] * rc_niveaus + vlakken.installation_kost[:, None]
+        tabellen = option_tables(
+            vlakken.area[None, :],
+            vlakken.current_rc[None, :],
+            rc_niveaus, kost_per_m2, delta_t, emissie_per_kwh, Energy_kost, subsidie_percentage, hours_per_year)
+
+        if pakket_doel == "Goedkoopst naar energielabel" and continu:
+            pakket = rc_for_label(vlakken.area[None, :], vlakken.current_rc[None, :],
+                                  vlakken.material_kost / vlakken.desired_rc, vlakken.installation_kost, doel_label,
+                                  delta_t, emissie_per_kwh, Energy_kost, subsidie_percentage, hours_per_year,
+                                  max_rc=max_rc)
+            haalbaar = bool(pakket["feasible"][0])
+        elif pakket_doel == "Goedkoopst naar energielabel":
+            pakket = cheapest_package_for_label(tabellen, doel_label)
+            haalbaar = bool(pakket["feasible"][0])
+        else:
+            pakket = optimize_package(tabellen, budget, "kwh" if pakket_doel == "Meeste kWh besparing" else "co2")
+            haalbaar = True
+
+        if not haalbaar:
+            st.write(f"Label {doel_label} is met deze RC-niveaus niet haalbaar.")
+        else:
+            st.dataframe({
+                "Categorie": categories,
+                "Huidige RC": vlakken.current_rc,
+                "Geadviseerde RC": pakket["rc"][0],
+            })
+            st.write(f"Kosten: €{pakket['cost'][0]:,.2f} | Besparing: {pakket['saved_kWh'][0]:,.2f} kWh | "
+                     f"CO2-besparing: {pakket['co2_savings'][0]:,.2f} kg | Energielabel: {pakket['energy_label'][0]}")
+
+# Simulatie van de onzekerheid rond de invoer (Monte Carlo)
+with st.expander("Simulatie (onzekerheid)"):
+    sim_prijs_sd = st.slider("Spreiding energieprijs (% standaardafwijking):", 0, 50, 15)
+    sim_delta_t = st.slider("Bandbreedte ΔT (°C, min-max):", 0, 50, (max(round(delta_t) - 3, 0), round(delta_t) + 3))
+    sim_subsidie = st.slider("Bandbreedte subsidie (%, min-max):", 0, 30, (max(subsidie_percentage - 5, 0), min(subsidie_percentage + 5, 30)))
+    sim_rc = st.slider("Behaalde RC (% van de gewenste RC, min-max):", 50, 110, (85, 100))
+    sim_installatie = st.slider("Spreiding installatiekosten (% standaardafwijking):", 0, 50, 20)
+    sim_aantal = st.select_slider("Aantal trekkingen:", options=[1_000, 10_000, 100_000, 1_000_000], value=100_000)
+    sim_seed = st.number_input("Seed:", min_value=0, value=42, step=1)
+
+    if st.button('Start simulatie'):
+        # De huidige ΔT is de top van de driehoeksverdeling; ligt die buiten de bandbreedte, dan de dichtstbijzijnde grens
+        sim_modus = min(max(delta_t, sim_delta_t[0]), sim_delta_t[1])
+        verdelingen = {
+            "energy_kost": ("normal", Energy_kost, Energy_kost * sim_prijs_sd / 100),
+            "delta_t": ("triangular", sim_delta_t[0], sim_modus, sim_delta_t[1]) if sim_delta_t[0] < sim_delta_t[1] else sim_modus,
+            "subsidy_percentage": ("uniform", *sim_subsidie),
+            "rc_factor": ("uniform", sim_rc[0] / 100, sim_rc[1] / 100),
+            "installation_factor": ("normal", 1.0, sim_installatie / 100),
+        }
+        try:
+            trekkingen = simulate(
+                vlakken.area, vlakken.current_rc, vlakken.desired_rc, vlakken.material_kost, vlakken.installation_kost,
+                emissie_per_kwh, verdelingen, n_samples=sim_aantal, seed=int(sim_seed), hours_per_year=hours_per_year)
+        except ValueError as fout:
+            st.error(f"Simulatie niet mogelijk: {fout}")
+        else:
+            st.dataframe(summarize(trekkingen, categories))
+
+# Gevoeligheidsanalyse: welke invoer heeft het meeste effect op de uitkomst
+with st.expander("Gevoeligheidsanalyse"):
+    gev_metriek = st.selectbox("Uitkomst:", list(METRIEKEN), format_func=METRIEKEN.get, index=list(METRIEKEN).index("payback"))
+    gev_variatie = st.slider("Variatie per parameter (±%):", 5, 50, 20)
+    gev_x = st.selectbox("Heatmap horizontaal:", list(GEBOUW_PARAMETERS), format_func=PARAMETER_NAMEN.get, index=GEBOUW_PARAMETERS.index("energy_kost"))
+    gev_y = st.selectbox("Heatmap verticaal:", list(GEBOUW_PARAMETERS), format_func=PARAMETER_NAMEN.get, index=GEBOUW_PARAMETERS.index("subsidy_percentage"))
+
+    if st.checkbox("Toon gevoeligheidsanalyse"):
+        basis = {
+            **{veld: getattr(vlakken, veld) for veld in VELDEN},
+            "delta_t": delta_t,
+            "energy_kost": Energy_kost,
+            "subsidy_percentage": subsidie_percentage,
+            "emissie_per_kwh": emissie_per_kwh,
+        }
+        laag, hoog = 1 - gev_variatie / 100, 1 + gev_variatie / 100
+        gev = tornado(basis, PARAMETER_NAMEN, laag, hoog, gev_metriek, hours_per_year)
+        st.vega_lite_chart(tornado_spec([PARAMETER_NAMEN[p] for p in gev["parameters"]], gev["low"].tolist(),
+                                        gev["high"].tolist(), gev["base"], METRIEKEN[gev_metriek]), width="stretch")
+
+        if gev_x != gev_y:
+            # 50 x 50 raster rond de huidige waarden, van laag tot hoog
+            x_waarden = np.linspace(laag, hoog, 50) * basis[gev_x]
+            y_waarden = np.linspace(laag, hoog, 50) * basis[gev_y]
+            raster = grid(basis, gev_x, x_waarden, gev_y, y_waarden, hours_per_year)[gev_metriek]
+            st.vega_lite_chart(heatmap_spec(x_waarden, y_waarden, raster, PARAMETER_NAMEN[gev_x], PARAMETER_NAMEN[gev_y],
+                                            METRIEKEN[gev_metriek]), width="stretch")
+
+# Kasstroom over meerdere jaren met stijgende energieprijzen en contante waarde
+with st.expander("Kasstroomprojectie"):
+    ks_jaren = st.slider("Horizon (jaren):", 5, 50, 30)
+    ks_rente = st.slider("Disconteringsvoet (%):", 0.0, 15.0, 4.0, step=0.5)
+    ks_stijging = st.slider("Stijging energieprijs per jaar (%):", -5.0, 15.0, 2.0, step=0.5)
+    ks_degradatie = st.slider("Afname besparing per jaar door veroudering (%):", 0.0, 5.0, 0.0, step=0.1)
+    ks_subsidiejaar = st.slider("Jaar van uitkering subsidie:", 0, 5, 0)
+
+    projectie = project_buildings(
+        vlakken.area, vlakken.current_rc, vlakken.desired_rc, vlakken.material_kost, vlakken.installation_kost,
+        delta_t, Energy_kost, subsidie_percentage, discount_rate=ks_rente / 100, years=ks_jaren,
+        escalation=ks_stijging / 100, degradation=ks_degradatie / 100, subsidy_year=ks_subsidiejaar,
+        hours_per_year=hours_per_year)
+
+    kolom_npv, kolom_irr, kolom_terug = st.columns(3)
+    kolom_npv.metric("Netto contante waarde", f"€{float(projectie['building_npv']):,.0f}")
+    irr = float(projectie["building_irr"])
+    kolom_irr.metric("Interne rentabiliteit", "n.v.t." if np.isnan(irr) else f"{irr:.1%}")
+    terug = float(projectie["building_discounted_payback"])
+    kolom_terug.metric("Verdisconteerde terugverdientijd", "niet binnen horizon" if np.isinf(terug) else f"{terug:.1f} jaar")
+
+    st.line_chart({
+        "Cumulatief (nominaal)": np.cumsum(projectie["building_flows"]),
+        "Cumulatief (contant)": np.cumsum(discount(projectie["building_flows"], ks_rente / 100)),
+    })
+    st.dataframe({
+        "Categorie": categories,
+        "NPV": projectie["npv"],
+        "IRR": projectie["irr"],
+        "Verdisconteerde terugverdientijd": projectie["discounted_payback"],
+    })
+
+# Uitvoer van de pool tonen in de volgorde waarin ze klaar is
+profiel.mark("render")
+for future in as_completed(RENDER_TAKEN):
+    plek, toon = RENDER_TAKEN.pop(future)
+    toon(plek, future.result())
+
+# Debugweergave met de tijden en het geheugen per fase van deze run
+run = profiel.finish()
+if run is not None:
+    export(run)
+    with st.sidebar.expander("Debug: profiel van deze run", expanded=True):
+        st.dataframe({
+            "Fase": [fase["stage"] for fase in run["stages"]],
+            "Tijd (ms)": [fase["seconds"] * 1000 for fase in run["stages"]],
+            **({
+                "Toegewezen (kB)": [fase["allocated_bytes"] / 1024 for fase in run["stages"]],
+                "Piek (kB)": [fase["peak_bytes"] / 1024 for fase in run["stages"]],
+            } if profiel.memory else {}),
+        })
+        st.caption(f"Totaal {run['seconds'] * 1000:.0f} ms")
+        st.caption(f"Opnieuw berekend: {', '.join(graaf.recomputed) or 'niets'}")
+        st.dataframe({naam: {sleutel: info[sleutel] for sleutel in ("hits", "misses", "currsize")}
+                      for naam, info in cache_info().items()})